@@ -5,7 +5,8 @@ from flask import Flask
 from flask_migrate import Migrate
 
 from config import Config
-from app.extensions import db
+from app.extensions import chart_cache, db, pool_metrics
+from app.services.upload_job_service import expire_stale_jobs
 
 # Criar timezone de São Paulo manualmente (UTC-3)
 SAO_PAULO_TZ = timezone(timedelta(hours=-3))
@@ -39,6 +40,9 @@ def create_app(config_object: type[Config] = Config) -> Flask:
     upload_path.mkdir(parents=True, exist_ok=True)
 
     db.init_app(app)
+    chart_cache.init_app(app)
+    with app.app_context():
+        pool_metrics.init_app(app, db.engine)
     Migrate(app, db)
 
     with app.app_context():
@@ -48,5 +52,8 @@ def create_app(config_object: type[Config] = Config) -> Flask:
         app.register_blueprint(web_bp)
         app.register_blueprint(api_bp, url_prefix="/api")
 
+        # Jobs de upload que ficaram pela metade em um processo anterior.
+        expire_stale_jobs(app)
+
     return app
 
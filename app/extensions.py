@@ -1,5 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 
+from app.services.chart_cache_service import ChartPayloadCache
+from app.services.database_service import PoolMetrics
+
 # Centralised extensions module so models and app factory share the same db instance.
 db = SQLAlchemy()
-
+# Cache de payloads de gráficos; o backend (memória ou Redis) é escolhido em init_app
+# a partir de CACHE_BACKEND / CACHE_REDIS_URL.
+chart_cache = ChartPayloadCache()
+# Contadores do pool de conexões; ligados ao engine em create_app.
+pool_metrics = PoolMetrics()
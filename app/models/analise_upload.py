@@ -2,7 +2,10 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List
 
+from sqlalchemy.dialects import mysql
+
 from app.extensions import db
+from app.models.types import CompressedJSON
 
 
 class AnaliseUpload(db.Model):
@@ -13,8 +16,17 @@ class AnaliseUpload(db.Model):
     categoria = db.Column(db.String(120), nullable=False)
     nome_arquivo = db.Column(db.String(255), nullable=False)
     caminho_arquivo = db.Column(db.String(500), nullable=False)
-    dados_extraidos = db.Column(db.JSON, nullable=False)
+    dados_extraidos = db.Column(CompressedJSON, nullable=True)
+    formato_armazenamento = db.Column(db.String(20), nullable=False, default='json')
+    caminho_dados = db.Column(db.String(500), nullable=True)
+    esquema_dados = db.Column(db.JSON, nullable=True)
+    total_linhas = db.Column(db.Integer, nullable=True)
+    dialeto_csv = db.Column(db.JSON, nullable=True)
+    hash_conteudo = db.Column(db.String(64), nullable=True)
+    cache_metadata = db.Column(db.JSON, nullable=True)
     linhas_ocultas = db.Column(db.JSON, nullable=False, default=list)
+    mascara_ocultas = db.Column(db.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True)
+    assinatura_ocultas = db.Column(db.String(40), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     data_upload = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -24,12 +36,10 @@ class AnaliseUpload(db.Model):
     )
 
     def to_dict(self) -> Dict[str, Any]:
-        hidden_rows: List[int] = []
-        for value in self.linhas_ocultas or []:
-            try:
-                hidden_rows.append(int(value))
-            except (TypeError, ValueError):
-                continue
+        # O bitmap é a fonte das linhas ocultas; a lista só é montada aqui, para quem a lê.
+        from app.services.analise_visibility_service import hidden_row_list
+
+        hidden_rows: List[int] = hidden_row_list(self)
 
         return {
             'id': self.id,
@@ -38,6 +48,12 @@ class AnaliseUpload(db.Model):
             'nome_arquivo': self.nome_arquivo,
             'caminho_arquivo': self.caminho_arquivo,
             'dados_extraidos': self.dados_extraidos,
+            'formato_armazenamento': self.formato_armazenamento,
+            'caminho_dados': self.caminho_dados,
+            'esquema_dados': list(self.esquema_dados or []),
+            'total_linhas': self.total_linhas,
+            'dialeto_csv': self.dialeto_csv,
+            'hash_conteudo': self.hash_conteudo,
             'linhas_ocultas': hidden_rows,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'data_upload': self.data_upload.isoformat() if self.data_upload else None,
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from app.extensions import db
+from app.models.types import CompressedJSON
+
+
+class ArquivoBlob(db.Model):
+    """Arquivo guardado uma única vez por conteúdo (SHA-256), com contagem de referências."""
+
+    __tablename__ = 'arquivo_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    chave = db.Column(db.String(80), nullable=False, unique=True)
+    caminho = db.Column(db.String(500), nullable=False, index=True)
+    tamanho = db.Column(db.BigInteger, nullable=True)
+    referencias = db.Column(db.Integer, nullable=False, default=0)
+    # Payload completo do balancete ou perfil da análise: comprimido como os dados_extraidos.
+    resultado_parse = db.Column(CompressedJSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'chave': self.chave,
+            'caminho': self.caminho,
+            'tamanho': self.tamanho,
+            'referencias': self.referencias,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
@@ -2,17 +2,26 @@ from datetime import datetime
 from typing import Any, Dict
 
 from app.extensions import db
+from app.models.types import CompressedJSON
 
 
 class ArquivoImportado(db.Model):
     __tablename__ = 'arquivos_importados'
+    __table_args__ = (
+        db.UniqueConstraint('workflow_id', 'periodo', name='uq_arquivos_importados_workflow_periodo'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     workflow_id = db.Column(db.Integer, db.ForeignKey('workflows.id'), nullable=False, index=True)
     nome_arquivo = db.Column(db.String(255), nullable=False)
     caminho_arquivo = db.Column(db.String(512), nullable=False)
-    dados_extraidos = db.Column(db.JSON, nullable=True)
+    dados_extraidos = db.Column(CompressedJSON, nullable=True)
+    dialeto_csv = db.Column(db.JSON, nullable=True)
+    hash_conteudo = db.Column(db.String(64), nullable=True)
+    # Mês de referência (dia 1); um upload por período dentro do workflow.
+    periodo = db.Column(db.Date, nullable=True)
     data_upload = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     workflow = db.relationship(
         'Workflow',
@@ -26,6 +35,10 @@ class ArquivoImportado(db.Model):
             'nome_arquivo': self.nome_arquivo,
             'caminho_arquivo': self.caminho_arquivo,
             'dados_extraidos': self.dados_extraidos,
+            'dialeto_csv': self.dialeto_csv,
+            'hash_conteudo': self.hash_conteudo,
+            'periodo': self.periodo.strftime('%Y-%m') if self.periodo else None,
             'data_upload': self.data_upload.isoformat() if self.data_upload else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
 
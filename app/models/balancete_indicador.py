@@ -0,0 +1,47 @@
+from typing import Any, Dict
+
+from sqlalchemy.dialects import mysql
+
+from app.extensions import db
+
+
+class BalanceteIndicador(db.Model):
+    """Uma linha do balancete importado; o nome do indicador é único dentro do upload."""
+
+    __tablename__ = 'balancete_indicadores'
+    __table_args__ = (
+        db.UniqueConstraint('arquivo_id', 'indicador', name='uq_balancete_indicadores_arquivo_indicador'),
+        db.Index('ix_balancete_indicadores_arquivo_ordem', 'arquivo_id', 'ordem'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    arquivo_id = db.Column(
+        db.Integer,
+        db.ForeignKey('arquivos_importados.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    ordem = db.Column(db.Integer, nullable=False)
+    # Comparação binária: nomes que só diferem em acento ou caixa são indicadores distintos.
+    indicador = db.Column(db.String(255).with_variant(mysql.VARCHAR(255, binary=True), 'mysql'), nullable=False)
+    valor_periodo_1 = db.Column(db.Float(precision=53), nullable=True)
+    valor_periodo_2 = db.Column(db.Float(precision=53), nullable=True)
+    diferenca_absoluta = db.Column(db.Float(precision=53), nullable=True)
+    diferenca_percentual = db.Column(db.Float(precision=53), nullable=True)
+    tendencia = db.Column(db.String(10), nullable=True)
+    tipo_valor = db.Column(db.String(20), nullable=False, default='currency')
+
+    arquivo = db.relationship(
+        'ArquivoImportado',
+        backref=db.backref('indicadores', lazy='dynamic', passive_deletes=True)
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'indicador': self.indicador,
+            'valor_periodo_1': self.valor_periodo_1,
+            'valor_periodo_2': self.valor_periodo_2,
+            'diferenca_absoluta': self.diferenca_absoluta,
+            'diferenca_percentual': self.diferenca_percentual,
+            'tendencia': self.tendencia,
+            'tipo_valor': self.tipo_valor,
+        }
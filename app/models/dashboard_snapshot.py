@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from app.extensions import db
+from app.models.types import CompressedJSON
+
+
+class DashboardSnapshot(db.Model):
+    """Gráficos já calculados do workflow publicado, servidos pela visualização somente leitura."""
+
+    __tablename__ = 'dashboard_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    workflow_id = db.Column(
+        db.Integer,
+        db.ForeignKey('workflows.id', ondelete='CASCADE'),
+        nullable=False,
+        unique=True,
+    )
+    # versao_dados do workflow no momento em que o conteúdo foi montado.
+    versao_dados = db.Column(db.Integer, nullable=True)
+    conteudo = db.Column(CompressedJSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    workflow = db.relationship(
+        'Workflow',
+        backref=db.backref('dashboard_snapshot', uselist=False, cascade='all, delete-orphan')
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'workflow_id': self.workflow_id,
+            'versao_dados': self.versao_dados,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
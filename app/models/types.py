@@ -0,0 +1,27 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeDecorator
+
+from app.services.compression_service import dumps_compressed, loads_compressed
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON gravado como binário comprimido, com cabeçalho indicando o codec."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return dumps_compressed(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return loads_compressed(value)
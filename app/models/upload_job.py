@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from app.extensions import db
+
+
+class UploadJob(db.Model):
+    __tablename__ = 'upload_jobs'
+
+    STATUS_PENDENTE = 'pendente'
+    STATUS_PROCESSANDO = 'processando'
+    STATUS_CONCLUIDO = 'concluido'
+    STATUS_ERRO = 'erro'
+
+    id = db.Column(db.Integer, primary_key=True)
+    workflow_id = db.Column(db.Integer, db.ForeignKey('workflows.id'), nullable=False, index=True)
+    tipo = db.Column(db.String(20), nullable=False)
+    categoria = db.Column(db.String(120), nullable=True)
+    nome_arquivo = db.Column(db.String(255), nullable=False)
+    caminho_arquivo = db.Column(db.String(500), nullable=False)
+    caminho_temporario = db.Column(db.String(500), nullable=True)
+    hash_conteudo = db.Column(db.String(64), nullable=True)
+    periodo = db.Column(db.Date, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDENTE)
+    progresso = db.Column(db.Integer, nullable=False, default=0)
+    linhas_processadas = db.Column(db.Integer, nullable=False, default=0)
+    erro = db.Column(db.Text, nullable=True)
+    resultado = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finalizado_em = db.Column(db.DateTime, nullable=True)
+
+    workflow = db.relationship(
+        'Workflow',
+        backref=db.backref('upload_jobs', lazy='dynamic', cascade='all, delete-orphan')
+    )
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in {self.STATUS_CONCLUIDO, self.STATUS_ERRO}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'workflow_id': self.workflow_id,
+            'tipo': self.tipo,
+            'categoria': self.categoria,
+            'nome_arquivo': self.nome_arquivo,
+            'status': self.status,
+            'progresso': self.progresso,
+            'linhas_processadas': self.linhas_processadas,
+            'erro': self.erro,
+            'resultado': self.resultado,
+            'finalizado': self.finalizado,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None,
+        }
@@ -13,6 +13,10 @@ class Workflow(db.Model):
     tipo = db.Column(db.Enum('balancete', 'analise_jp', name='workflow_tipo'), nullable=False)
     empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=True, index=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incrementada a cada alteração de uploads, indicadores ou gráficos; clientes aplicam deltas por ela.
+    versao_dados = db.Column(db.Integer, nullable=False, default=0)
+    # Momento da última alteração que incrementou versao_dados; base do Last-Modified da API.
+    dados_atualizados_em = db.Column(db.DateTime, nullable=True)
 
     empresa = db.relationship('Empresa', back_populates='workflows')
 
@@ -27,4 +31,5 @@ class Workflow(db.Model):
             'tipo': self.tipo,
             'empresa_id': self.empresa_id,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'versao_dados': self.versao_dados or 0,
         }
@@ -1,29 +1,96 @@
 from __future__ import annotations
 
+import hashlib
+from contextlib import ExitStack
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from flask import Blueprint, current_app, jsonify, request
+import numpy as np
+import pandas as pd
+from flask import Blueprint, current_app, jsonify, request, url_for
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm import defer, undefer
 
-from app.extensions import db
+from app.extensions import chart_cache, db, pool_metrics
 from app.models.workflow import Workflow
 from app.models.empresa import Empresa
 from app.models.arquivo_importado import ArquivoImportado
 from app.models.dashboard import Dashboard
 from app.models.analise_upload import AnaliseUpload
 from app.models.analise_jp_chart import AnaliseJPChart
+from app.models.upload_job import UploadJob
+from app.models.dashboard_snapshot import DashboardSnapshot
 from app.services.theme_service import get_current_theme, update_theme
-from app.services.workflow_import_service import ImportacaoArquivoErro, process_workflow_upload
+from app.services.workflow_import_service import (
+    ImportacaoArquivoErro,
+    format_periodo,
+    parse_periodo,
+    parse_workflow_file,
+    validate_upload,
+)
 from app.services.analise_jp_service import (
     ANALISE_JP_CATEGORIES,
     AnaliseJPProcessingError,
-    extract_payload,
+    build_column_profile,
+    coerce_float,
     normalise_indices,
+    parse_records,
+    parse_upload_to_columnar,
+    profile_is_current,
     slug_to_label,
     validate_category,
-    visible_records,
+    validate_extension,
+)
+from app.services.analise_visibility_service import (
+    hidden_indices,
+    hidden_mask,
+    select_rows,
+    set_rows_hidden,
+    store_mask,
+    upload_row_count,
+    visibility_signature,
+    visible_positions,
+)
+from app.services.analise_chart_service import build_chart_data, validate_aggregation
+from app.services.balancete_indicator_service import (
+    DEFAULT_HISTORY_PERIODS,
+    HISTORY_AGGREGATIONS,
+    MAX_HISTORY_PERIODS,
+    IndicatorIndex,
+    aggregate_history,
+    delete_indicators,
+    indicator_history,
+    load_indicators,
+    optional_floats,
+    period_variation,
+    store_indicators,
+    update_indicator_type,
+)
+from app.services.chart_cache_service import chart_cache_key
+from app.services.dashboard_snapshot_service import find_snapshot, is_current, schedule_refresh, store_snapshot
+from app.services.upload_job_service import expire_job, is_stale, mark_saving, submit_job
+from app.services.upload_stream_service import discard_on_error, hash_file, spool_upload
+from app.services.blob_store_service import (
+    PARSE_ANALISE,
+    PARSE_BALANCETE,
+    acquire_blob,
+    cached_parse_result,
+    find_blob_by_path,
+    records_key,
+    release_blob,
+    remember_parse_result,
+    staging_path,
+    store_blob,
+)
+from app.services.analise_storage_service import (
+    STORAGE_PARQUET,
+    columnar_available,
+    load_records,
+    read_columnar_records,
+    read_frame,
+    record_fields,
+    resolve_storage_format,
 )
 
 
@@ -31,6 +98,9 @@ api_bp = Blueprint("api", __name__)
 
 WORKFLOW_TYPES = {"balancete", "analise_jp"}
 ALLOWED_CHART_TYPES = {"bar", "bar-horizontal", "line", "area", "pie", "donut", "table"}
+ANALISE_PAGE_SIZE = 100
+ANALISE_MAX_PAGE_SIZE = 1000
+HIDDEN_ROW_ACTIONS = {"ocultar", "exibir"}
 BALANCETE_METRICS = {
     "valor_periodo_1": {"fallback_label": "Período 1", "value_kind": "currency"},
     "valor_periodo_2": {"fallback_label": "Período 2", "value_kind": "currency"},
@@ -54,38 +124,12 @@ def _ensure_workflow_type(workflow: Workflow, expected: str):
     return None
 
 
-def _coerce_float(value: Any) -> Optional[float]:
-    if value is None:
-        return None
-
-    text = str(value).strip()
-    if not text:
-        return None
-
-    replacements = {
-        "R$": "",
-        "r$": "",
-        "%": "",
-        "\u00a0": "",
-        " ": "",
-    }
-    for needle, replacement in replacements.items():
-        text = text.replace(needle, replacement)
-
-    if "," in text and "." in text:
-        text = text.replace(".", "").replace(",", ".")
-    else:
-        text = text.replace(",", ".")
-
-    try:
-        return float(text)
-    except ValueError:
-        return None
-
-
 def _delete_file_if_exists(path: Optional[str]) -> None:
     if not path:
         return
+    # Blobs são compartilhados entre uploads: só somem quando a última referência é solta.
+    if release_blob(path):
+        return
     file_path = Path(path)
     if file_path.exists():
         try:
@@ -94,19 +138,82 @@ def _delete_file_if_exists(path: Optional[str]) -> None:
             current_app.logger.warning("Falha ao remover arquivo %s", file_path)
 
 
-def _balancete_dataset_from_upload(arquivo: ArquivoImportado) -> Dict[str, Any]:
-    payload = arquivo.dados_extraidos or {}
-    indicadores = payload.get("indicadores") or []
+def _bump_data_version(workflow_id: int) -> None:
+    """Incrementa a versão dos dados do workflow no mesmo commit da alteração."""
+    Workflow.query.filter_by(id=workflow_id).update(
+        {Workflow.versao_dados: Workflow.versao_dados + 1, Workflow.dados_atualizados_em: datetime.utcnow()},
+        synchronize_session=False,
+    )
+
+
+def _schedule_snapshot_refresh(workflow_id: int) -> None:
+    """Depois do commit de uma alteração: mantém atualizado o snapshot do dashboard publicado."""
+    schedule_refresh(current_app._get_current_object(), workflow_id, _rebuild_dashboard_snapshot)
+
+
+def _data_version(workflow_id: int) -> int:
+    return db.session.query(Workflow.versao_dados).filter_by(id=workflow_id).scalar() or 0
+
 
+def _wants_delta_response() -> bool:
+    return (request.args.get("delta") or "").strip().lower() in {"1", "true", "sim"}
+
+
+def _resource_etag(*parts: Any) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def _last_modified(*values: Optional[datetime]) -> Optional[datetime]:
+    stamps = [value for value in values if value]
+    if not stamps:
+        return None
+    # Datas do banco são UTC sem fuso; o cabeçalho HTTP tem resolução de segundos.
+    return max(stamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _data_last_modified(workflow: Workflow) -> Optional[datetime]:
+    """Last-Modified dos recursos do workflow: muda em toda alteração, inclusive exclusões."""
+    return _last_modified(workflow.dados_atualizados_em)
+
+
+def _settled_last_modified(last_modified: Optional[datetime]) -> Optional[datetime]:
+    # Alterações no mesmo segundo teriam o mesmo Last-Modified: a data só vale depois que o
+    # segundo fecha, para que If-Modified-Since nunca produza um 304 desatualizado.
+    if last_modified and last_modified < datetime.now(timezone.utc).replace(microsecond=0):
+        return last_modified
+    return None
+
+
+def _with_validators(response, etag: str, last_modified: Optional[datetime]):
+    response.set_etag(etag)
+    last_modified = _settled_last_modified(last_modified)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]):
+    """Resposta 304 quando o cliente já tem a versão atual; deve rodar antes de carregar os dados."""
+    last_modified = _settled_last_modified(last_modified)
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    elif last_modified and request.if_modified_since:
+        matched = last_modified <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    return _with_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def _balancete_period_labels(payload: Dict[str, Any]) -> Tuple[str, str]:
     periodo1_label = payload.get("periodo_1_label") or "Período 1"
     periodo2_label = payload.get("periodo_2_label") or "Período 2"
+    return periodo1_label, periodo2_label
 
-    indicator_options: List[Dict[str, Any]] = []
-    for item in indicadores:
-        nome = item.get("indicador")
-        if nome:
-            indicator_options.append({"label": nome, "value": nome})
 
+def _balancete_value_options(periodo1_label: str, periodo2_label: str) -> List[Dict[str, Any]]:
     value_options: List[Dict[str, Any]] = []
     for key, meta in BALANCETE_METRICS.items():
         label = meta["fallback_label"]
@@ -121,55 +228,134 @@ def _balancete_dataset_from_upload(arquivo: ArquivoImportado) -> Dict[str, Any]:
                 "value_kind": meta["value_kind"],
             }
         )
+    return value_options
+
+
+def _balancete_summary(arquivo: ArquivoImportado) -> Dict[str, Any]:
+    # dados_extraidos guarda só o cabeçalho; os indicadores ficam em balancete_indicadores.
+    payload = arquivo.dados_extraidos or {}
+    periodo1_label, periodo2_label = _balancete_period_labels(payload)
 
     return {
         "upload": {
             "id": arquivo.id,
             "nome_arquivo": arquivo.nome_arquivo,
             "data_upload": arquivo.data_upload.isoformat() if arquivo.data_upload else None,
+            "periodo": format_periodo(arquivo.periodo),
         },
         "period_labels": {
             "periodo_1": periodo1_label,
             "periodo_2": periodo2_label,
         },
-        "indicator_options": indicator_options,
-        "value_options": value_options,
-        "records": indicadores,
-        "total_indicadores": len(indicadores),
+        "value_options": _balancete_value_options(periodo1_label, periodo2_label),
+        "total_indicadores": payload.get("total_indicadores") or 0,
+        "indicadores_renomeados": list(payload.get("indicadores_renomeados") or []),
     }
 
 
-def _latest_balancete_upload(workflow_id: int) -> Optional[ArquivoImportado]:
+def _balancete_dataset_from_upload(arquivo: ArquivoImportado) -> Dict[str, Any]:
+    indicadores = load_indicators(arquivo.id)
+
+    indicator_options: List[Dict[str, Any]] = []
+    for item in indicadores:
+        nome = item.get("indicador")
+        if nome:
+            indicator_options.append({"label": nome, "value": nome})
+
+    dataset = _balancete_summary(arquivo)
+    dataset["indicator_options"] = indicator_options
+    dataset["records"] = indicadores
+    return dataset
+
+
+def _balancete_chart_index(arquivo: ArquivoImportado, chart: Dashboard) -> IndicatorIndex:
+    """Índice mínimo para um gráfico: só os indicadores que ele referencia."""
+    summary = _balancete_summary(arquivo)
+    records = load_indicators(arquivo.id, chart.indicadores or [])
+    # Sem indicadores válidos o gráfico mostra todos, como no dataset completo.
+    return IndicatorIndex(records or load_indicators(arquivo.id), summary["value_options"])
+
+
+def _latest_balancete_upload(workflow_id: int, with_records: bool = True) -> Optional[ArquivoImportado]:
+    loader = undefer if with_records else defer
     return (
         ArquivoImportado.query.filter_by(workflow_id=workflow_id)
-        .order_by(ArquivoImportado.data_upload.desc())
+        .options(loader(ArquivoImportado.dados_extraidos))
+        .order_by(ArquivoImportado.periodo.desc(), ArquivoImportado.data_upload.desc())
         .first()
     )
 
 
-def _balancete_chart_payload(chart: Dashboard, dataset: Dict[str, Any]) -> Dict[str, Any]:
-    indicators = dataset.get("records") or []
-    indicator_map = {item.get("indicador"): item for item in indicators if isinstance(item, dict)}
+def _balancete_periods(workflow_id: int) -> List[Dict[str, Any]]:
+    uploads = (
+        ArquivoImportado.query.filter_by(workflow_id=workflow_id)
+        .options(defer(ArquivoImportado.dados_extraidos))
+        .order_by(ArquivoImportado.periodo.asc())
+        .all()
+    )
+    return [
+        {
+            "id": upload.id,
+            "periodo": format_periodo(upload.periodo),
+            "nome_arquivo": upload.nome_arquivo,
+            "data_upload": upload.data_upload.isoformat() if upload.data_upload else None,
+        }
+        for upload in uploads
+    ]
+
+
+def _cached_chart_payload(
+    chart, kind: str, upload_id: int, hidden_hash: str, build, tolerant: bool = False
+) -> Dict[str, Any]:
+    """Payload do gráfico pelo cache; com tolerant, uma falha vira gráfico sem dados.
+
+    O snapshot do dashboard publicado usa tolerant: um gráfico com problema não pode impedir
+    a publicação nem a atualização dos demais.
+    """
+    key = chart_cache_key(chart.workflow_id, kind, upload_id, hidden_hash, chart.id, chart.updated_at)
+    payload = chart_cache.get(key)
+    if payload is None:
+        try:
+            payload = build()
+        except Exception:
+            if not tolerant:
+                raise
+            current_app.logger.exception("Falha ao montar o gráfico %s para o snapshot.", chart.id)
+            return {"chart": chart.to_dict(), "data": None, "error": "Não foi possível montar este gráfico."}
+        chart_cache.set(key, payload)
+    return payload
+
+
+def _balancete_upload_version(arquivo: ArquivoImportado) -> str:
+    # updated_at muda a cada alteração do upload (ex.: tipo de indicador): uma leitura que
+    # concorra com a alteração grava o valor antigo sob a chave antiga, que não é mais lida.
+    return arquivo.updated_at.isoformat() if arquivo.updated_at else "-"
+
+
+def _cached_balancete_dataset(arquivo: ArquivoImportado) -> Dict[str, Any]:
+    # dados_extraidos só é carregado (consulta adiada) quando o dataset não está em cache.
+    key = chart_cache_key(
+        arquivo.workflow_id, "balancete", arquivo.id, _balancete_upload_version(arquivo), "dataset", None
+    )
+    dataset = chart_cache.get(key)
+    if dataset is None:
+        dataset = _balancete_dataset_from_upload(arquivo)
+        chart_cache.set(key, dataset)
+    return dataset
+
+
+def _balancete_chart_payload(chart: Dashboard, index: IndicatorIndex) -> Dict[str, Any]:
+    positions = index.lookup(chart.indicadores or [])
+    if not len(positions):
+        # Sem indicadores válidos o gráfico mostra todos os registros do upload.
+        positions = np.arange(len(index), dtype=np.int64)
 
-    labels: List[str] = []
-    filtered_rows: List[Dict[str, Any]] = []
+    labels = [index.names[position] or f"Indicador {position + 1}" for position in positions.tolist()]
     indicator_tipos: Dict[str, str] = {}
-    
-    for indicador in chart.indicadores or []:
-        row = indicator_map.get(indicador)
-        if not row:
-            continue
-        labels.append(indicador)
-        filtered_rows.append(row)
-        indicator_tipos[indicador] = row.get("tipo_valor", "currency")
-
-    if not labels:
-        labels = [item.get("indicador", f"Indicador {index + 1}") for index, item in enumerate(indicators)]
-        filtered_rows = indicators
-        for item in indicators:
-            nome = item.get("indicador")
-            if nome:
-                indicator_tipos[nome] = item.get("tipo_valor", "currency")
+    for position in positions.tolist():
+        nome = index.names[position]
+        if nome:
+            indicator_tipos[nome] = index.tipos[position]
 
     series_payload: List[Dict[str, Any]] = []
     for metric in chart.metricas or []:
@@ -177,27 +363,8 @@ def _balancete_chart_payload(chart: Dashboard, dataset: Dict[str, Any]) -> Dict[
         if key not in BALANCETE_METRICS:
             continue
 
-        label = metric.get("label")
-        if not label:
-            label = next(
-                (
-                    option["label"]
-                    for option in dataset.get("value_options", [])
-                    if option.get("key") == key
-                ),
-                BALANCETE_METRICS[key]["fallback_label"],
-            )
-
-        values: List[Optional[float]] = []
-        raw_values: List[Optional[float]] = []
-        for row in filtered_rows:
-            value = row.get(key)
-            if value is None:
-                values.append(None)
-                raw_values.append(None)
-                continue
-            values.append(float(value))
-            raw_values.append(float(value))
+        label = metric.get("label") or index.labels.get(key) or BALANCETE_METRICS[key]["fallback_label"]
+        values = index.column(key, positions)
 
         series_payload.append(
             {
@@ -206,7 +373,7 @@ def _balancete_chart_payload(chart: Dashboard, dataset: Dict[str, Any]) -> Dict[
                 "color": metric.get("color"),
                 "value_kind": BALANCETE_METRICS[key]["value_kind"],
                 "values": values,
-                "raw_values": raw_values,
+                "raw_values": list(values),
             }
         )
 
@@ -220,136 +387,279 @@ def _balancete_chart_payload(chart: Dashboard, dataset: Dict[str, Any]) -> Dict[
     }
 
 
+def _latest_analise_upload(workflow_id: int, categoria: str, with_records: bool = True) -> Optional[AnaliseUpload]:
+    loader = undefer if with_records else defer
+    return (
+        AnaliseUpload.query.filter_by(workflow_id=workflow_id, categoria=categoria)
+        .options(loader(AnaliseUpload.dados_extraidos))
+        .order_by(AnaliseUpload.created_at.desc())
+        .first()
+    )
+
+
+def _analise_upload_etag(upload: AnaliseUpload, *extra: Any) -> str:
+    return _resource_etag(
+        "analise",
+        upload.id,
+        upload.created_at.isoformat() if upload.created_at else "-",
+        visibility_signature(upload),
+        *extra,
+    )
+
+
+def _latest_analise_uploads(
+    workflow_id: int,
+    categorias: Optional[Iterable[str]] = None,
+    with_records: bool = False,
+) -> Dict[str, AnaliseUpload]:
+    """Último upload de cada categoria do workflow em uma única consulta.
+
+    Usa agrupamentos em vez de funções de janela, que o MySQL só oferece a partir da 8.0:
+    a data mais recente por categoria e, em caso de empate, o maior id.
+    """
+    filters = [AnaliseUpload.workflow_id == workflow_id]
+    if categorias is not None:
+        filters.append(AnaliseUpload.categoria.in_(list(categorias)))
+    latest_dates = (
+        db.session.query(
+            AnaliseUpload.categoria.label("categoria"),
+            db.func.max(AnaliseUpload.created_at).label("created_at"),
+        )
+        .filter(*filters)
+        .group_by(AnaliseUpload.categoria)
+        .subquery()
+    )
+    latest = (
+        db.session.query(db.func.max(AnaliseUpload.id).label("id"))
+        .join(
+            latest_dates,
+            db.and_(
+                AnaliseUpload.categoria == latest_dates.c.categoria,
+                AnaliseUpload.created_at == latest_dates.c.created_at,
+            ),
+        )
+        .filter(*filters)
+        .group_by(AnaliseUpload.categoria)
+        .subquery()
+    )
+
+    loader = undefer if with_records else defer
+    uploads = (
+        AnaliseUpload.query.join(latest, AnaliseUpload.id == latest.c.id)
+        .options(loader(AnaliseUpload.dados_extraidos))
+        .all()
+    )
+    return {upload.categoria: upload for upload in uploads}
+
+
+def _build_analise_profile(upload: AnaliseUpload, records: Optional[Sequence[dict]] = None) -> Dict[str, Any]:
+    if records is None:
+        records = load_records(upload)
+    profile = build_column_profile(records, hidden_indices(hidden_mask(upload, len(records))))
+    # A assinatura de referência é a do upload, calculada a partir do bitmap.
+    profile["hidden_signature"] = visibility_signature(upload)
+    return profile
+
+
+def _analise_profile(upload: AnaliseUpload, records: Optional[Sequence[dict]] = None) -> Dict[str, Any]:
+    if profile_is_current(upload.cache_metadata, visibility_signature(upload)):
+        return upload.cache_metadata
+    # Perfil ausente ou desatualizado (uploads antigos): calculado sem gravar, pois as leituras
+    # não alteram o banco. Quem muda as linhas ocultas grava o perfil novo.
+    return _build_analise_profile(upload, records)
+
+
+def _analise_upload_meta(upload: AnaliseUpload) -> Dict[str, Any]:
+    return {
+        "id": upload.id,
+        "nome_arquivo": upload.nome_arquivo,
+        "created_at": upload.created_at.isoformat() if upload.created_at else None,
+    }
+
+
+def _analise_summary(upload: AnaliseUpload) -> Dict[str, Any]:
+    profile = _analise_profile(upload)
+    return {
+        "upload": _analise_upload_meta(upload),
+        "fields": list(profile["fields"]),
+        "numeric_fields": list(profile["numeric_fields"]),
+        "totals": dict(profile["totals"]),
+    }
+
+
 def _analise_dataset(upload: AnaliseUpload) -> Dict[str, Any]:
-    records = upload.dados_extraidos if isinstance(upload.dados_extraidos, list) else []
-    visible = visible_records(records, upload.linhas_ocultas or [])
-    total_records = len(records)
-    hidden_count = total_records - len(visible)
-
-    field_names: List[str] = []
-    reference = visible if visible else records
-    for record in reference:
-        if isinstance(record, dict):
-            field_names = list(record.keys())
-            break
-
-    numeric_fields: List[str] = []
-    for field in field_names:
-        numeric_detected = True
-        has_values = False
-        for record in visible:
-            value = record.get(field)
-            if value in (None, ""):
-                continue
-            has_values = True
-            if _coerce_float(value) is None:
-                numeric_detected = False
-                break
-        if numeric_detected and has_values:
-            numeric_fields.append(field)
+    records = load_records(upload)
+    mask = hidden_mask(upload, len(records))
+    visible = records if not mask.any() else [records[index] for index in visible_positions(mask).tolist()]
+    profile = _analise_profile(upload, records)
 
     return {
-        "upload": {
-            "id": upload.id,
-            "nome_arquivo": upload.nome_arquivo,
-            "created_at": upload.created_at.isoformat() if upload.created_at else None,
-        },
+        "upload": _analise_upload_meta(upload),
         "records": visible,
-        "fields": field_names,
-        "numeric_fields": numeric_fields,
-        "totals": {
-            "total": total_records,
-            "visiveis": len(visible),
-            "ocultos": hidden_count,
-        },
-        "linhas_ocultas": normalise_indices(upload.linhas_ocultas or []),
+        "fields": list(profile["fields"]),
+        "numeric_fields": list(profile["numeric_fields"]),
+        "profile": profile["columns"],
+        "totals": dict(profile["totals"]),
+        "linhas_ocultas": hidden_indices(mask),
     }
 
 
-def _analise_chart_payload(chart: AnaliseJPChart, dataset: Dict[str, Any]) -> Dict[str, Any]:
-    records = dataset.get("records") or []
-    if not isinstance(records, list):
-        records = []
+def _analise_page_params(profile: Dict[str, Any], default_limit: Optional[int]) -> Tuple[Dict[str, Any], Optional[str]]:
+    fields = list(profile["fields"])
 
-    row_indices = []
-    if isinstance(chart.options, dict):
-        raw_rows = chart.options.get("row_indices")
-        if isinstance(raw_rows, Iterable):
-            row_indices = normalise_indices(raw_rows)
-
-    if row_indices:
-        filtered = []
-        for index in row_indices:
-            if 0 <= index < len(records):
-                filtered.append((index, records[index]))
-        indexed_records = filtered
+    selected = fields
+    raw_fields = request.args.get("fields")
+    if raw_fields:
+        selected = []
+        for name in raw_fields.split(","):
+            name = name.strip()
+            if not name or name in selected:
+                continue
+            if name not in fields:
+                return {}, f"Coluna desconhecida: {name}."
+            selected.append(name)
+
+    sort_field: Optional[str] = None
+    descending = False
+    raw_sort = (request.args.get("sort") or "").strip()
+    if raw_sort:
+        descending = raw_sort.startswith("-")
+        sort_field = raw_sort[1:] if raw_sort[0] in "+-" else raw_sort
+        if sort_field not in fields:
+            return {}, f"Coluna de ordenação desconhecida: {sort_field}."
+
+    limit = request.args.get("limit", default=default_limit, type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), ANALISE_MAX_PAGE_SIZE)
+    offset = max(request.args.get("offset", default=0, type=int), 0)
+
+    return {
+        "fields": selected,
+        "projected": bool(raw_fields),
+        "sort_field": sort_field,
+        "descending": descending,
+        "limit": limit,
+        "offset": offset,
+    }, None
+
+
+def _analise_page(upload: AnaliseUpload, profile: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Ordena, pagina e projeta as linhas visíveis no servidor."""
+    sort_field = params["sort_field"]
+    columns = None
+    if params["projected"]:
+        columns = list(params["fields"])
+        if sort_field and sort_field not in columns:
+            columns.append(sort_field)
+
+    records = load_records(upload, columns=columns)
+    # rows leva a posição entre as visíveis ao índice em records; a máscara não gera outra lista.
+    rows = visible_positions(hidden_mask(upload, len(records))).tolist()
+    positions = list(range(len(rows)))
+
+    if sort_field:
+        numeric = sort_field in profile["numeric_fields"]
+        keyed: List[Tuple[Any, int]] = []
+        missing: List[int] = []
+        for position in positions:
+            value = records[rows[position]].get(sort_field)
+            key = coerce_float(value) if numeric else str(value if value is not None else "").strip().casefold()
+            if key is None or key == "":
+                missing.append(position)
+            else:
+                keyed.append((key, position))
+        keyed.sort(key=lambda item: item[0], reverse=params["descending"])
+        # Valores vazios sempre ao final, independentemente da direção.
+        positions = [position for _, position in keyed] + missing
+
+    offset = params["offset"]
+    limit = params["limit"]
+    window = positions[offset:] if limit is None else positions[offset:offset + limit]
+
+    fields = params["fields"]
+    if params["projected"]:
+        page_records = [{field: records[rows[position]].get(field) for field in fields} for position in window]
     else:
-        indexed_records = list(enumerate(records))
-
-    labels: List[str] = []
-    for index, record in indexed_records:
-        label_parts: List[str] = []
-        for dimension in chart.dimensoes or []:
-            value = str(record.get(dimension, "")).strip()
-            if value:
-                label_parts.append(value)
-        if not label_parts:
-            label_parts.append(f"Linha {index + 1}")
-        labels.append(" • ".join(label_parts))
+        page_records = [records[rows[position]] for position in window]
 
-    series_payload: List[Dict[str, Any]] = []
+    return {
+        "fields": list(fields),
+        "records": page_records,
+        "row_indices": window,
+        "offset": offset,
+        "limit": limit,
+        "total": len(rows),
+        "sort": (("-" if params["descending"] else "") + sort_field) if sort_field else None,
+    }
+
+
+def _analise_chart_columns(chart: AnaliseJPChart) -> List[str]:
+    columns: List[str] = [str(dimension) for dimension in chart.dimensoes or []]
     for metric in chart.metricas or []:
-        key = metric.get("key")
-        values: List[Optional[float]] = []
-        raw: List[str] = []
-        for _, record in indexed_records:
-            value = record.get(key)
-            raw.append("" if value is None else str(value))
-            values.append(_coerce_float(value))
+        if isinstance(metric, dict) and metric.get("key") is not None:
+            columns.append(str(metric["key"]))
+    return columns
 
-        series_payload.append(
-            {
-                "key": key,
-                "label": metric.get("label") or key,
-                "color": metric.get("color"),
-                "values": values,
-                "raw_values": raw,
-            }
-        )
+
+def _analise_visible_frame(upload: AnaliseUpload, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    # Índices de gráficos são relativos às linhas visíveis, então as ocultas saem antes.
+    frame = read_frame(upload, columns=columns)
+    mask = hidden_mask(upload, len(frame))
+    if not mask.any():
+        return frame
+    return frame[~mask].reset_index(drop=True)
+
+
+def _analise_chart_payload(chart: AnaliseJPChart, frame: pd.DataFrame) -> Dict[str, Any]:
+    row_indices: List[Any] = []
+    aggregation = None
+    if isinstance(chart.options, dict):
+        raw_rows = chart.options.get("row_indices")
+        if isinstance(raw_rows, Iterable):
+            # build_chart_data normaliza os índices uma única vez.
+            row_indices = list(raw_rows)
+        if isinstance(chart.options.get("aggregation"), dict):
+            aggregation = chart.options["aggregation"]
 
     return {
         "chart": chart.to_dict(),
-        "data": {
-            "labels": labels,
-            "series": series_payload,
-        },
+        "data": build_chart_data(
+            frame,
+            chart.dimensoes or [],
+            chart.metricas or [],
+            row_indices,
+            aggregation=aggregation,
+        ),
     }
 
 
-def serialize_workflow(workflow: Workflow) -> Dict[str, Any]:
+def serialize_workflow(workflow: Workflow, summary: bool = False) -> Dict[str, Any]:
+    """Serializa o workflow; no modo resumo os registros ficam de fora e são buscados sob demanda."""
     payload = workflow.to_dict()
 
     if workflow.tipo == "balancete":
         latest_upload = _latest_balancete_upload(workflow.id)
+        upload_payload = None
+        if latest_upload:
+            upload_payload = _balancete_summary(latest_upload) if summary else _balancete_dataset_from_upload(latest_upload)
         payload["balancete"] = {
             "has_upload": latest_upload is not None,
-            "upload": _balancete_dataset_from_upload(latest_upload) if latest_upload else None,
+            "upload": upload_payload,
+            "periodos": _balancete_periods(workflow.id),
             "charts": [chart.to_dict() for chart in workflow.dashboards.order_by(Dashboard.created_at.desc())],
         }
     else:
         categories_status = []
+        latest_uploads = _latest_analise_uploads(workflow.id, with_records=not summary)
+        build_upload = _analise_summary if summary else _analise_dataset
         for categoria in ANALISE_JP_CATEGORIES:
-            latest = (
-                AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=categoria)
-                .order_by(AnaliseUpload.created_at.desc())
-                .first()
-            )
+            latest = latest_uploads.get(categoria)
             categories_status.append(
                 {
                     "slug": categoria,
                     "label": slug_to_label(categoria),
                     "has_upload": bool(latest),
-                    "upload": _analise_dataset(latest) if latest else None,
+                    "upload": build_upload(latest) if latest else None,
                 }
             )
         payload["analise_jp"] = {
@@ -360,6 +670,16 @@ def serialize_workflow(workflow: Workflow) -> Dict[str, Any]:
     return payload
 
 
+# -----------------------------------------------------------------------------
+# Diagnóstico
+# -----------------------------------------------------------------------------
+
+
+@api_bp.get("/diagnostico")
+def diagnostico():
+    return jsonify({"pool": pool_metrics.stats(), "cache": chart_cache.stats()})
+
+
 # -----------------------------------------------------------------------------
 # Tema
 # -----------------------------------------------------------------------------
@@ -425,7 +745,8 @@ def create_workflow():
 @api_bp.get("/workflows/<int:workflow_id>")
 def retrieve_workflow(workflow_id: int):
     workflow = _workflow_or_404(workflow_id)
-    return jsonify(serialize_workflow(workflow))
+    summary = request.args.get("summary", type=int) == 1
+    return jsonify(serialize_workflow(workflow, summary=summary))
 
 
 @api_bp.put("/workflows/<int:workflow_id>")
@@ -467,16 +788,270 @@ def delete_workflow(workflow_id: int):
     workflow = _workflow_or_404(workflow_id)
 
     for upload in workflow.arquivos_importados.all():
-        _delete_file_if_exists(upload.caminho_arquivo)
+        _delete_balancete_upload(upload)
     for upload in workflow.analise_uploads.all():
         _delete_file_if_exists(upload.caminho_arquivo)
+        _delete_file_if_exists(upload.caminho_dados)
 
     db.session.delete(workflow)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow_id)
 
     return jsonify({"message": "Workflow removido com sucesso."})
 
 
+# -----------------------------------------------------------------------------
+# Persistência de uploads e jobs assíncronos
+# -----------------------------------------------------------------------------
+
+
+def _current_periodo() -> date:
+    return datetime.utcnow().date().replace(day=1)
+
+
+def _upload_base_path() -> Path:
+    return Path(current_app.config["UPLOAD_FOLDER"])
+
+
+def _delete_balancete_upload(upload: ArquivoImportado) -> None:
+    _delete_file_if_exists(upload.caminho_arquivo)
+    delete_indicators(upload.id)
+    db.session.delete(upload)
+
+
+def _store_balancete_upload(
+    workflow_id: int,
+    nome_arquivo: str,
+    caminho_arquivo: str,
+    hash_conteudo: Optional[str],
+    payload: Dict[str, Any],
+    dialeto: Optional[Dict[str, Any]],
+    periodo: date,
+) -> ArquivoImportado:
+    # Os demais períodos ficam no histórico; só o upload do mesmo mês é substituído.
+    existing_uploads = ArquivoImportado.query.filter_by(workflow_id=workflow_id, periodo=periodo).all()
+    for existing in existing_uploads:
+        _delete_balancete_upload(existing)
+
+    header = {key: value for key, value in payload.items() if key != "indicadores"}
+    new_upload = ArquivoImportado(
+        workflow_id=workflow_id,
+        nome_arquivo=nome_arquivo,
+        caminho_arquivo=caminho_arquivo,
+        hash_conteudo=hash_conteudo,
+        dados_extraidos=header,
+        dialeto_csv=dialeto,
+        periodo=periodo,
+    )
+    # O upload substituído precisa sair antes, por causa do índice único (workflow, período).
+    db.session.flush()
+    db.session.add(new_upload)
+    db.session.flush()
+    renamed = store_indicators(new_upload.id, payload.get("indicadores") or [])
+    if renamed:
+        # Fica registrado no upload: gráficos e a API mostram qual linha ganhou outro nome.
+        new_upload.dados_extraidos = {**header, "indicadores_renomeados": renamed}
+    _bump_data_version(workflow_id)
+    db.session.commit()
+    chart_cache.invalidate_workflow(workflow_id)
+    _schedule_snapshot_refresh(workflow_id)
+    return new_upload
+
+
+def _ingest_balancete_file(
+    workflow_id: int,
+    nome_arquivo: str,
+    partial: Path,
+    chave: str,
+    periodo: date,
+) -> ArquivoImportado:
+    """Guarda o arquivo no repositório de blobs; um conteúdo já importado não é lido de novo."""
+    extension = partial.suffix.lower()
+    # A limpeza cobre a ingestão inteira: uma falha no repositório de blobs ou no commit
+    # também não pode deixar o arquivo temporário para trás.
+    with discard_on_error(partial):
+        cached = cached_parse_result(chave, PARSE_BALANCETE)
+        if cached is not None:
+            payload, dialeto = cached["payload"], cached.get("dialeto")
+        else:
+            payload, dialeto = parse_workflow_file(partial, extension)
+
+        blob = store_blob(_upload_base_path(), partial, chave, extension, compress=True)
+        if cached is None:
+            # Guarda o payload original: os tipos editados ficam apenas no upload de cada workflow.
+            remember_parse_result(blob, PARSE_BALANCETE, {"payload": payload, "dialeto": dialeto})
+        return _store_balancete_upload(workflow_id, nome_arquivo, blob.caminho, chave, payload, dialeto, periodo)
+
+
+def _cached_analise_parse(chave: str) -> Optional[Dict[str, Any]]:
+    cached = cached_parse_result(chave, PARSE_ANALISE)
+    if cached is None:
+        return None
+    registros_blob = find_blob_by_path(cached.get("registros"))
+    if registros_blob is None or not Path(registros_blob.caminho).exists():
+        return None
+    return cached
+
+
+def _ingest_analise_file(
+    workflow_id: int,
+    categoria: str,
+    nome_arquivo: str,
+    partial: Path,
+    chave: str,
+    on_progress: Optional[Callable[[int], Any]] = None,
+) -> AnaliseUpload:
+    """Cria o upload a partir do arquivo recebido, reaproveitando a leitura de um conteúdo idêntico."""
+    base_path = _upload_base_path()
+    extension = partial.suffix.lower()
+    registros: Optional[List[dict]] = None
+    parsed: Optional[Dict[str, Any]] = None
+
+    # Como no balancete, a limpeza cobre a ingestão inteira, incluindo o Parquet provisório.
+    with ExitStack() as cleanup:
+        cleanup.enter_context(discard_on_error(partial))
+        cached = _cached_analise_parse(chave)
+        if cached is None and columnar_available():
+            # Cada bloco lido vai direto para o Parquet; os registros nunca ficam todos em memória.
+            parsed = parse_upload_to_columnar(
+                partial, extension, staging_path(base_path, ".parquet"), on_progress=on_progress
+            )
+            cleanup.enter_context(discard_on_error(Path(parsed["caminho"])))
+            cached = {key: parsed[key] for key in ("dialeto", "esquema", "total_linhas", "perfil")}
+        elif cached is None:
+            registros, dialeto = parse_records(partial, extension, on_progress=on_progress)
+            cached = {
+                "dialeto": dialeto,
+                "esquema": record_fields(registros),
+                "total_linhas": len(registros),
+                "perfil": build_column_profile(registros, []),
+            }
+        elif on_progress is not None:
+            on_progress(cached["total_linhas"])
+
+        blob = store_blob(base_path, partial, chave, extension, compress=True)
+        if parsed is not None:
+            registros_blob = store_blob(base_path, Path(parsed["caminho"]), records_key(chave), ".parquet")
+            cached["registros"] = registros_blob.caminho
+            # A referência inicial do Parquet pertence ao cache do arquivo original.
+            remember_parse_result(blob, PARSE_ANALISE, cached)
+
+        upload = AnaliseUpload(
+            workflow_id=workflow_id,
+            categoria=categoria,
+            nome_arquivo=nome_arquivo,
+            caminho_arquivo=blob.caminho,
+            hash_conteudo=chave,
+            dialeto_csv=cached["dialeto"],
+            total_linhas=cached["total_linhas"],
+        )
+        store_mask(upload, np.zeros(cached["total_linhas"], dtype=bool))
+        upload.cache_metadata = dict(cached["perfil"], hidden_signature=upload.assinatura_ocultas)
+
+        formato = resolve_storage_format(current_app.config.get("ANALISE_STORAGE_FORMAT"))
+        if formato == STORAGE_PARQUET:
+            registros_blob = find_blob_by_path(cached["registros"])
+            acquire_blob(registros_blob)
+            upload.formato_armazenamento = STORAGE_PARQUET
+            upload.caminho_dados = registros_blob.caminho
+            upload.esquema_dados = cached["esquema"]
+        else:
+            upload.formato_armazenamento = formato
+            upload.dados_extraidos = registros if registros is not None else read_columnar_records(cached["registros"])
+
+        db.session.add(upload)
+        _bump_data_version(workflow_id)
+        db.session.commit()
+        chart_cache.invalidate_workflow(workflow_id)
+        _schedule_snapshot_refresh(workflow_id)
+        return upload
+
+
+def _wants_async_upload() -> bool:
+    requested = request.args.get("async")
+    if requested is not None:
+        return requested.strip().lower() in {"1", "true", "sim"}
+    return bool(current_app.config.get("UPLOAD_ASYNC"))
+
+
+def _spool_to_staging(file, extension: str) -> Tuple[Path, str]:
+    return spool_upload(file, staging_path(_upload_base_path(), extension))
+
+
+def _queue_upload_job(
+    workflow: Workflow,
+    tipo: str,
+    categoria: Optional[str],
+    file,
+    nome_arquivo: str,
+    extension: str,
+    handler,
+    expected_errors: Tuple[type, ...],
+    periodo: Optional[date] = None,
+):
+    # O corpo da requisição vai para o disco agora; a leitura fica com o pool de workers.
+    partial, chave = _spool_to_staging(file, extension)
+    job = UploadJob(
+        workflow_id=workflow.id,
+        tipo=tipo,
+        categoria=categoria,
+        nome_arquivo=nome_arquivo,
+        caminho_arquivo=str(partial),
+        caminho_temporario=str(partial),
+        hash_conteudo=chave,
+        periodo=periodo,
+    )
+    db.session.add(job)
+    db.session.commit()
+    payload = job.to_dict()
+
+    submit_job(current_app._get_current_object(), job, handler, expected_errors)
+    return (
+        jsonify(
+            {
+                "message": "Upload recebido. O processamento continua em segundo plano.",
+                "job": payload,
+                "status_url": url_for("api.get_upload_job", job_id=job.id),
+            }
+        ),
+        202,
+    )
+
+
+def _job_source(job: UploadJob) -> Tuple[Path, str]:
+    partial = Path(job.caminho_temporario)
+    # Jobs enfileirados antes do hash no spool ainda não têm a chave do conteúdo.
+    return partial, job.hash_conteudo or hash_file(partial)
+
+
+def _run_balancete_upload_job(job: UploadJob, report) -> Dict[str, Any]:
+    partial, chave = _job_source(job)
+    upload = _ingest_balancete_file(job.workflow_id, job.nome_arquivo, partial, chave, job.periodo or _current_periodo())
+    total = upload.dados_extraidos["total_indicadores"]
+    report(total)
+
+    job.caminho_arquivo = upload.caminho_arquivo
+    mark_saving(job)
+    return {"upload_id": upload.id, "total_linhas": total}
+
+
+def _run_analise_upload_job(job: UploadJob, report) -> Dict[str, Any]:
+    partial, chave = _job_source(job)
+    upload = _ingest_analise_file(job.workflow_id, job.categoria, job.nome_arquivo, partial, chave, on_progress=report)
+
+    job.caminho_arquivo = upload.caminho_arquivo
+    mark_saving(job)
+    return {"upload_id": upload.id, "total_linhas": upload.total_linhas}
+
+
+@api_bp.get("/jobs/<int:job_id>")
+def get_upload_job(job_id: int):
+    job = UploadJob.query.get_or_404(job_id)
+    if is_stale(current_app, job):
+        expire_job(job)
+    return jsonify({"job": job.to_dict()})
+
+
 # -----------------------------------------------------------------------------
 # Balancete - Uploads e dataset
 # -----------------------------------------------------------------------------
@@ -493,32 +1068,35 @@ def upload_balancete(workflow_id: int):
     if not file or not file.filename:
         return jsonify({"error": "Nenhum arquivo foi enviado."}), 400
 
-    upload_root = Path(current_app.config["UPLOAD_FOLDER"]) / "balancete" / str(workflow.id)
+    try:
+        extension, safe_name = validate_upload(file)
+        periodo = parse_periodo(request.form.get("periodo")) or _current_periodo()
+    except ImportacaoArquivoErro as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    if _wants_async_upload():
+        return _queue_upload_job(
+            workflow, "balancete", None, file, safe_name, extension,
+            _run_balancete_upload_job, (ImportacaoArquivoErro,), periodo=periodo,
+        )
 
     try:
-        result = process_workflow_upload(file, workflow.id, upload_root)
+        partial, chave = _spool_to_staging(file, extension)
+        new_upload = _ingest_balancete_file(workflow.id, safe_name, partial, chave, periodo)
     except ImportacaoArquivoErro as exc:
         return jsonify({"error": str(exc)}), 400
     except Exception:
+        db.session.rollback()
         current_app.logger.exception("Falha ao processar upload de balancete.")
         return jsonify({"error": "Erro interno ao processar o arquivo."}), 500
 
-    existing_uploads = ArquivoImportado.query.filter_by(workflow_id=workflow.id).all()
-    for existing in existing_uploads:
-        _delete_file_if_exists(existing.caminho_arquivo)
-        db.session.delete(existing)
-
-    new_upload = ArquivoImportado(
-        workflow_id=workflow.id,
-        nome_arquivo=result["nome_arquivo"],
-        caminho_arquivo=str(result["arquivo_salvo"]),
-        dados_extraidos=result["payload"],
-    )
-    db.session.add(new_upload)
-    db.session.commit()
+    versao = _data_version(workflow.id)
+    if _wants_delta_response():
+        # Modo compacto: só o resumo do novo upload; os registros são buscados sob demanda.
+        return jsonify({"message": "Upload processado com sucesso.", "versao": versao, "upload": _balancete_summary(new_upload)}), 201
 
     dataset = _balancete_dataset_from_upload(new_upload)
-    return jsonify({"message": "Upload processado com sucesso.", "dataset": dataset}), 201
+    return jsonify({"message": "Upload processado com sucesso.", "versao": versao, "dataset": dataset}), 201
 
 
 @api_bp.get("/workflows/<int:workflow_id>/balancete/dataset")
@@ -528,11 +1106,86 @@ def get_balancete_dataset(workflow_id: int):
     if error:
         return error
 
-    upload = _latest_balancete_upload(workflow.id)
+    upload = _latest_balancete_upload(workflow.id, with_records=False)
     if not upload:
         return jsonify({"error": "Nenhum upload disponível para este workflow."}), 404
 
-    return jsonify(_balancete_dataset_from_upload(upload))
+    etag = _resource_etag("balancete", upload.id, upload.data_upload, upload.updated_at)
+    last_modified = _data_last_modified(workflow)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    return _with_validators(jsonify(_cached_balancete_dataset(upload)), etag, last_modified)
+
+
+@api_bp.get("/workflows/<int:workflow_id>/balancete/historico")
+def get_balancete_history(workflow_id: int):
+    """Série histórica de indicadores ao longo dos períodos importados do workflow."""
+    workflow = _workflow_or_404(workflow_id)
+    error = _ensure_workflow_type(workflow, "balancete")
+    if error:
+        return error
+
+    nomes = list(dict.fromkeys(nome.strip() for nome in request.args.getlist("indicador") if nome.strip()))
+    if not nomes:
+        return jsonify({"error": "Informe ao menos um indicador."}), 400
+
+    metrica = request.args.get("metrica") or "valor_periodo_2"
+    if metrica not in BALANCETE_METRICS:
+        return jsonify({"error": "Métrica desconhecida."}), 400
+
+    agregacao = (request.args.get("agregacao") or "").strip().lower() or None
+    if agregacao is not None and agregacao not in HISTORY_AGGREGATIONS:
+        return jsonify({"error": "Agregação inválida. Use 'soma' ou 'media'."}), 400
+
+    limite = request.args.get("limite", DEFAULT_HISTORY_PERIODS, type=int)
+    if limite is None or not 1 <= limite <= MAX_HISTORY_PERIODS:
+        return jsonify({"error": f"O limite deve estar entre 1 e {MAX_HISTORY_PERIODS} períodos."}), 400
+
+    try:
+        inicio = parse_periodo(request.args.get("inicio"))
+        fim = parse_periodo(request.args.get("fim"))
+    except ImportacaoArquivoErro as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    etag = _resource_etag("balancete-historico", workflow.versao_dados, request.query_string.decode())
+    not_modified = _not_modified(etag, None)
+    if not_modified is not None:
+        return not_modified
+
+    history = indicator_history(workflow.id, nomes, metrica, inicio, fim, limite)
+    valores = history["valores"]
+    absoluta, percentual = period_variation(valores)
+
+    series = [
+        {
+            "indicador": nome,
+            "tipo_valor": history["tipos"].get(nome, "currency"),
+            "values": optional_floats(valores[position]),
+            "variacao_absoluta": optional_floats(absoluta[position]),
+            "variacao_percentual": optional_floats(percentual[position]),
+        }
+        for position, nome in enumerate(nomes)
+    ]
+    body: Dict[str, Any] = {
+        "metrica": {
+            "key": metrica,
+            "label": BALANCETE_METRICS[metrica]["fallback_label"],
+            "value_kind": BALANCETE_METRICS[metrica]["value_kind"],
+        },
+        "periodos": [format_periodo(periodo) for periodo in history["periodos"]],
+        "upload_ids": history["upload_ids"],
+        "series": series,
+        "versao": workflow.versao_dados or 0,
+    }
+    if agregacao:
+        body["agregado"] = {
+            "agregacao": agregacao,
+            "values": optional_floats(aggregate_history(valores, agregacao)),
+        }
+
+    return _with_validators(jsonify(body), etag, None)
 
 
 @api_bp.delete("/workflows/<int:workflow_id>/balancete/upload/<int:upload_id>")
@@ -549,11 +1202,13 @@ def delete_balancete_upload(workflow_id: int, upload_id: int):
     if not upload:
         return jsonify({"error": "Upload não encontrado."}), 404
 
-    _delete_file_if_exists(upload.caminho_arquivo)
-    db.session.delete(upload)
+    _delete_balancete_upload(upload)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
 
-    return jsonify({"message": "Upload removido com sucesso."})
+    return jsonify({"message": "Upload removido com sucesso.", "versao": _data_version(workflow.id)})
 
 
 @api_bp.patch("/workflows/<int:workflow_id>/balancete/indicador/<string:indicador_nome>/tipo")
@@ -569,28 +1224,29 @@ def update_indicador_tipo(workflow_id: int, indicador_nome: str):
     if tipo_valor not in {"currency", "percentage", "multiplier"}:
         return jsonify({"error": "Tipo inválido. Use 'currency', 'percentage' ou 'multiplier'."}), 400
 
-    upload = _latest_balancete_upload(workflow.id)
+    upload = _latest_balancete_upload(workflow.id, with_records=False)
     if not upload:
         return jsonify({"error": "Nenhum upload disponível."}), 404
 
-    dados = upload.dados_extraidos or {}
-    indicadores = dados.get("indicadores") or []
-    
-    updated = False
-    for item in indicadores:
-        if item.get("indicador") == indicador_nome:
-            item["tipo_valor"] = tipo_valor
-            updated = True
-            break
-    
-    if not updated:
+    updated = update_indicator_type(upload.id, indicador_nome, tipo_valor)
+    if updated is None:
         return jsonify({"error": "Indicador não encontrado."}), 404
 
-    upload.dados_extraidos = dados
-    flag_modified(upload, "dados_extraidos")
+    # Só a linha do indicador é reescrita; updated_at do upload renova o ETag do dataset.
+    upload.updated_at = datetime.utcnow()
+    _bump_data_version(workflow.id)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
 
-    return jsonify({"message": "Tipo do indicador atualizado com sucesso.", "tipo_valor": tipo_valor})
+    return jsonify(
+        {
+            "message": "Tipo do indicador atualizado com sucesso.",
+            "tipo_valor": tipo_valor,
+            "indicador": updated,
+            "versao": _data_version(workflow.id),
+        }
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -654,6 +1310,38 @@ def _hydrate_balancete_chart_from_payload(chart: Dashboard, payload: Dict[str, A
         chart.options["indicator_colors"] = indicador_cores
 
 
+def _balancete_chart_payloads(
+    chart_rows: List[Dashboard],
+    upload: Optional[ArquivoImportado],
+    dataset: Optional[Dict[str, Any]],
+    tolerant: bool = False,
+) -> List[Dict[str, Any]]:
+    # Um único índice do upload atende todos os gráficos da requisição. Ele só é montado no
+    # primeiro gráfico fora do cache: com todos em cache, a requisição não paga o índice.
+    index: Optional[IndicatorIndex] = None
+
+    def build_payload(chart: Dashboard) -> Dict[str, Any]:
+        nonlocal index
+        if index is None:
+            index = IndicatorIndex.from_dataset(dataset)
+        return _balancete_chart_payload(chart, index)
+
+    charts = []
+    for chart in chart_rows:
+        chart_payload = chart.to_dict()
+        if dataset:
+            chart_payload = _cached_chart_payload(
+                chart,
+                "balancete",
+                upload.id,
+                _balancete_upload_version(upload),
+                lambda: build_payload(chart),
+                tolerant=tolerant,
+            )
+        charts.append(chart_payload)
+    return charts
+
+
 @api_bp.get("/workflows/<int:workflow_id>/balancete/charts")
 def list_balancete_charts(workflow_id: int):
     workflow = _workflow_or_404(workflow_id)
@@ -661,21 +1349,34 @@ def list_balancete_charts(workflow_id: int):
     if error:
         return error
 
-    upload = _latest_balancete_upload(workflow.id)
-    dataset = _balancete_dataset_from_upload(upload) if upload else None
+    upload = _latest_balancete_upload(workflow.id, with_records=False)
+    chart_rows = workflow.dashboards.order_by(Dashboard.created_at.asc()).all()
 
-    charts = []
-    for chart in workflow.dashboards.order_by(Dashboard.created_at.asc()).all():
-        chart_payload = chart.to_dict()
-        if dataset:
-            chart_payload = _balancete_chart_payload(chart, dataset)
-        charts.append(chart_payload)
+    etag = _resource_etag(
+        "balancete-charts",
+        workflow.versao_dados,
+        upload.id if upload else "-",
+        upload.updated_at if upload else "-",
+        *((chart.id, chart.updated_at) for chart in chart_rows),
+    )
+    last_modified = _data_last_modified(workflow)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified is not None:
+        return not_modified
 
-    return jsonify(
-        {
-            "charts": charts,
-            "dataset": dataset,
-        }
+    dataset = _cached_balancete_dataset(upload) if upload else None
+    charts = _balancete_chart_payloads(chart_rows, upload, dataset)
+
+    return _with_validators(
+        jsonify(
+            {
+                "charts": charts,
+                "dataset": dataset,
+                "versao": workflow.versao_dados or 0,
+            }
+        ),
+        etag,
+        last_modified,
     )
 
 
@@ -695,16 +1396,17 @@ def create_balancete_chart(workflow_id: int):
     _hydrate_balancete_chart_from_payload(chart, payload)
 
     db.session.add(chart)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    _schedule_snapshot_refresh(workflow.id)
 
-    upload = _latest_balancete_upload(workflow.id)
-    dataset = _balancete_dataset_from_upload(upload) if upload else None
+    upload = _latest_balancete_upload(workflow.id, with_records=False)
 
     response_payload = chart.to_dict()
-    if dataset:
-        response_payload = _balancete_chart_payload(chart, dataset)
+    if upload:
+        response_payload = _balancete_chart_payload(chart, _balancete_chart_index(upload, chart))
 
-    return jsonify({"message": "Gráfico criado com sucesso.", "chart": response_payload}), 201
+    return jsonify({"message": "Gráfico criado com sucesso.", "chart": response_payload, "versao": _data_version(workflow.id)}), 201
 
 
 @api_bp.put("/workflows/<int:workflow_id>/balancete/charts/<int:chart_id>")
@@ -725,16 +1427,18 @@ def update_balancete_chart(workflow_id: int, chart_id: int):
         return jsonify({"error": validation_error}), 400
 
     _hydrate_balancete_chart_from_payload(chart, payload)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
 
-    upload = _latest_balancete_upload(workflow.id)
-    dataset = _balancete_dataset_from_upload(upload) if upload else None
+    upload = _latest_balancete_upload(workflow.id, with_records=False)
 
     response_payload = chart.to_dict()
-    if dataset:
-        response_payload = _balancete_chart_payload(chart, dataset)
+    if upload:
+        response_payload = _balancete_chart_payload(chart, _balancete_chart_index(upload, chart))
 
-    return jsonify({"message": "Gráfico atualizado com sucesso.", "chart": response_payload})
+    return jsonify({"message": "Gráfico atualizado com sucesso.", "chart": response_payload, "versao": _data_version(workflow.id)})
 
 
 @api_bp.delete("/workflows/<int:workflow_id>/balancete/charts/<int:chart_id>")
@@ -752,9 +1456,12 @@ def delete_balancete_chart(workflow_id: int, chart_id: int):
         return jsonify({"error": "Gráfico não encontrado."}), 404
 
     db.session.delete(chart)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
 
-    return jsonify({"message": "Gráfico removido com sucesso."})
+    return jsonify({"message": "Gráfico removido com sucesso.", "versao": _data_version(workflow.id)})
 
 
 # -----------------------------------------------------------------------------
@@ -770,12 +1477,9 @@ def list_analise_categories(workflow_id: int):
         return error
 
     categories_meta: List[Dict[str, Any]] = []
+    latest_uploads = _latest_analise_uploads(workflow.id, with_records=True)
     for categoria in ANALISE_JP_CATEGORIES:
-        latest = (
-            AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=categoria)
-            .order_by(AnaliseUpload.created_at.desc())
-            .first()
-        )
+        latest = latest_uploads.get(categoria)
         categories_meta.append(
             {
                 "slug": categoria,
@@ -800,18 +1504,66 @@ def get_analise_dataset(workflow_id: int, categoria: str):
     except AnaliseJPProcessingError as exc:
         return jsonify({"error": str(exc)}), 400
 
-    upload = (
-        AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=categoria)
-        .order_by(AnaliseUpload.created_at.desc())
-        .first()
-    )
+    upload = _latest_analise_upload(workflow.id, categoria, with_records=False)
     if not upload:
         return jsonify({"error": "Nenhum upload encontrado para a categoria informada."}), 404
 
-    dataset = _analise_dataset(upload)
+    etag = _analise_upload_etag(upload, "dataset", request.query_string.decode("utf-8", "replace"))
+    last_modified = _data_last_modified(workflow)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    paged = any(name in request.args for name in ("limit", "offset", "fields", "sort"))
+    if paged:
+        profile = _analise_profile(upload)
+        params, validation_error = _analise_page_params(profile, default_limit=None)
+        if validation_error:
+            return jsonify({"error": validation_error}), 400
+        page = _analise_page(upload, profile, params)
+
+        dataset = _analise_summary(upload)
+        dataset["records"] = page.pop("records")
+        dataset["fields"] = page.pop("fields")
+        dataset["page"] = page
+    else:
+        dataset = _analise_dataset(upload)
+
     dataset["categoria"] = categoria
     dataset["categoria_label"] = slug_to_label(categoria)
-    return jsonify(dataset)
+    return _with_validators(jsonify(dataset), etag, last_modified)
+
+
+@api_bp.get("/workflows/<int:workflow_id>/analise-jp/dataset/<string:categoria>/records")
+def get_analise_records(workflow_id: int, categoria: str):
+    workflow = _workflow_or_404(workflow_id)
+    error = _ensure_workflow_type(workflow, "analise_jp")
+    if error:
+        return error
+
+    try:
+        validate_category(categoria)
+    except AnaliseJPProcessingError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    upload = _latest_analise_upload(workflow.id, categoria, with_records=False)
+    if not upload:
+        return jsonify({"error": "Nenhum upload encontrado para a categoria informada."}), 404
+
+    etag = _analise_upload_etag(upload, "records", request.query_string.decode("utf-8", "replace"))
+    last_modified = _data_last_modified(workflow)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    profile = _analise_profile(upload)
+    params, validation_error = _analise_page_params(profile, default_limit=ANALISE_PAGE_SIZE)
+    if validation_error:
+        return jsonify({"error": validation_error}), 400
+
+    page = _analise_page(upload, profile, params)
+    page["upload"] = _analise_upload_meta(upload)
+    return _with_validators(jsonify(page), etag, last_modified)
 
 
 @api_bp.post("/workflows/<int:workflow_id>/analise-jp/upload/<string:categoria>")
@@ -830,39 +1582,40 @@ def upload_analise_categoria(workflow_id: int, categoria: str):
     if not file or not file.filename:
         return jsonify({"error": "Nenhum arquivo foi enviado."}), 400
 
+    safe_name = file.filename
+    try:
+        extension = validate_extension(safe_name)
+    except AnaliseJPProcessingError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    if _wants_async_upload():
+        return _queue_upload_job(
+            workflow, "analise_jp", categoria, file, safe_name, extension,
+            _run_analise_upload_job, (AnaliseJPProcessingError,),
+        )
+
     try:
-        registros, file_bytes = extract_payload(file)
+        partial, chave = _spool_to_staging(file, extension)
+        upload = _ingest_analise_file(workflow.id, categoria, safe_name, partial, chave)
     except AnaliseJPProcessingError as exc:
         return jsonify({"error": str(exc)}), 400
     except Exception:
+        db.session.rollback()
         current_app.logger.exception("Falha ao processar upload da análise JP.")
         return jsonify({"error": "Erro interno ao processar o arquivo."}), 500
 
-    safe_name = file.filename
-    timestamped_name = f"{workflow.id}_{categoria}_{safe_name}"
-
-    upload_root = Path(current_app.config["UPLOAD_FOLDER"]) / "analise_jp" / str(workflow.id)
-    destination = upload_root / categoria / timestamped_name
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    destination.write_bytes(file_bytes)
-
-    upload = AnaliseUpload(
-        workflow_id=workflow.id,
-        categoria=categoria,
-        nome_arquivo=safe_name,
-        caminho_arquivo=str(destination),
-        dados_extraidos=registros,
-        linhas_ocultas=[],
-    )
-
-    db.session.add(upload)
-    db.session.commit()
+    versao = _data_version(workflow.id)
+    if _wants_delta_response():
+        summary = _analise_summary(upload)
+        summary["categoria"] = categoria
+        summary["total_linhas"] = upload.total_linhas
+        return jsonify({"message": "Upload registrado com sucesso.", "versao": versao, "upload": summary}), 201
 
     dataset = _analise_dataset(upload)
     dataset["categoria"] = categoria
     dataset["categoria_label"] = slug_to_label(categoria)
 
-    return jsonify({"message": "Upload registrado com sucesso.", "dataset": dataset}), 201
+    return jsonify({"message": "Upload registrado com sucesso.", "versao": versao, "dataset": dataset}), 201
 
 
 @api_bp.delete("/workflows/<int:workflow_id>/analise-jp/upload/<string:categoria>/<int:upload_id>")
@@ -885,10 +1638,80 @@ def delete_analise_upload(workflow_id: int, categoria: str, upload_id: int):
         return jsonify({"error": "Upload não encontrado."}), 404
 
     _delete_file_if_exists(upload.caminho_arquivo)
+    _delete_file_if_exists(upload.caminho_dados)
     db.session.delete(upload)
+    _bump_data_version(workflow.id)
+    db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
+
+    return jsonify({"message": "Upload removido com sucesso.", "versao": _data_version(workflow.id)})
+
+
+@api_bp.patch("/workflows/<int:workflow_id>/analise-jp/upload/<string:categoria>/<int:upload_id>/linhas-ocultas")
+def update_analise_hidden_rows(workflow_id: int, categoria: str, upload_id: int):
+    """Oculta ou reexibe linhas em lote por índices, intervalos e filtros de coluna."""
+    workflow = _workflow_or_404(workflow_id)
+    error = _ensure_workflow_type(workflow, "analise_jp")
+    if error:
+        return error
+
+    try:
+        validate_category(categoria)
+    except AnaliseJPProcessingError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "O corpo da requisição deve ser um objeto JSON."}), 400
+    acao = str(payload.get("acao") or "ocultar").strip().lower()
+    if acao not in HIDDEN_ROW_ACTIONS:
+        return jsonify({"error": "Ação inválida. Use 'ocultar' ou 'exibir'."}), 400
+
+    # O bloqueio da linha evita que dois PATCH simultâneos sobrescrevam a máscara um do outro.
+    upload = (
+        AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=categoria, id=upload_id)
+        .options(defer(AnaliseUpload.dados_extraidos))
+        .with_for_update()
+        .first()
+    )
+    if not upload:
+        return jsonify({"error": "Upload não encontrado."}), 404
+
+    try:
+        total = upload_row_count(upload)
+        selection = select_rows(
+            upload,
+            total,
+            indices=payload.get("indices"),
+            ranges=payload.get("intervalos"),
+            filters=payload.get("filtros"),
+        )
+    except AnaliseJPProcessingError as exc:
+        db.session.rollback()
+        return jsonify({"error": str(exc)}), 400
+
+    alteradas, total_ocultas = set_rows_hidden(upload, selection, acao == "ocultar", total)
+    if alteradas:
+        # O perfil das colunas acompanha as linhas visíveis; é refeito aqui, uma vez por alteração.
+        upload.cache_metadata = _build_analise_profile(upload)
+        _bump_data_version(workflow.id)
     db.session.commit()
+    if alteradas:
+        chart_cache.invalidate_workflow(workflow.id)
+        _schedule_snapshot_refresh(workflow.id)
 
-    return jsonify({"message": "Upload removido com sucesso."})
+    return jsonify(
+        {
+            "message": "Linhas atualizadas com sucesso.",
+            "acao": acao,
+            "selecionadas": int(np.count_nonzero(selection)),
+            "alteradas": alteradas,
+            "total_ocultas": total_ocultas,
+            "total_linhas": total,
+            "versao": _data_version(workflow.id),
+        }
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -914,6 +1737,12 @@ def _validate_analise_chart_payload(payload: Dict[str, Any]) -> Optional[str]:
     if not isinstance(metricas, list) or not metricas:
         return "Defina ao menos uma coluna de valores."
 
+    options = payload.get("options")
+    if isinstance(options, dict):
+        aggregation_error = validate_aggregation(options.get("aggregation"))
+        if aggregation_error:
+            return aggregation_error
+
     return None
 
 
@@ -948,22 +1777,65 @@ def list_analise_charts(workflow_id: int):
     if error:
         return error
 
+    charts = workflow.analise_jp_charts.order_by(AnaliseJPChart.created_at.asc()).all()
+    latest_uploads = _latest_analise_uploads(
+        workflow.id,
+        categorias={chart.categoria for chart in charts},
+    )
+
+    etag = _resource_etag(
+        "analise-charts",
+        workflow.versao_dados,
+        *((chart.id, chart.updated_at) for chart in charts),
+        *(_analise_upload_etag(latest_uploads[categoria]) for categoria in sorted(latest_uploads)),
+    )
+    last_modified = _data_last_modified(workflow)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    return _with_validators(
+        jsonify({"charts": _analise_chart_payloads(charts, latest_uploads), "versao": workflow.versao_dados or 0}),
+        etag,
+        last_modified,
+    )
+
+
+def _analise_chart_payloads(
+    charts: List[AnaliseJPChart],
+    latest_uploads: Dict[str, AnaliseUpload],
+    tolerant: bool = False,
+) -> List[Dict[str, Any]]:
+    # Cada categoria vira um único DataFrame com a união das colunas usadas pelos gráficos.
+    category_columns: Dict[str, List[str]] = {}
+    for chart in charts:
+        columns = category_columns.setdefault(chart.categoria, [])
+        columns.extend(column for column in _analise_chart_columns(chart) if column not in columns)
+    frames: Dict[str, pd.DataFrame] = {}
+
+    def chart_frame(chart: AnaliseJPChart, upload: AnaliseUpload) -> pd.DataFrame:
+        # O DataFrame só é montado se algum gráfico da categoria não estiver em cache.
+        if chart.categoria not in frames:
+            frames[chart.categoria] = _analise_visible_frame(upload, category_columns[chart.categoria])
+        return frames[chart.categoria]
+
     charts_payload: List[Dict[str, Any]] = []
-    for chart in workflow.analise_jp_charts.order_by(AnaliseJPChart.created_at.asc()).all():
-        dataset = None
-        upload = (
-            AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=chart.categoria)
-            .order_by(AnaliseUpload.created_at.desc())
-            .first()
-        )
+    for chart in charts:
+        upload = latest_uploads.get(chart.categoria)
         if upload:
-            dataset = _analise_dataset(upload)
-        if dataset:
-            charts_payload.append(_analise_chart_payload(chart, dataset))
+            charts_payload.append(
+                _cached_chart_payload(
+                    chart,
+                    "analise",
+                    upload.id,
+                    visibility_signature(upload),
+                    lambda: _analise_chart_payload(chart, chart_frame(chart, upload)),
+                    tolerant=tolerant,
+                )
+            )
         else:
             charts_payload.append({"chart": chart.to_dict(), "data": None})
-
-    return jsonify({"charts": charts_payload})
+    return charts_payload
 
 
 @api_bp.post("/workflows/<int:workflow_id>/analise-jp/charts")
@@ -982,20 +1854,19 @@ def create_analise_chart(workflow_id: int):
     _hydrate_analise_chart_from_payload(chart, payload)
 
     db.session.add(chart)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    _schedule_snapshot_refresh(workflow.id)
 
-    upload = (
-        AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=chart.categoria)
-        .order_by(AnaliseUpload.created_at.desc())
-        .first()
-    )
-    dataset = _analise_dataset(upload) if upload else None
+    upload = _latest_analise_upload(workflow.id, chart.categoria)
 
     response_payload = chart.to_dict()
-    if dataset:
-        response_payload = _analise_chart_payload(chart, dataset)
+    if upload:
+        response_payload = _analise_chart_payload(
+            chart, _analise_visible_frame(upload, _analise_chart_columns(chart))
+        )
 
-    return jsonify({"message": "Gráfico criado com sucesso.", "chart": response_payload}), 201
+    return jsonify({"message": "Gráfico criado com sucesso.", "chart": response_payload, "versao": _data_version(workflow.id)}), 201
 
 
 @api_bp.put("/workflows/<int:workflow_id>/analise-jp/charts/<int:chart_id>")
@@ -1016,20 +1887,20 @@ def update_analise_chart(workflow_id: int, chart_id: int):
         return jsonify({"error": validation_error}), 400
 
     _hydrate_analise_chart_from_payload(chart, payload)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
 
-    upload = (
-        AnaliseUpload.query.filter_by(workflow_id=workflow.id, categoria=chart.categoria)
-        .order_by(AnaliseUpload.created_at.desc())
-        .first()
-    )
-    dataset = _analise_dataset(upload) if upload else None
+    upload = _latest_analise_upload(workflow.id, chart.categoria)
 
     response_payload = chart.to_dict()
-    if dataset:
-        response_payload = _analise_chart_payload(chart, dataset)
+    if upload:
+        response_payload = _analise_chart_payload(
+            chart, _analise_visible_frame(upload, _analise_chart_columns(chart))
+        )
 
-    return jsonify({"message": "Gráfico atualizado com sucesso.", "chart": response_payload})
+    return jsonify({"message": "Gráfico atualizado com sucesso.", "chart": response_payload, "versao": _data_version(workflow.id)})
 
 
 @api_bp.delete("/workflows/<int:workflow_id>/analise-jp/charts/<int:chart_id>")
@@ -1047,9 +1918,115 @@ def delete_analise_chart(workflow_id: int, chart_id: int):
         return jsonify({"error": "Gráfico não encontrado."}), 404
 
     db.session.delete(chart)
+    _bump_data_version(workflow.id)
     db.session.commit()
+    chart_cache.invalidate_workflow(workflow.id)
+    _schedule_snapshot_refresh(workflow.id)
+
+    return jsonify({"message": "Gráfico removido com sucesso.", "versao": _data_version(workflow.id)})
+
+
+# -----------------------------------------------------------------------------
+# Publicação de dashboards (snapshots para a visualização somente leitura)
+# -----------------------------------------------------------------------------
+
+
+def _dashboard_snapshot_content(workflow: Workflow) -> Dict[str, Any]:
+    """Tudo o que a visualização somente leitura usa, montado uma vez por versão dos dados."""
+    if workflow.tipo == "balancete":
+        upload = _latest_balancete_upload(workflow.id, with_records=False)
+        chart_rows = workflow.dashboards.order_by(Dashboard.created_at.asc()).all()
+        dataset = _cached_balancete_dataset(upload) if upload else None
+        charts = _balancete_chart_payloads(chart_rows, upload, dataset, tolerant=True)
+    else:
+        chart_rows = workflow.analise_jp_charts.order_by(AnaliseJPChart.created_at.asc()).all()
+        latest_uploads = _latest_analise_uploads(
+            workflow.id,
+            categorias={chart.categoria for chart in chart_rows},
+        )
+        charts = _analise_chart_payloads(chart_rows, latest_uploads, tolerant=True)
+
+    return {
+        "workflow": serialize_workflow(workflow, summary=True),
+        "charts": charts,
+        "gerado_em": datetime.utcnow().isoformat(),
+    }
 
-    return jsonify({"message": "Gráfico removido com sucesso."})
+
+def _rebuild_dashboard_snapshot(workflow_id: int) -> Optional[DashboardSnapshot]:
+    workflow = db.session.get(Workflow, workflow_id)
+    snapshot = find_snapshot(workflow_id, with_content=False)
+    if workflow is None or snapshot is None:
+        return None
+
+    # A versão é lida antes de montar: uma alteração concorrente deixa o snapshot desatualizado
+    # e agenda outra reconstrução, em vez de ser marcada como incluída.
+    versao = workflow.versao_dados or 0
+    if is_current(snapshot, versao):
+        return snapshot
+    store_snapshot(snapshot, versao, _dashboard_snapshot_content(workflow))
+    db.session.commit()
+    return snapshot
+
+
+def published_dashboard(workflow: Workflow) -> Optional[Dict[str, Any]]:
+    """Conteúdo publicado do workflow, ou None quando o dashboard não foi publicado.
+
+    Um snapshot desatualizado (reconstrução ainda pendente) é refeito aqui mesmo.
+    """
+    snapshot = find_snapshot(workflow.id, with_content=False)
+    if snapshot is None:
+        return None
+    if not is_current(snapshot, workflow.versao_dados):
+        snapshot = _rebuild_dashboard_snapshot(workflow.id)
+    content = dict(snapshot.conteudo or {})
+    # Nome e descrição não mudam a versão dos dados; vêm sempre do registro atual.
+    content["workflow"] = {**(content.get("workflow") or {}), **workflow.to_dict()}
+    return content
+
+
+def _publication_status(workflow: Workflow, snapshot: Optional[DashboardSnapshot]) -> Dict[str, Any]:
+    return {
+        "publicado": snapshot is not None,
+        "atualizado": snapshot is not None and is_current(snapshot, workflow.versao_dados),
+        "snapshot": snapshot.to_dict() if snapshot else None,
+    }
+
+
+@api_bp.get("/workflows/<int:workflow_id>/dashboards/publicacao")
+def get_dashboard_publication(workflow_id: int):
+    workflow = _workflow_or_404(workflow_id)
+    return jsonify(_publication_status(workflow, find_snapshot(workflow.id, with_content=False)))
+
+
+@api_bp.post("/workflows/<int:workflow_id>/dashboards/publicacao")
+def publish_dashboard(workflow_id: int):
+    workflow = _workflow_or_404(workflow_id)
+    snapshot = find_snapshot(workflow.id, with_content=False)
+    created = snapshot is None
+    if created:
+        db.session.add(DashboardSnapshot(workflow_id=workflow.id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Outra requisição publicou ao mesmo tempo; segue com o registro dela.
+            db.session.rollback()
+
+    snapshot = _rebuild_dashboard_snapshot(workflow.id)
+    body = {"message": "Dashboard publicado com sucesso.", **_publication_status(workflow, snapshot)}
+    return jsonify(body), 201 if created else 200
+
+
+@api_bp.delete("/workflows/<int:workflow_id>/dashboards/publicacao")
+def unpublish_dashboard(workflow_id: int):
+    workflow = _workflow_or_404(workflow_id)
+    snapshot = find_snapshot(workflow.id, with_content=False)
+    if snapshot is None:
+        return jsonify({"error": "O dashboard não está publicado."}), 404
+
+    db.session.delete(snapshot)
+    db.session.commit()
+    return jsonify({"message": "Publicação removida com sucesso.", "publicado": False})
 
 
 # -----------------------------------------------------------------------------
@@ -4,7 +4,7 @@ from flask import Blueprint, redirect, render_template, url_for, request
 
 from app.models.workflow import Workflow
 from app.models.empresa import Empresa
-from app.routes.api import serialize_workflow
+from app.routes.api import published_dashboard, serialize_workflow
 from app.services.theme_service import get_theme_context
 from app.themes.theme_config import THEMES
 
@@ -41,7 +41,7 @@ def list_workflows_view():
 def workflow_detail_view(workflow_id: int):
     theme = get_theme_context()
     workflow = Workflow.query.get_or_404(workflow_id)
-    workflow_payload = serialize_workflow(workflow)
+    workflow_payload = serialize_workflow(workflow, summary=True)
     empresa_payload = workflow.empresa.to_dict() if workflow.empresa else None
     return render_template(
         "workflow_detail.html",
@@ -56,7 +56,7 @@ def workflow_detail_view(workflow_id: int):
 def workflow_charts_view(workflow_id: int):
     theme = get_theme_context()
     workflow = Workflow.query.get_or_404(workflow_id)
-    workflow_payload = serialize_workflow(workflow)
+    workflow_payload = serialize_workflow(workflow, summary=True)
     empresa_payload = workflow.empresa.to_dict() if workflow.empresa else None
     return render_template(
         "workflow_charts.html",
@@ -71,13 +71,16 @@ def workflow_charts_view(workflow_id: int):
 def workflow_charts_view_readonly(workflow_id: int):
     theme = get_theme_context()
     workflow = Workflow.query.get_or_404(workflow_id)
-    workflow_payload = serialize_workflow(workflow)
+    # Dashboard publicado: gráficos já calculados vão na página, sem consultar os datasets.
+    snapshot = published_dashboard(workflow)
+    workflow_payload = snapshot["workflow"] if snapshot else serialize_workflow(workflow, summary=True)
     empresa_payload = workflow.empresa.to_dict() if workflow.empresa else None
     return render_template(
         "workflow_charts_view.html",
         theme=theme,
         workflow=workflow_payload,
         empresa=empresa_payload,
+        snapshot_charts=snapshot["charts"] if snapshot else None,
         theme_options=_theme_options(),
     )
 
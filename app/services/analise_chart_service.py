@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.analise_jp_service import normalise_indices
+
+LABEL_SEPARATOR = " • "
+AGGREGATION_FUNCTIONS = {"sum", "mean", "count", "min", "max"}
+DEFAULT_OTHERS_LABEL = "Outros"
+EMPTY_GROUP_LABEL = "(vazio)"
+# Mesma ordem de substituições usada por coerce_float.
+NUMERIC_NOISE = ("R$", "r$", "%", "\u00a0", " ")
+# Decimal ASCII simples: float() sempre aceita. Só dígitos ASCII, para valer igual no re do
+# Python e no RE2 das strings do pyarrow.
+PLAIN_DECIMAL = r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+# Fora do padrão acima, float() só aceita textos com algum dígito ou com nan/inf; textos não
+# ASCII vão sempre para float(), que reconhece dígitos Unicode.
+FLOAT_HINT = r"[0-9]|nan|inf|[^\x00-\x7f]"
+
+
+def coerce_numeric(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Versão vetorizada de coerce_float: devolve (valores float64, máscara de válidos)."""
+    size = len(values)
+    parsed = np.full(size, np.nan, dtype=np.float64)
+    valid = np.zeros(size, dtype=bool)
+
+    present = values.notna().to_numpy()
+    if not present.any():
+        return parsed, valid
+
+    text = values[present].astype(str).str.strip()
+    for needle in NUMERIC_NOISE:
+        text = text.str.replace(needle, "", regex=False)
+
+    both = text.str.contains(",", regex=False) & text.str.contains(".", regex=False)
+    text = text.where(~both, text.str.replace(".", "", regex=False))
+    text = text.str.replace(",", ".", regex=False)
+
+    raw = text.to_numpy(dtype=object)
+    present_positions = np.flatnonzero(present)
+
+    # Os candidatos saem de uma regex em lote; a conversão final usa float() (via NumPy)
+    # para reproduzir exatamente o arredondamento de coerce_float.
+    candidates = text.str.fullmatch(PLAIN_DECIMAL).to_numpy(dtype=bool)
+    leftovers = (~candidates) & text.str.contains(FLOAT_HINT, case=False, regex=True).to_numpy(dtype=bool)
+    try:
+        parsed[present_positions[candidates]] = raw[candidates].astype(np.float64)
+        valid[present_positions[candidates]] = True
+    except ValueError:
+        leftovers |= candidates
+
+    # Formatos aceitos por float() fora do padrão simples ("nan", "1_000", "infinity", dígitos Unicode...).
+    for offset in np.flatnonzero(leftovers):
+        try:
+            parsed[present_positions[offset]] = float(raw[offset])
+        except ValueError:
+            continue
+        valid[present_positions[offset]] = True
+
+    return parsed, valid
+
+
+def numeric_list(values: pd.Series) -> List[Optional[float]]:
+    parsed, valid = coerce_numeric(values)
+    return np.where(valid, parsed, None).tolist()
+
+
+def _text_column(frame: pd.DataFrame, column: str) -> pd.Series:
+    if column not in frame.columns:
+        return pd.Series("", index=frame.index, dtype=object)
+    series = frame[column]
+    return series.astype(object).where(series.notna(), "").astype(str)
+
+
+def _select_rows(frame: pd.DataFrame, row_indices: Optional[Iterable]) -> Tuple[pd.DataFrame, np.ndarray]:
+    positions = np.arange(len(frame))
+    indices = normalise_indices(row_indices) if row_indices else []
+    if indices:
+        positions = np.asarray(indices, dtype=np.int64)
+        positions = positions[positions < len(frame)]
+        frame = frame.iloc[positions]
+    return frame, positions
+
+
+def _join_dimensions(frame: pd.DataFrame, dimensoes: Sequence[Any]) -> pd.Series:
+    labels = pd.Series("", index=frame.index, dtype=object)
+    for dimension in dimensoes or []:
+        # object explícito: no pandas 3 a coluna vira dtype str, que não soma com object.
+        part = _text_column(frame, str(dimension)).str.strip().astype(object)
+        filled = part != ""
+        separator = np.where((labels != "").to_numpy() & filled.to_numpy(), LABEL_SEPARATOR, "")
+        labels = labels + separator + part.where(filled, "")
+    return labels
+
+
+def build_labels(frame: pd.DataFrame, dimensoes: Sequence[Any], positions: np.ndarray) -> List[str]:
+    if frame.empty:
+        return []
+    labels = _join_dimensions(frame, dimensoes)
+    result = labels.tolist()
+    for offset in np.flatnonzero((labels == "").to_numpy()):
+        result[offset] = f"Linha {positions[offset] + 1}"
+    return result
+
+
+def validate_aggregation(spec: Any) -> Optional[str]:
+    if spec is None:
+        return None
+    if not isinstance(spec, dict):
+        return "Formato de agregação inválido."
+    function = spec.get("function") or "sum"
+    if function not in AGGREGATION_FUNCTIONS:
+        return "Função de agregação inválida."
+    per_metric = spec.get("metrics") or {}
+    if not isinstance(per_metric, dict):
+        return "Formato de agregação por métrica inválido."
+    for value in per_metric.values():
+        if value not in AGGREGATION_FUNCTIONS:
+            return "Função de agregação inválida."
+    top_n = spec.get("top_n")
+    if top_n is not None and (isinstance(top_n, bool) or not isinstance(top_n, int) or top_n < 1):
+        return "O limite de grupos deve ser um inteiro positivo."
+    return None
+
+
+def _aggregate(values: pd.Series, filled: pd.Series, keys: pd.Series, function: str) -> pd.Series:
+    if function == "count":
+        return filled.groupby(keys, sort=False).sum().astype(np.float64)
+    grouped = values.groupby(keys, sort=False)
+    if function == "sum":
+        return grouped.sum(min_count=1)
+    return getattr(grouped, function)()
+
+
+def build_aggregated_chart_data(
+    frame: pd.DataFrame,
+    dimensoes: Sequence[Any],
+    metricas: Sequence[Any],
+    spec: Dict[str, Any],
+    row_indices: Optional[Iterable] = None,
+) -> Dict[str, Any]:
+    """Agrupa as linhas pelas dimensões e agrega cada métrica (sum/mean/count/min/max)."""
+    selected, _ = _select_rows(frame, row_indices)
+    metrics = [metric for metric in metricas or [] if isinstance(metric, dict)]
+    default_function = spec.get("function") or "sum"
+    per_metric = spec.get("metrics") or {}
+    top_n = spec.get("top_n")
+
+    if selected.empty:
+        # Todas as linhas ocultas ou fora da seleção: gráfico vazio, sem nenhum grupo.
+        return {
+            "labels": [],
+            "series": [
+                {
+                    "key": metric.get("key"),
+                    "label": metric.get("label") or metric.get("key"),
+                    "color": metric.get("color"),
+                    "aggregation": per_metric.get(metric.get("key"), default_function),
+                    "values": [],
+                    "raw_values": [],
+                }
+                for metric in metrics
+            ],
+            "aggregation": {"function": default_function, "groups": 0, "source_rows": 0, "top_n": top_n},
+        }
+
+    labels = _join_dimensions(selected, dimensoes)
+    keys = labels.where(labels != "", EMPTY_GROUP_LABEL)
+
+    columns: List[Tuple[Dict[str, Any], str, pd.Series, pd.Series]] = []
+    for metric in metrics:
+        column = str(metric.get("key"))
+        if column in selected.columns:
+            parsed, valid = coerce_numeric(selected[column])
+            numbers = pd.Series(np.where(valid, parsed, np.nan), index=selected.index)
+            filled = _text_column(selected, column).str.strip() != ""
+        else:
+            numbers = pd.Series(np.nan, index=selected.index)
+            filled = pd.Series(False, index=selected.index)
+        function = per_metric.get(metric.get("key"), default_function)
+        columns.append((metric, function, numbers, filled))
+
+    group_count = int(keys.nunique())
+    if top_n and group_count > top_n and columns:
+        # Ranqueia pelos valores da primeira métrica e reagrupa o restante em "Outros",
+        # recalculando a agregação sobre as linhas originais (média de médias seria incorreta).
+        _, function, numbers, filled = columns[0]
+        ranking = _aggregate(numbers, filled, keys, function).sort_values(ascending=False, na_position="last")
+        kept = set(ranking.index[:top_n])
+        others_label = str(spec.get("others_label") or DEFAULT_OTHERS_LABEL)
+        keys = keys.where(keys.isin(kept), others_label)
+        order = [label for label in ranking.index[:top_n]] + [others_label]
+    else:
+        order = list(pd.unique(keys))
+
+    series_payload: List[Dict[str, Any]] = []
+    for metric, function, numbers, filled in columns:
+        aggregated = _aggregate(numbers, filled, keys, function).reindex(order)
+        values = [None if pd.isna(value) else float(value) for value in aggregated.tolist()]
+        series_payload.append(
+            {
+                "key": metric.get("key"),
+                "label": metric.get("label") or metric.get("key"),
+                "color": metric.get("color"),
+                "aggregation": function,
+                "values": values,
+                "raw_values": ["" if value is None else str(value) for value in values],
+            }
+        )
+
+    return {
+        "labels": [str(label) for label in order],
+        "series": series_payload,
+        "aggregation": {
+            "function": default_function,
+            "groups": len(order),
+            "source_rows": len(selected),
+            "top_n": top_n,
+        },
+    }
+
+
+def build_chart_data(
+    frame: pd.DataFrame,
+    dimensoes: Sequence[Any],
+    metricas: Sequence[Any],
+    row_indices: Optional[Iterable] = None,
+    aggregation: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Monta labels e séries do gráfico a partir das linhas visíveis da categoria."""
+    if aggregation:
+        return build_aggregated_chart_data(frame, dimensoes, metricas, aggregation, row_indices)
+
+    selected, positions = _select_rows(frame, row_indices)
+
+    series_payload: List[Dict[str, Any]] = []
+    for metric in metricas or []:
+        if not isinstance(metric, dict):
+            continue
+        key = metric.get("key")
+        column = str(key)
+        if key is not None and column in selected.columns:
+            source = selected[column]
+            values = numeric_list(source)
+            raw = _text_column(selected, column).tolist()
+        else:
+            values = [None] * len(selected)
+            raw = [""] * len(selected)
+
+        series_payload.append(
+            {
+                "key": key,
+                "label": metric.get("label") or key,
+                "color": metric.get("color"),
+                "values": values,
+                "raw_values": raw,
+            }
+        )
+
+    return {
+        "labels": build_labels(selected, dimensoes, positions),
+        "series": series_payload,
+    }
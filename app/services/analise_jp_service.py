@@ -1,11 +1,24 @@
 from __future__ import annotations
 
-import io
+import hashlib
+import json
+import math
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
 import pandas as pd
-from werkzeug.datastructures import FileStorage
+
+from app.services.analise_storage_service import ColumnarWriter
+from app.services.parse_pool_service import run_in_pool, should_offload
+from app.services.upload_stream_service import (
+    CSV_CHUNK_ROWS,
+    cell_text,
+    csv_read_options,
+    detect_csv_dialect,
+    iter_xlsx_rows,
+    unique_headers,
+)
 
 ANALISE_JP_CATEGORIES: List[str] = [
     "simples_nacional",
@@ -24,6 +37,7 @@ ANALISE_JP_CATEGORIES: List[str] = [
 ]
 
 ALLOWED_EXTENSIONS = {".csv", ".xlsx"}
+PROFILE_VERSION = 1
 
 
 class AnaliseJPProcessingError(ValueError):
@@ -40,42 +54,59 @@ def validate_category(categoria: str) -> None:
         raise AnaliseJPProcessingError("Categoria inválida.")
 
 
-def _decode_csv_bytes(data: bytes) -> io.StringIO:
-    try:
-        text = data.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        text = data.decode("latin-1")
-    return io.StringIO(text)
-
-
-def _load_dataframe(file_bytes: bytes, extension: str) -> pd.DataFrame:
+def _iter_csv_frames(path: Path, dialect: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(
+        path,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=CSV_CHUNK_ROWS,
+        **csv_read_options(dialect),
+    )
+
+
+def _iter_xlsx_frames(path: Path) -> Iterator[pd.DataFrame]:
+    rows = iter_xlsx_rows(path)
+    header_row = next(rows, None)
+    if header_row is None:
+        return
+    headers = unique_headers(header_row)
+    width = len(headers)
+
+    batch: List[List[str]] = []
+    for row in rows:
+        values = [cell_text(value) for value in row[:width]]
+        values.extend([""] * (width - len(values)))
+        batch.append(values)
+        if len(batch) >= CSV_CHUNK_ROWS:
+            yield pd.DataFrame(batch, columns=headers, dtype=str)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=headers, dtype=str)
+
+
+def _iter_dataframes(path: Path, extension: str, dialect: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
+    """Lê o arquivo em blocos de linhas para nunca manter o conteúdo inteiro em memória."""
     if extension == ".csv":
-        buffer = _decode_csv_bytes(file_bytes)
-        dataframe = pd.read_csv(
-            buffer,
-            sep=None,
-            engine="python",
-            dtype=str,
-            keep_default_na=False,
-        )
+        frames = _iter_csv_frames(path, dialect or detect_csv_dialect(path))
     else:
-        buffer = io.BytesIO(file_bytes)
-        dataframe = pd.read_excel(
-            buffer,
-            engine="openpyxl",
-            dtype=str,
-            na_filter=False,
-        )
-
-    dataframe = dataframe.dropna(how="all")
-    if dataframe.empty:
+        frames = _iter_xlsx_frames(path)
+    total_rows = 0
+    for dataframe in frames:
+        dataframe = dataframe.dropna(how="all")
+        total_rows += len(dataframe)
+        yield dataframe
+    if not total_rows:
         raise AnaliseJPProcessingError("Arquivo sem dados para processar.")
-    return dataframe
 
 
-def _dataframe_to_records(dataframe: pd.DataFrame) -> List[dict]:
-    records: List[dict] = []
+def _column_text(values: pd.Series) -> pd.Series:
+    """str(valor).strip() aplicado à coluna inteira; células ausentes viram 'nan', como no iterrows."""
+    missing = values.isna()
+    return values.astype(object).where(~missing, "nan").astype(str).str.strip()
+
 
+def _dataframe_to_columns(dataframe: pd.DataFrame) -> Tuple[List[str], List[List[str]]]:
+    """Cabeçalhos e valores (coluna a coluna) das linhas com ao menos uma célula preenchida."""
     headers = []
     for column in dataframe.columns:
         header = str(column).strip()
@@ -84,39 +115,153 @@ def _dataframe_to_records(dataframe: pd.DataFrame) -> List[dict]:
         else:
             headers.append(header)
 
-    for _, row in dataframe.iterrows():
-        record = {}
-        is_empty = True
+    if dataframe.empty or not headers:
+        return headers, [[] for _ in headers]
 
-        for header, value in zip(headers, row.tolist()):
-            value_str = str(value).strip() if value is not None else ""
-            if value_str:
-                is_empty = False
-            record[header] = value_str
+    columns = [_column_text(dataframe.iloc[:, position]) for position in range(len(headers))]
+    filled = np.zeros(len(dataframe), dtype=bool)
+    for text in columns:
+        filled |= (text != "").to_numpy()
+    return headers, [text.to_numpy()[filled].tolist() for text in columns]
 
-        if not is_empty:
-            records.append(record)
 
-    if not records:
-        raise AnaliseJPProcessingError("Nenhum registro válido encontrado.")
+def records_from_columns(headers: Sequence[str], columns: Sequence[Sequence[str]]) -> List[dict]:
+    return [dict(zip(headers, row)) for row in zip(*columns)]
 
-    return records
+
+def _dataframe_to_records(dataframe: pd.DataFrame) -> List[dict]:
+    headers, columns = _dataframe_to_columns(dataframe)
+    return records_from_columns(headers, columns)
+
+
+def iter_record_chunks(
+    path: Path, extension: str, dialect: Optional[Dict[str, Any]] = None
+) -> Iterator[List[dict]]:
+    for dataframe in _iter_dataframes(path, extension, dialect):
+        records = _dataframe_to_records(dataframe)
+        if records:
+            yield records
 
 
-def extract_payload(file: FileStorage) -> Tuple[List[dict], bytes]:
-    filename = file.filename or ""
-    extension = Path(filename).suffix.lower()
+def validate_extension(filename: str) -> str:
+    extension = Path(filename or "").suffix.lower()
     if extension not in ALLOWED_EXTENSIONS:
         raise AnaliseJPProcessingError("Formato inválido. Utilize arquivos CSV ou XLSX.")
+    return extension
+
+
+def parse_columnar(path: str, extension: str) -> Dict[str, Any]:
+    """Leitura completa em formato colunar, compacta para voltar de um processo filho."""
+    source = Path(path)
+    if source.stat().st_size == 0:
+        raise AnaliseJPProcessingError("Arquivo vazio.")
+
+    dialect = detect_csv_dialect(source) if extension == ".csv" else None
+    headers: List[str] = []
+    columns: List[List[str]] = []
+    for dataframe in _iter_dataframes(source, extension, dialect):
+        chunk_headers, chunk_columns = _dataframe_to_columns(dataframe)
+        if not columns:
+            headers, columns = chunk_headers, chunk_columns
+            continue
+        for target, values in zip(columns, chunk_columns):
+            target.extend(values)
+    return {"headers": headers, "columns": columns, "dialect": dialect}
+
+
+def parse_records(
+    path: Path,
+    extension: str,
+    on_progress: Optional[Callable[[int], Any]] = None,
+) -> Tuple[List[dict], Optional[Dict[str, Any]]]:
+    """Registros e dialeto de um arquivo já gravado; on_progress recebe as linhas lidas até agora."""
+    if should_offload(path, extension):
+        # XLSX e CSVs grandes são lidos em outro processo para não prender o GIL deste worker.
+        parsed = run_in_pool(parse_columnar, str(path), extension)
+        records = records_from_columns(parsed["headers"], parsed["columns"])
+        dialect = parsed["dialect"]
+        if on_progress is not None:
+            on_progress(len(records))
+    else:
+        if path.stat().st_size == 0:
+            raise AnaliseJPProcessingError("Arquivo vazio.")
+        dialect = detect_csv_dialect(path) if extension == ".csv" else None
+        records = []
+        for chunk in iter_record_chunks(path, extension, dialect):
+            records.extend(chunk)
+            if on_progress is not None:
+                on_progress(len(records))
 
-    file.stream.seek(0)
-    file_bytes = file.stream.read()
-    if not file_bytes:
+    if not records:
+        raise AnaliseJPProcessingError("Nenhum registro válido encontrado.")
+    return records, dialect
+
+
+def parse_to_columnar(
+    path: str,
+    extension: str,
+    destination: str,
+    on_progress: Optional[Callable[[int], Any]] = None,
+) -> Dict[str, Any]:
+    """Lê o arquivo em blocos e grava cada bloco direto no Parquet em destination.
+
+    Registros e perfil das colunas são montados bloco a bloco, sem juntar o arquivo em
+    memória. Devolve só metadados (esquema, total de linhas, perfil e dialeto), que cabem
+    na volta de um processo filho. Em caso de erro o Parquet parcial é apagado.
+    """
+    source = Path(path)
+    if source.stat().st_size == 0:
         raise AnaliseJPProcessingError("Arquivo vazio.")
 
-    dataframe = _load_dataframe(file_bytes, extension)
-    records = _dataframe_to_records(dataframe)
-    return records, file_bytes
+    dialect = detect_csv_dialect(source) if extension == ".csv" else None
+    writer: Optional[ColumnarWriter] = None
+    builder: Optional[ColumnProfileBuilder] = None
+    positions: Dict[str, int] = {}
+    try:
+        for dataframe in _iter_dataframes(source, extension, dialect):
+            headers, columns = _dataframe_to_columns(dataframe)
+            if writer is None:
+                # Cabeçalhos repetidos: vale a última coluna, como em dict(zip(headers, linha)).
+                positions = {header: position for position, header in enumerate(headers)}
+                writer = ColumnarWriter(Path(destination), list(positions))
+                builder = ColumnProfileBuilder(writer.fields)
+            if not positions or not columns[0]:
+                continue
+            selected = [columns[positions[field]] for field in writer.fields]
+            writer.write(selected)
+            builder.add_columns(selected)
+            if on_progress is not None:
+                on_progress(writer.total_linhas)
+        if writer is None or not writer.total_linhas:
+            raise AnaliseJPProcessingError("Nenhum registro válido encontrado.")
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+
+    written = writer.close()
+    return {
+        "caminho": written["caminho"],
+        "dialeto": dialect,
+        "esquema": written["colunas"],
+        "total_linhas": written["total_linhas"],
+        "perfil": builder.profile(),
+    }
+
+
+def parse_upload_to_columnar(
+    path: Path,
+    extension: str,
+    destination: Path,
+    on_progress: Optional[Callable[[int], Any]] = None,
+) -> Dict[str, Any]:
+    """parse_to_columnar no pool de processos para XLSX e CSVs grandes, senão neste worker."""
+    if not should_offload(path, extension):
+        return parse_to_columnar(str(path), extension, str(destination), on_progress)
+    parsed = run_in_pool(parse_to_columnar, str(path), extension, str(destination))
+    if on_progress is not None:
+        on_progress(parsed["total_linhas"])
+    return parsed
 
 
 def normalise_indices(values: Optional[Iterable]) -> List[int]:
@@ -142,3 +287,135 @@ def visible_records(records: Sequence[dict], hidden_indices: Optional[Sequence[i
             visible.append(record)
     return visible
 
+
+def coerce_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+
+    text = str(value).strip()
+    if not text:
+        return None
+
+    replacements = {
+        "R$": "",
+        "r$": "",
+        "%": "",
+        "\u00a0": "",
+        " ": "",
+    }
+    for needle, replacement in replacements.items():
+        text = text.replace(needle, replacement)
+
+    if "," in text and "." in text:
+        text = text.replace(".", "").replace(",", ".")
+    else:
+        text = text.replace(",", ".")
+
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def hidden_signature(hidden_indices: Optional[Iterable]) -> str:
+    payload = json.dumps(normalise_indices(hidden_indices), separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ColumnProfileBuilder:
+    """Perfil das colunas acumulado bloco a bloco.
+
+    Cada valor distinto é convertido com coerce_float uma única vez: blocos seguintes só
+    pagam a conversão dos valores ainda não vistos.
+    """
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self.fields = list(fields)
+        self.rows = 0
+        self._nulls = dict.fromkeys(self.fields, 0)
+        self._distinct: Dict[str, Set[str]] = {field: set() for field in self.fields}
+        self._numeric = dict.fromkeys(self.fields, True)
+        self._min: Dict[str, Optional[float]] = dict.fromkeys(self.fields)
+        self._max: Dict[str, Optional[float]] = dict.fromkeys(self.fields)
+
+    def add_columns(self, columns: Sequence[Sequence[Any]]) -> None:
+        """Acrescenta um bloco de linhas, com uma lista de valores por campo na ordem de fields."""
+        for field, values in zip(self.fields, columns):
+            self._add_column(field, values)
+        if columns:
+            self.rows += len(columns[0])
+
+    def _add_column(self, field: str, values: Sequence[Any]) -> None:
+        array = np.asarray(values, dtype=object)
+        empty = (array == "") | np.equal(array, None)
+        self._nulls[field] += int(np.count_nonzero(empty))
+
+        distinct = self._distinct[field]
+        for value in pd.unique(array[~empty]):
+            text = str(value)
+            if text in distinct:
+                continue
+            distinct.add(text)
+            if not self._numeric[field]:
+                continue
+            number = coerce_float(text)
+            if number is None:
+                self._numeric[field] = False
+                self._min[field] = self._max[field] = None
+            elif math.isfinite(number):
+                self._min[field] = number if self._min[field] is None else min(self._min[field], number)
+                self._max[field] = number if self._max[field] is None else max(self._max[field], number)
+
+    def profile(self, hidden_indices: Optional[Iterable] = None, total: Optional[int] = None) -> Dict[str, Any]:
+        """Perfil no formato de cache_metadata; total inclui as linhas ocultas não acrescentadas."""
+        total = self.rows if total is None else total
+        columns: Dict[str, Dict[str, Any]] = {}
+        numeric_fields: List[str] = []
+        for field in self.fields:
+            numeric = self._numeric[field] and bool(self._distinct[field])
+            if numeric:
+                numeric_fields.append(field)
+            columns[field] = {
+                "numeric": numeric,
+                "nulls": self._nulls[field],
+                "distinct": len(self._distinct[field]),
+                "min": self._min[field] if numeric else None,
+                "max": self._max[field] if numeric else None,
+            }
+
+        return {
+            "version": PROFILE_VERSION,
+            "hidden_signature": hidden_signature(hidden_indices),
+            "fields": self.fields,
+            "numeric_fields": numeric_fields,
+            "columns": columns,
+            "totals": {
+                "total": total,
+                "visiveis": self.rows,
+                "ocultos": total - self.rows,
+            },
+        }
+
+
+def build_column_profile(records: Sequence[dict], hidden_indices: Optional[Iterable]) -> Dict[str, Any]:
+    """Perfil das colunas calculado sobre as linhas visíveis, persistido em cache_metadata."""
+    visible = visible_records(records, hidden_indices)
+
+    field_names: List[str] = []
+    for record in visible if visible else records:
+        if isinstance(record, dict):
+            field_names = list(record.keys())
+            break
+
+    builder = ColumnProfileBuilder(field_names)
+    builder.add_columns([[record.get(field) for record in visible] for field in field_names])
+    builder.rows = len(visible)
+    return builder.profile(hidden_indices, total=len(records))
+
+
+def profile_is_current(profile: Any, signature: str) -> bool:
+    if not isinstance(profile, dict):
+        return False
+    if profile.get("version") != PROFILE_VERSION:
+        return False
+    return profile.get("hidden_signature") == signature
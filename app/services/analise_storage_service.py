@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from app.models.analise_upload import AnaliseUpload
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pragma: no cover - dependência opcional
+    pyarrow = None
+    parquet = None
+
+STORAGE_JSON = "json"
+STORAGE_PARQUET = "parquet"
+STORAGE_FORMATS = {STORAGE_JSON, STORAGE_PARQUET}
+
+
+def columnar_available() -> bool:
+    return pyarrow is not None
+
+
+def resolve_storage_format(requested: Optional[str]) -> str:
+    formato = (requested or STORAGE_JSON).strip().lower()
+    if formato not in STORAGE_FORMATS:
+        formato = STORAGE_JSON
+    if formato == STORAGE_PARQUET and not columnar_available():
+        return STORAGE_JSON
+    return formato
+
+
+def record_fields(records: Sequence[dict]) -> List[str]:
+    for record in records:
+        if isinstance(record, dict):
+            return list(record.keys())
+    return []
+
+
+class ColumnarWriter:
+    """Grava registros em Parquet bloco a bloco: só o bloco atual fica em memória.
+
+    Todas as colunas são texto; cada write() vira um row group do arquivo.
+    """
+
+    def __init__(self, destination: Path, fields: Sequence[str]) -> None:
+        self.destination = destination
+        self.fields = list(fields)
+        self.total_linhas = 0
+        self._schema = pyarrow.schema([(field, pyarrow.string()) for field in self.fields])
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = parquet.ParquetWriter(str(destination), self._schema, compression="zstd")
+
+    def write(self, columns: Sequence[Sequence[str]]) -> None:
+        """Acrescenta um bloco com uma lista de valores por campo, na ordem de fields."""
+        arrays = [pyarrow.array(values, type=pyarrow.string()) for values in columns]
+        table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+        if table.num_rows:
+            self._writer.write_table(table)
+            self.total_linhas += table.num_rows
+
+    def close(self) -> Dict[str, Any]:
+        self._writer.close()
+        return {
+            "caminho": str(self.destination),
+            "colunas": self.fields,
+            "total_linhas": self.total_linhas,
+        }
+
+    def discard(self) -> None:
+        try:
+            self._writer.close()
+        finally:
+            self.destination.unlink(missing_ok=True)
+
+
+def read_columnar_records(path: str) -> List[dict]:
+    return pd.read_parquet(path, engine="pyarrow").to_dict(orient="records")
+
+
+def _project_columns(schema: Sequence[str], columns: Optional[Iterable[str]]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    known = set(schema)
+    projected: List[str] = []
+    for column in columns:
+        if column in known and column not in projected:
+            projected.append(column)
+    return projected
+
+
+def read_frame(upload: AnaliseUpload, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Carrega os registros do upload como DataFrame, lendo apenas as colunas pedidas."""
+    schema = list(upload.esquema_dados or [])
+
+    if upload.formato_armazenamento == STORAGE_PARQUET and upload.caminho_dados:
+        projected = _project_columns(schema, columns)
+        if projected == []:
+            metadata_rows = upload.total_linhas or 0
+            return pd.DataFrame(index=pd.RangeIndex(metadata_rows))
+        return pd.read_parquet(upload.caminho_dados, engine="pyarrow", columns=projected)
+
+    records = upload.dados_extraidos if isinstance(upload.dados_extraidos, list) else []
+    fields = schema or record_fields(records)
+    dataframe = pd.DataFrame.from_records(
+        [record if isinstance(record, dict) else {} for record in records],
+        columns=fields,
+    )
+    projected = _project_columns(fields, columns)
+    if projected is not None:
+        dataframe = dataframe[projected]
+    return dataframe
+
+
+def load_records(upload: AnaliseUpload, columns: Optional[Iterable[str]] = None) -> List[dict]:
+    if upload.formato_armazenamento != STORAGE_PARQUET or not upload.caminho_dados:
+        records = upload.dados_extraidos if isinstance(upload.dados_extraidos, list) else []
+        if columns is None:
+            return records
+        wanted = list(columns)
+        return [
+            {column: record[column] for column in wanted if column in record}
+            if isinstance(record, dict)
+            else record
+            for record in records
+        ]
+
+    return read_frame(upload, columns).to_dict(orient="records")
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.analise_upload import AnaliseUpload
+from app.services.analise_chart_service import coerce_numeric
+from app.services.analise_jp_service import (
+    AnaliseJPProcessingError,
+    coerce_float,
+    hidden_signature,
+    normalise_indices,
+)
+from app.services.analise_storage_service import read_frame
+
+BIT_ORDER = "little"
+TEXT_OPERATORS = {"eq", "ne", "contains", "in", "empty", "not_empty"}
+NUMERIC_OPERATORS = {"gt", "gte", "lt", "lte"}
+
+
+def pack_mask(mask: np.ndarray) -> bytes:
+    """Bitmap compacto (1 bit por linha) da máscara de linhas ocultas."""
+    return np.packbits(np.asarray(mask, dtype=bool), bitorder=BIT_ORDER).tobytes()
+
+
+def unpack_mask(data: bytes, total: int) -> np.ndarray:
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder=BIT_ORDER)
+    if len(bits) < total:
+        bits = np.concatenate([bits, np.zeros(total - len(bits), dtype=np.uint8)])
+    return bits[:total].astype(bool)
+
+
+def mask_from_indices(indices: Iterable, total: int) -> np.ndarray:
+    mask = np.zeros(total, dtype=bool)
+    positions = [index for index in normalise_indices(indices) if index < total]
+    if positions:
+        mask[np.asarray(positions, dtype=np.int64)] = True
+    return mask
+
+
+def hidden_mask(upload: AnaliseUpload, total: int) -> np.ndarray:
+    """Máscara booleana das linhas ocultas (True = oculta) com o tamanho do upload."""
+    if upload.mascara_ocultas is not None:
+        return unpack_mask(upload.mascara_ocultas, total)
+    if not upload.linhas_ocultas:
+        return np.zeros(total, dtype=bool)
+    # Uploads anteriores ao bitmap: a lista é convertida até a próxima alteração gravar a máscara.
+    return mask_from_indices(upload.linhas_ocultas, total)
+
+
+def visibility_signature(upload: AnaliseUpload) -> str:
+    return upload.assinatura_ocultas or hidden_signature(upload.linhas_ocultas or [])
+
+
+def upload_row_count(upload: AnaliseUpload) -> int:
+    if upload.total_linhas is not None:
+        return int(upload.total_linhas)
+    return len(read_frame(upload, columns=[]))
+
+
+def hidden_indices(mask: np.ndarray) -> List[int]:
+    return np.flatnonzero(mask).tolist()
+
+
+def hidden_row_list(upload: AnaliseUpload) -> List[int]:
+    """Lista das linhas ocultas para quem ainda lê o formato antigo, derivada do bitmap."""
+    if upload.mascara_ocultas is None:
+        return normalise_indices(upload.linhas_ocultas)
+    return hidden_indices(hidden_mask(upload, upload_row_count(upload)))
+
+
+def visible_positions(mask: np.ndarray) -> np.ndarray:
+    """Índices, nos registros do upload, das linhas visíveis (na ordem original)."""
+    return np.flatnonzero(~mask)
+
+
+def store_mask(upload: AnaliseUpload, mask: np.ndarray) -> None:
+    """Grava a máscara; o bitmap é a única fonte das linhas ocultas.
+
+    A assinatura vem do próprio bitmap, sem montar a lista de índices; linhas_ocultas fica
+    vazia e hidden_row_list a reconstrói sob demanda.
+    """
+    packed = pack_mask(mask)
+    upload.mascara_ocultas = packed
+    upload.assinatura_ocultas = hashlib.sha1(packed).hexdigest()
+    upload.linhas_ocultas = []
+
+
+def set_rows_hidden(upload: AnaliseUpload, selection: np.ndarray, hidden: bool, total: int) -> Tuple[int, int]:
+    """Oculta (ou reexibe) as linhas marcadas em selection.
+
+    Devolve quantas linhas mudaram de estado e quantas ficaram ocultas no total.
+    """
+    mask = hidden_mask(upload, total)
+    changed = int(np.count_nonzero(selection & (mask != hidden)))
+    if changed:
+        mask[selection] = hidden
+        store_mask(upload, mask)
+    return changed, int(np.count_nonzero(mask))
+
+
+def _is_integer(value: Any) -> bool:
+    # bool é subclasse de int, mas true/false no JSON não são posições de linha.
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _range_bounds(value: Any) -> Tuple[int, int]:
+    if isinstance(value, dict):
+        start, end = value.get("inicio"), value.get("fim")
+    elif isinstance(value, (list, tuple)) and len(value) == 2:
+        start, end = value
+    else:
+        raise AnaliseJPProcessingError("Intervalo inválido. Use [inicio, fim] ou {\"inicio\", \"fim\"}.")
+    if not _is_integer(start) or not _is_integer(end):
+        raise AnaliseJPProcessingError("Intervalo inválido: inicio e fim devem ser números inteiros.")
+    if start < 0 or end < start:
+        raise AnaliseJPProcessingError("Intervalo inválido: fim deve ser maior ou igual ao início.")
+    return start, end
+
+
+def _explicit_mask(total: int, indices: Optional[Any], ranges: Optional[Any]) -> Optional[np.ndarray]:
+    if indices is not None and not isinstance(indices, list):
+        raise AnaliseJPProcessingError("'indices' deve ser uma lista de números inteiros.")
+    if ranges is not None and not isinstance(ranges, list):
+        raise AnaliseJPProcessingError("'intervalos' deve ser uma lista de pares [inicio, fim].")
+    if not indices and not ranges:
+        return None
+    if not all(_is_integer(value) for value in indices or []):
+        raise AnaliseJPProcessingError("'indices' deve ser uma lista de números inteiros.")
+
+    mask = np.zeros(total, dtype=bool)
+    for value in ranges or []:
+        start, end = _range_bounds(value)
+        # Intervalos são inclusivos nas duas pontas.
+        mask[start:end + 1] = True
+    # Índices fora do upload são ignorados antes da conversão, que não comportaria valores enormes.
+    positions = [index for index in indices or [] if 0 <= index < total]
+    mask[np.asarray(positions, dtype=np.int64)] = True
+    return mask
+
+
+def _filter_mask(series: pd.Series, operator: str, value: Any) -> np.ndarray:
+    if operator in NUMERIC_OPERATORS:
+        number = coerce_float(value)
+        if number is None:
+            raise AnaliseJPProcessingError(f"O operador '{operator}' exige um valor numérico.")
+        parsed, valid = coerce_numeric(series)
+        with np.errstate(invalid="ignore"):
+            compared = {
+                "gt": parsed > number,
+                "gte": parsed >= number,
+                "lt": parsed < number,
+                "lte": parsed <= number,
+            }[operator]
+        return valid & compared
+
+    # Comparações de texto ignoram espaços nas pontas e maiúsculas/minúsculas.
+    text = series.astype(object).where(series.notna(), "").astype(str).str.strip()
+    if operator == "empty":
+        return (text == "").to_numpy(dtype=bool)
+    if operator == "not_empty":
+        return (text != "").to_numpy(dtype=bool)
+
+    folded = text.str.casefold()
+    if operator == "in":
+        if not isinstance(value, list):
+            raise AnaliseJPProcessingError("O operador 'in' exige uma lista de valores.")
+        targets = [str(item).strip().casefold() for item in value]
+        return folded.isin(targets).to_numpy(dtype=bool)
+
+    target = str(value if value is not None else "").strip().casefold()
+    if operator == "contains":
+        return folded.str.contains(target, regex=False).to_numpy(dtype=bool)
+    matches = (folded == target).to_numpy(dtype=bool)
+    return matches if operator == "eq" else ~matches
+
+
+def select_rows(
+    upload: AnaliseUpload,
+    total: int,
+    indices: Optional[Any] = None,
+    ranges: Optional[Any] = None,
+    filters: Optional[Any] = None,
+) -> np.ndarray:
+    """Máscara das linhas escolhidas por índices/intervalos, restrita pelos filtros de coluna.
+
+    Sem índices nem intervalos, os filtros são avaliados sobre todas as linhas do upload.
+    Todos os filtros precisam ser atendidos (E lógico).
+    """
+    if filters is not None and not isinstance(filters, list):
+        raise AnaliseJPProcessingError("'filtros' deve ser uma lista de filtros.")
+    filters = filters or []
+    explicit = _explicit_mask(total, indices, ranges)
+    if explicit is None and not filters:
+        raise AnaliseJPProcessingError("Informe indices, intervalos ou filtros.")
+
+    selection = explicit if explicit is not None else np.ones(total, dtype=bool)
+    if not filters:
+        return selection
+
+    columns: List[str] = []
+    for item in filters:
+        if not isinstance(item, dict) or not str(item.get("coluna") or "").strip():
+            raise AnaliseJPProcessingError("Cada filtro precisa de 'coluna', 'operador' e 'valor'.")
+        operator = str(item.get("operador") or "eq").strip().lower()
+        if operator not in TEXT_OPERATORS | NUMERIC_OPERATORS:
+            raise AnaliseJPProcessingError(f"Operador de filtro desconhecido: {operator}.")
+        columns.append(str(item["coluna"]).strip())
+
+    frame = read_frame(upload, columns=columns)
+    if len(frame) != total:
+        raise AnaliseJPProcessingError("Quantidade de linhas do upload inconsistente.")
+    for item, column in zip(filters, columns):
+        if column not in frame.columns:
+            raise AnaliseJPProcessingError(f"Coluna desconhecida: {column}.")
+        operator = str(item.get("operador") or "eq").strip().lower()
+        selection &= _filter_mask(frame[column], operator, item.get("valor"))
+    return selection
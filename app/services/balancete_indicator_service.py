@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import math
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+
+from app.extensions import db
+from app.models.arquivo_importado import ArquivoImportado
+from app.models.balancete_indicador import BalanceteIndicador
+from app.services.database_service import large_read_options
+
+NAME_MAX_LENGTH = 255
+DEFAULT_HISTORY_PERIODS = 24
+MAX_HISTORY_PERIODS = 120
+AGGREGATION_SUM = "soma"
+AGGREGATION_MEAN = "media"
+HISTORY_AGGREGATIONS = {AGGREGATION_SUM, AGGREGATION_MEAN}
+RECORD_FIELDS = (
+    "indicador",
+    "valor_periodo_1",
+    "valor_periodo_2",
+    "diferenca_absoluta",
+    "diferenca_percentual",
+    "tendencia",
+    "tipo_valor",
+)
+NUMERIC_FIELDS = ("valor_periodo_1", "valor_periodo_2", "diferenca_absoluta", "diferenca_percentual")
+RECORD_COLUMNS = [getattr(BalanceteIndicador, field) for field in RECORD_FIELDS]
+
+
+def _unique_names(nomes: Iterable[str]) -> List[str]:
+    """Nomes que cabem no índice único (upload, indicador), com a última ocorrência vencendo.
+
+    A coluna compara nomes byte a byte (collation binária), então só repetições exatas
+    colidem. Como no payload original, em que o último indicador repetido prevalecia, a
+    última ocorrência fica com o nome; as anteriores recebem sufixo (2), (3)... Nomes acima
+    de NAME_MAX_LENGTH são truncados.
+    """
+    bases = [str(nome).strip()[:NAME_MAX_LENGTH].rstrip() for nome in nomes]
+    last = {base: position for position, base in enumerate(bases)}
+    taken = set(last)
+    counters: Dict[str, int] = {}
+    unique: List[str] = []
+    for position, base in enumerate(bases):
+        if last[base] == position:
+            unique.append(base)
+            continue
+        candidate = base
+        while candidate in taken:
+            counters[base] = counters.get(base, 1) + 1
+            suffix = f" ({counters[base]})"
+            candidate = base[:NAME_MAX_LENGTH - len(suffix)] + suffix
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def _number_or_none(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    number = float(value)
+    return None if math.isnan(number) else number
+
+
+def indicator_rows(arquivo_id: int, indicadores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    nomes = _unique_names(item.get("indicador") or "" for item in indicadores)
+    rows: List[Dict[str, Any]] = []
+    for ordem, (nome, item) in enumerate(zip(nomes, indicadores)):
+        row = {field: _number_or_none(item.get(field)) for field in NUMERIC_FIELDS}
+        row.update(
+            arquivo_id=arquivo_id,
+            ordem=ordem,
+            indicador=nome,
+            tendencia=item.get("tendencia"),
+            tipo_valor=item.get("tipo_valor") or "currency",
+        )
+        rows.append(row)
+    return rows
+
+
+def store_indicators(arquivo_id: int, indicadores: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Grava os indicadores e devolve os que precisaram de outro nome (repetidos ou longos)."""
+    rows = indicator_rows(arquivo_id, indicadores)
+    if rows:
+        db.session.execute(insert(BalanceteIndicador), rows)
+    renamed = []
+    for item, row in zip(indicadores, rows):
+        original = str(item.get("indicador") or "").strip()
+        if original != row["indicador"]:
+            renamed.append({"original": original, "indicador": row["indicador"]})
+    return renamed
+
+
+def delete_indicators(arquivo_id: int) -> None:
+    # A FK já remove em cascata no MySQL; a exclusão explícita não depende disso.
+    db.session.execute(
+        delete(BalanceteIndicador)
+        .where(BalanceteIndicador.arquivo_id == arquivo_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def load_indicators(arquivo_id: int, nomes: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Registros do upload na ordem do arquivo; com nomes, só os indicadores pedidos."""
+    query = select(*RECORD_COLUMNS).where(BalanceteIndicador.arquivo_id == arquivo_id)
+    if nomes is not None:
+        nomes = list(nomes)
+        if not nomes:
+            return []
+        query = query.where(BalanceteIndicador.indicador.in_(nomes))
+    else:
+        # Upload inteiro: pode ter dezenas de milhares de linhas, lidas em lotes.
+        query = query.execution_options(**large_read_options())
+    query = query.order_by(BalanceteIndicador.ordem)
+    return [dict(row) for row in db.session.execute(query).mappings()]
+
+
+def update_indicator_type(arquivo_id: int, nome: str, tipo_valor: str) -> Optional[Dict[str, Any]]:
+    """Altera só a linha do indicador; devolve o registro atualizado ou None se não existir."""
+    result = db.session.execute(
+        update(BalanceteIndicador)
+        .where(BalanceteIndicador.arquivo_id == arquivo_id, BalanceteIndicador.indicador == nome)
+        .values(tipo_valor=tipo_valor)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return None
+    records = load_indicators(arquivo_id, [nome])
+    return records[0] if records else None
+
+
+def indicator_history(
+    workflow_id: int,
+    nomes: List[str],
+    metrica: str,
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    limite: int = DEFAULT_HISTORY_PERIODS,
+) -> Dict[str, Any]:
+    """Valores de metrica para os indicadores pedidos nos últimos limite períodos do workflow.
+
+    Lê só as linhas dos indicadores pedidos (índice único por upload e nome); os payloads
+    dos uploads não são carregados. valores tem uma linha por indicador e uma coluna por
+    período, em ordem cronológica, com NaN onde o indicador não existe no período.
+    """
+    periods_query = select(ArquivoImportado.id, ArquivoImportado.periodo).where(
+        ArquivoImportado.workflow_id == workflow_id,
+        ArquivoImportado.periodo.isnot(None),
+    )
+    if inicio is not None:
+        periods_query = periods_query.where(ArquivoImportado.periodo >= inicio)
+    if fim is not None:
+        periods_query = periods_query.where(ArquivoImportado.periodo <= fim)
+    periods_query = periods_query.order_by(ArquivoImportado.periodo.desc()).limit(limite)
+    uploads = list(reversed(db.session.execute(periods_query).all()))
+
+    column_of = {upload_id: position for position, (upload_id, _) in enumerate(uploads)}
+    row_of = {nome: position for position, nome in enumerate(nomes)}
+    valores = np.full((len(nomes), len(uploads)), np.nan, dtype=float)
+    latest_tipo: Dict[str, Tuple[int, str]] = {}
+    if uploads and nomes:
+        metric_column = getattr(BalanceteIndicador, metrica)
+        rows = db.session.execute(
+            select(
+                BalanceteIndicador.arquivo_id,
+                BalanceteIndicador.indicador,
+                metric_column,
+                BalanceteIndicador.tipo_valor,
+            ).where(
+                BalanceteIndicador.arquivo_id.in_(list(column_of)),
+                BalanceteIndicador.indicador.in_(nomes),
+            )
+            .execution_options(**large_read_options())
+        )
+        for arquivo_id, nome, valor, tipo_valor in rows:
+            # O banco pode casar o nome sem diferenciar maiúsculas; só vale o nome exato.
+            if nome not in row_of:
+                continue
+            column = column_of[arquivo_id]
+            if valor is not None:
+                valores[row_of[nome], column] = valor
+            # Vale o tipo definido no período mais recente.
+            if nome not in latest_tipo or column > latest_tipo[nome][0]:
+                latest_tipo[nome] = (column, tipo_valor)
+
+    return {
+        "periodos": [periodo for _, periodo in uploads],
+        "upload_ids": [upload_id for upload_id, _ in uploads],
+        "valores": valores,
+        "tipos": {nome: tipo for nome, (_, tipo) in latest_tipo.items()},
+    }
+
+
+def optional_floats(values: np.ndarray) -> List[Optional[float]]:
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def period_variation(valores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Variação absoluta e percentual de cada período em relação ao anterior (linha a linha)."""
+    previous = np.full_like(valores, np.nan)
+    previous[..., 1:] = valores[..., :-1]
+    absoluta = valores - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentual = np.where(previous != 0, absoluta / previous * 100, np.nan)
+    return absoluta, percentual
+
+
+def aggregate_history(valores: np.ndarray, agregacao: str) -> np.ndarray:
+    """Soma ou média dos indicadores em cada período, ignorando os ausentes."""
+    present = ~np.isnan(valores)
+    counts = present.sum(axis=0)
+    totals = np.where(present, valores, 0.0).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = totals / counts if agregacao == AGGREGATION_MEAN else totals
+    return np.where(counts > 0, result, np.nan)
+
+
+class IndicatorIndex:
+    """Índice dos registros de um upload (nome → posição e um vetor por métrica).
+
+    Montado uma vez por requisição e compartilhado por todos os gráficos: cada
+    payload vira uma seleção de posições em vez de uma nova varredura dos registros.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], value_options: Iterable[Dict[str, Any]] = ()) -> None:
+        self.names = [item.get("indicador") for item in records]
+        self.tipos = [item.get("tipo_valor") or "currency" for item in records]
+        self.positions: Dict[str, int] = {}
+        for position, nome in enumerate(self.names):
+            if nome:
+                # Nome repetido: vale a última ocorrência, como no payload original.
+                self.positions[nome] = position
+        self.values = {
+            field: np.array(
+                [np.nan if item.get(field) is None else float(item[field]) for item in records],
+                dtype=float,
+            )
+            for field in NUMERIC_FIELDS
+        }
+        self.labels = {option.get("key"): option.get("label") for option in value_options}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_dataset(cls, dataset: Dict[str, Any]) -> "IndicatorIndex":
+        return cls(dataset.get("records") or [], dataset.get("value_options") or [])
+
+    def lookup(self, nomes: Iterable[str]) -> np.ndarray:
+        """Posições dos nomes conhecidos, na ordem pedida; nomes ausentes são ignorados."""
+        positions = [self.positions[nome] for nome in nomes if nome in self.positions]
+        return np.asarray(positions, dtype=np.int64)
+
+    def column(self, field: str, positions: np.ndarray) -> List[Optional[float]]:
+        return optional_floats(self.values[field][positions])
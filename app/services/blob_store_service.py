@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import copy
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.extensions import db
+from app.models.arquivo_blob import ArquivoBlob
+from app.services.compression_service import compress_file, compressed_suffix, configured_codec
+
+BLOB_DIRECTORY = "blobs"
+STAGING_DIRECTORY = "tmp"
+RECORDS_SUFFIX = ".registros"
+PARSE_BALANCETE = "balancete"
+PARSE_ANALISE = "analise"
+
+
+def staging_path(base_path: Path, extension: str) -> Path:
+    """Destino temporário de um upload enquanto o hash do conteúdo ainda não é conhecido."""
+    return base_path / BLOB_DIRECTORY / STAGING_DIRECTORY / f"{uuid.uuid4().hex}{extension}"
+
+
+def blob_path(base_path: Path, chave: str, extension: str) -> Path:
+    return base_path / BLOB_DIRECTORY / chave[:2] / f"{chave}{extension}"
+
+
+def records_key(chave: str) -> str:
+    """Chave do Parquet com os registros extraídos do arquivo de conteúdo chave."""
+    return f"{chave}{RECORDS_SUFFIX}"
+
+
+def find_blob(chave: str) -> Optional[ArquivoBlob]:
+    return ArquivoBlob.query.filter_by(chave=chave).first()
+
+
+def find_blob_by_path(path: Optional[str]) -> Optional[ArquivoBlob]:
+    if not path:
+        return None
+    return ArquivoBlob.query.filter_by(caminho=str(path)).first()
+
+
+def acquire_blob(blob: ArquivoBlob) -> None:
+    # Incremento feito pelo banco: dois uploads simultâneos do mesmo arquivo não perdem referência.
+    blob.referencias = ArquivoBlob.referencias + 1
+    db.session.flush()
+
+
+def store_blob(base_path: Path, source: Path, chave: str, extension: str, compress: bool = False) -> ArquivoBlob:
+    """Move source para o blob de conteúdo chave e conta uma referência.
+
+    Se o conteúdo já está guardado, source é descartado e o blob existente é reaproveitado.
+    Com compress, o arquivo é gravado com o codec de STORAGE_COMPRESSION (sufixo .zst/.gz).
+    """
+    blob = find_blob(chave)
+    if blob is not None and Path(blob.caminho).exists():
+        source.unlink(missing_ok=True)
+        acquire_blob(blob)
+        return blob
+
+    codec = configured_codec() if compress else None
+    target = blob_path(base_path, chave, extension + (compressed_suffix(codec) if codec else ""))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if codec:
+        # Comprime ao lado e troca de uma vez: outro upload do mesmo conteúdo pode estar lendo target.
+        compressed = target.with_name(f"{target.name}.{uuid.uuid4().hex}")
+        try:
+            compress_file(source, compressed, codec)
+            os.replace(compressed, target)
+        except BaseException:
+            compressed.unlink(missing_ok=True)
+            raise
+        source.unlink(missing_ok=True)
+    else:
+        os.replace(source, target)
+
+    if blob is None:
+        blob = ArquivoBlob(chave=chave, caminho=str(target), tamanho=target.stat().st_size, referencias=1)
+        try:
+            with db.session.begin_nested():
+                db.session.add(blob)
+        except IntegrityError:
+            # Dois primeiros uploads simultâneos do mesmo conteúdo: o outro gravou o registro antes.
+            # Leitura com trava: no REPEATABLE READ do MySQL, uma leitura comum ainda usaria o
+            # snapshot anterior ao insert concorrente e não veria o registro.
+            blob = ArquivoBlob.query.filter_by(chave=chave).with_for_update().one()
+            if Path(blob.caminho) != target:
+                _unlink_quietly(target)
+            acquire_blob(blob)
+        return blob
+
+    # O registro sobreviveu à remoção manual do arquivo: restaura o conteúdo no lugar.
+    blob.caminho = str(target)
+    acquire_blob(blob)
+    return blob
+
+
+def release_blob(path: Optional[str]) -> bool:
+    """Solta uma referência ao blob em path; o arquivo só é apagado quando ninguém mais o usa.
+
+    Devolve False quando path não pertence ao repositório de blobs (uploads antigos).
+    """
+    blob = find_blob_by_path(path)
+    if blob is None:
+        return False
+
+    blob.referencias = ArquivoBlob.referencias - 1
+    db.session.flush()
+    if blob.referencias > 0:
+        return True
+
+    derived = (blob.resultado_parse or {}).get(PARSE_ANALISE) or {}
+    _unlink_quietly(Path(blob.caminho))
+    db.session.delete(blob)
+    # O Parquet dos registros é mantido como cache enquanto o arquivo original existir.
+    release_blob(derived.get("registros"))
+    return True
+
+
+def cached_parse_result(chave: str, tipo: str) -> Optional[Dict[str, Any]]:
+    blob = find_blob(chave)
+    if blob is None or not Path(blob.caminho).exists():
+        return None
+    result = (blob.resultado_parse or {}).get(tipo)
+    return copy.deepcopy(result) if result else None
+
+
+def remember_parse_result(blob: ArquivoBlob, tipo: str, result: Dict[str, Any]) -> None:
+    cache = dict(blob.resultado_parse or {})
+    cache[tipo] = copy.deepcopy(result)
+    blob.resultado_parse = cache
+    flag_modified(blob, "resultado_parse")
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        current_app.logger.warning("Falha ao remover arquivo %s", path)
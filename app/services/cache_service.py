@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - dependência opcional
+    redis = None
+
+CACHE_BACKEND_MEMORY = "memory"
+CACHE_BACKEND_REDIS = "redis"
+CACHE_BACKENDS = {CACHE_BACKEND_MEMORY, CACHE_BACKEND_REDIS}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_NAMESPACE = "dashboard-bi:"
+INVALIDATION_CHANNEL = "dashboard-bi:cache-invalidation"
+RECONNECT_INITIAL_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class CacheConfigurationError(RuntimeError):
+    """Configuração de cache inválida ou dependência ausente."""
+
+
+class MemoryCacheBackend:
+    """LRU do próprio processo, limitado por um orçamento de bytes."""
+
+    name = CACHE_BACKEND_MEMORY
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # Cada entrada guarda o texto e o tamanho dele em bytes UTF-8, medido uma vez no set.
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                self.current_bytes -= self._entries.pop(key)[1]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class RedisCacheBackend:
+    """Cache compartilhado entre workers em um servidor compatível com o protocolo Redis."""
+
+    name = CACHE_BACKEND_REDIS
+
+    def __init__(self, client, namespace: str = DEFAULT_NAMESPACE, ttl: Optional[int] = None) -> None:
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl or None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self._key(key))
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.client.set(self._key(key), value, ex=self.ttl)
+
+    def delete_prefix(self, prefix: str) -> int:
+        stale = list(self.client.scan_iter(match=f"{self._key(prefix)}*"))
+        if stale:
+            self.client.delete(*stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self.delete_prefix("")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "namespace": self.namespace, "ttl": self.ttl}
+
+
+class InvalidationBus:
+    """Publica invalidações por prefixo e aplica as recebidas de outros workers."""
+
+    def __init__(self, client, channel: str = INVALIDATION_CHANNEL) -> None:
+        self.client = client
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, prefix: str) -> None:
+        message = json.dumps({"origin": self.origin, "prefix": prefix})
+        self.client.publish(self.channel, message)
+
+    def listen(self, handler: Callable[[str], Any], on_reconnect: Optional[Callable[[], Any]] = None) -> None:
+        """Aplica em handler as invalidações de outros workers, em uma thread própria.
+
+        Se a conexão com o Redis cair, a thread registra o erro e volta a se inscrever com
+        espera crescente. Mensagens publicadas durante a queda se perdem, por isso
+        on_reconnect é chamado a cada nova inscrição para descartar o cache local.
+        """
+        if self._thread is not None:
+            return
+        # A primeira inscrição é síncrona: invalidações publicadas logo após init_app não se perdem.
+        first = self._subscribe()
+
+        def run() -> None:
+            pubsub, delay = first, RECONNECT_INITIAL_DELAY
+            while True:
+                if pubsub is None:
+                    time.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                    pubsub = self._subscribe()
+                    if pubsub is None:
+                        continue
+                    if on_reconnect is not None:
+                        on_reconnect()
+                try:
+                    for message in pubsub.listen():
+                        delay = RECONNECT_INITIAL_DELAY
+                        self._dispatch(message, handler)
+                    logger.warning("Canal de invalidação do cache encerrado; reconectando.")
+                except Exception:
+                    logger.exception("Falha no canal de invalidação do cache; reconectando.")
+                self._close(pubsub)
+                pubsub = None
+
+        self._thread = threading.Thread(target=run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def _subscribe(self):
+        pubsub = None
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            return pubsub
+        except Exception:
+            logger.exception("Falha ao se inscrever no canal de invalidação do cache.")
+            self._close(pubsub)
+            return None
+
+    @staticmethod
+    def _close(pubsub) -> None:
+        if pubsub is None:
+            return
+        try:
+            pubsub.close()
+        except Exception:
+            logger.debug("Falha ao fechar a inscrição no canal de invalidação.", exc_info=True)
+
+    def _dispatch(self, message: Optional[Dict[str, Any]], handler: Callable[[str], Any]) -> None:
+        if not message or message.get("type") != "message":
+            return
+        data = message.get("data")
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        try:
+            event = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        # As invalidações do próprio processo já foram aplicadas localmente.
+        if event.get("origin") != self.origin and isinstance(event.get("prefix"), str):
+            handler(event["prefix"])
+
+
+def redis_client(url: str):
+    if redis is None:
+        raise CacheConfigurationError("O pacote 'redis' é necessário para CACHE_REDIS_URL.")
+    return redis.Redis.from_url(url)
+
+
+def build_backend(config: Dict[str, Any], client=None):
+    name = str(config.get("CACHE_BACKEND") or CACHE_BACKEND_MEMORY).strip().lower()
+    if name not in CACHE_BACKENDS:
+        raise CacheConfigurationError(f"Backend de cache desconhecido: {name}.")
+    if name == CACHE_BACKEND_REDIS:
+        if client is None:
+            url = config.get("CACHE_REDIS_URL")
+            if not url:
+                raise CacheConfigurationError("Defina CACHE_REDIS_URL para usar o cache Redis.")
+            client = redis_client(url)
+        return RedisCacheBackend(
+            client,
+            namespace=config.get("CACHE_NAMESPACE") or DEFAULT_NAMESPACE,
+            ttl=config.get("CACHE_TTL_SECONDS"),
+        )
+    return MemoryCacheBackend(int(config.get("CHART_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
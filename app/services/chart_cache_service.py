@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.services.cache_service import (
+    CACHE_BACKEND_MEMORY,
+    InvalidationBus,
+    MemoryCacheBackend,
+    build_backend,
+    redis_client,
+)
+
+
+def _timestamp(value: Optional[datetime]) -> str:
+    return value.isoformat() if value else "-"
+
+
+def workflow_prefix(workflow_id: int) -> str:
+    return f"chart:{workflow_id}:"
+
+
+def chart_cache_key(
+    workflow_id: int,
+    kind: str,
+    upload_id: int,
+    hidden_hash: str,
+    chart_id: Any,
+    updated_at: Optional[datetime],
+) -> str:
+    """Chave determinística: qualquer mudança de upload, linhas ocultas ou gráfico gera outra chave."""
+    return f"{workflow_prefix(workflow_id)}{kind}:{upload_id}:{hidden_hash}:{chart_id}:{_timestamp(updated_at)}"
+
+
+def serialize_payload(payload: Any) -> str:
+    return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+class ChartPayloadCache:
+    """Cache de payloads de gráficos sobre um backend plugável (memória ou Redis).
+
+    Os payloads ficam serializados em JSON: o tamanho medido é o que ocupam de fato e
+    cada leitura devolve um objeto novo, que o chamador pode alterar livremente. Com o
+    backend em memória e CACHE_REDIS_URL definido, as invalidações são propagadas aos
+    demais workers por pub/sub.
+    """
+
+    def __init__(self, backend=None) -> None:
+        self.backend = backend or MemoryCacheBackend()
+        self.bus: Optional[InvalidationBus] = None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app, client=None) -> None:
+        self.backend = build_backend(app.config, client)
+        self.bus = None
+        self.hits = self.misses = 0
+        if self.backend.name == CACHE_BACKEND_MEMORY and (client is not None or app.config.get("CACHE_REDIS_URL")):
+            self.bus = InvalidationBus(client if client is not None else redis_client(app.config["CACHE_REDIS_URL"]))
+            self.bus.listen(self.backend.delete_prefix, on_reconnect=self.backend.clear)
+        app.extensions["chart_cache"] = self
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(entry)
+
+    def set(self, key: str, payload: Any) -> None:
+        self.backend.set(key, serialize_payload(payload))
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        removed = self.backend.delete_prefix(prefix)
+        if self.bus is not None:
+            self.bus.publish(prefix)
+        return removed
+
+    def invalidate_workflow(self, workflow_id: int) -> int:
+        return self.invalidate_prefix(workflow_prefix(workflow_id))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.backend.stats()
+        stats.update({"hits": self.hits, "misses": self.misses, "broadcast": self.bus is not None})
+        return stats
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import gzip
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from flask import current_app, has_app_context
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+CODEC_NONE = "none"
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+CODEC_IDS = {CODEC_NONE: b"\x00", CODEC_GZIP: b"\x01", CODEC_ZSTD: b"\x02"}
+FILE_SUFFIXES = {CODEC_NONE: "", CODEC_GZIP: ".gz", CODEC_ZSTD: ".zst"}
+# Valores comprimidos começam com MAGIC + 1 byte do codec; JSON puro nunca começa assim.
+MAGIC = b"DBZ"
+HEADER_SIZE = len(MAGIC) + 1
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class CompressionError(RuntimeError):
+    """Valor comprimido com codec desconhecido ou indisponível."""
+
+
+def resolve_codec(requested: Optional[str]) -> str:
+    codec = (requested or CODEC_ZSTD).strip().lower()
+    if codec not in CODEC_IDS:
+        codec = CODEC_ZSTD
+    if codec == CODEC_ZSTD and zstandard is None:
+        return CODEC_GZIP
+    return codec
+
+
+def configured_codec() -> str:
+    requested = current_app.config.get("STORAGE_COMPRESSION") if has_app_context() else None
+    return resolve_codec(requested)
+
+
+def compress_bytes(data: bytes, codec: Optional[str] = None) -> bytes:
+    codec = codec or configured_codec()
+    if codec == CODEC_ZSTD:
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif codec == CODEC_GZIP:
+        body = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        body = data
+    return MAGIC + CODEC_IDS[codec] + body
+
+
+def decompress_bytes(data: bytes) -> bytes:
+    if not data.startswith(MAGIC):
+        # Valor gravado antes da compressão: devolve como está.
+        return data
+
+    codec_id, body = data[len(MAGIC):HEADER_SIZE], data[HEADER_SIZE:]
+    if codec_id == CODEC_IDS[CODEC_ZSTD]:
+        if zstandard is None:
+            raise CompressionError("O pacote 'zstandard' é necessário para ler dados comprimidos com zstd.")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if codec_id == CODEC_IDS[CODEC_GZIP]:
+        return gzip.decompress(body)
+    if codec_id == CODEC_IDS[CODEC_NONE]:
+        return body
+    raise CompressionError("Codec de compressão desconhecido.")
+
+
+def dumps_compressed(value: Any, codec: Optional[str] = None) -> bytes:
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return compress_bytes(text.encode("utf-8"), codec)
+
+
+def loads_compressed(data: Union[bytes, str]) -> Any:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return json.loads(decompress_bytes(bytes(data)))
+
+
+def compressed_suffix(codec: Optional[str] = None) -> str:
+    return FILE_SUFFIXES[codec or configured_codec()]
+
+
+def compress_file(source: Path, destination: Path, codec: Optional[str] = None) -> None:
+    """Comprime source em destination por streaming, no formato padrão de .zst/.gz."""
+    codec = codec or configured_codec()
+    with open(source, "rb") as reader, open(destination, "wb") as writer:
+        if codec == CODEC_ZSTD:
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(reader, writer)
+        elif codec == CODEC_GZIP:
+            with gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as compressed:
+                shutil.copyfileobj(reader, compressed, COPY_BLOCK_SIZE)
+        else:
+            shutil.copyfileobj(reader, writer, COPY_BLOCK_SIZE)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from flask import Flask
+from sqlalchemy.orm import defer
+
+from app.extensions import db
+from app.models.dashboard_snapshot import DashboardSnapshot
+
+SnapshotBuilder = Callable[[int], None]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending: Set[int] = set()
+
+
+def find_snapshot(workflow_id: int, with_content: bool = True) -> Optional[DashboardSnapshot]:
+    query = DashboardSnapshot.query.filter_by(workflow_id=workflow_id)
+    if not with_content:
+        query = query.options(defer(DashboardSnapshot.conteudo))
+    return query.first()
+
+
+def is_published(workflow_id: int) -> bool:
+    return db.session.query(DashboardSnapshot.id).filter_by(workflow_id=workflow_id).first() is not None
+
+
+def is_current(snapshot: DashboardSnapshot, versao_dados: Optional[int]) -> bool:
+    # versao_dados fica nula até a primeira montagem do conteúdo.
+    return snapshot.versao_dados is not None and snapshot.versao_dados == (versao_dados or 0)
+
+
+def store_snapshot(snapshot: DashboardSnapshot, versao_dados: int, conteudo: Dict[str, Any]) -> None:
+    snapshot.versao_dados = versao_dados
+    snapshot.conteudo = conteudo
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Uma thread basta: as reconstruções são curtas e pedidos repetidos são agrupados.
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard-snapshot")
+        return _executor
+
+
+def _run(app: Flask, workflow_id: int, builder: SnapshotBuilder) -> None:
+    with _executor_lock:
+        # Alterações feitas durante a reconstrução agendam uma nova rodada.
+        _pending.discard(workflow_id)
+    with app.app_context():
+        try:
+            builder(workflow_id)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Falha ao atualizar o snapshot do workflow %s.", workflow_id)
+
+
+def schedule_refresh(app: Flask, workflow_id: int, builder: SnapshotBuilder) -> None:
+    """Reconstrói o snapshot de um workflow publicado depois de uma alteração já gravada.
+
+    Com DASHBOARD_SNAPSHOT_ASYNC desligado a reconstrução roda na própria requisição.
+    """
+    if not is_published(workflow_id):
+        return
+    if not app.config.get("DASHBOARD_SNAPSHOT_ASYNC", True):
+        builder(workflow_id)
+        return
+    with _executor_lock:
+        if workflow_id in _pending:
+            return
+        _pending.add(workflow_id)
+    _get_executor().submit(_run, app, workflow_id, builder)
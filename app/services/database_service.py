@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_YIELD_PER = 1000
+
+
+def large_read_options() -> Dict[str, Any]:
+    """execution_options para consultas que podem devolver muitas linhas.
+
+    Com DB_STREAM_RESULTS, o MySQL usa cursor no servidor e as linhas chegam em lotes de
+    DB_STREAM_YIELD_PER, sem montar o resultado inteiro na memória do driver. O resultado
+    precisa ser consumido por completo antes da próxima consulta na mesma sessão.
+    """
+    if not has_app_context() or not current_app.config.get("DB_STREAM_RESULTS"):
+        return {}
+    return {
+        "stream_results": True,
+        "yield_per": int(current_app.config.get("DB_STREAM_YIELD_PER") or DEFAULT_YIELD_PER),
+    }
+
+
+class PoolMetrics:
+    """Contadores do pool de conexões do engine, expostos em /api/diagnostico.
+
+    invalidadas conta conexões descartadas (inclusive as que falharam no pre-ping);
+    tempo_conexao_ms mede a abertura de conexões novas, o custo pago pela primeira
+    requisição depois de um período parado.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.conexoes_abertas = 0
+            self.checkouts = 0
+            self.invalidadas = 0
+            self.tempo_conexao_ms = 0.0
+            self.ultima_conexao_ms: Optional[float] = None
+
+    def init_app(self, app, engine: Engine) -> None:
+        self._engine = engine
+        self.reset()
+        event.listen(engine, "do_connect", self._on_do_connect)
+        event.listen(engine.pool, "connect", self._on_connect)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+        event.listen(engine.pool, "soft_invalidate", self._on_invalidate)
+        app.extensions["pool_metrics"] = self
+
+    def _on_do_connect(self, dialect, conn_rec, cargs, cparams) -> None:
+        conn_rec.info["conectando_desde"] = time.perf_counter()
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("conectando_desde", None)
+        elapsed = (time.perf_counter() - started) * 1000 if started is not None else None
+        with self._lock:
+            self.conexoes_abertas += 1
+            if elapsed is not None:
+                self.tempo_conexao_ms += elapsed
+                self.ultima_conexao_ms = elapsed
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidadas += 1
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "conexoes_abertas": self.conexoes_abertas,
+                "checkouts": self.checkouts,
+                "invalidadas": self.invalidadas,
+                "tempo_medio_conexao_ms": (
+                    round(self.tempo_conexao_ms / self.conexoes_abertas, 2) if self.conexoes_abertas else None
+                ),
+                "ultima_conexao_ms": round(self.ultima_conexao_ms, 2) if self.ultima_conexao_ms is not None else None,
+            }
+        if pool is None:
+            return stats
+
+        stats["classe"] = type(pool).__name__
+        # QueuePool informa ocupação; pools do SQLite não têm esses contadores.
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            reader = getattr(pool, name, None)
+            if callable(reader):
+                stats[name] = reader()
+        stats["status"] = pool.status()
+        return stats
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from flask import current_app, has_app_context
+
+DEFAULT_WORKERS = 2
+DEFAULT_CSV_MIN_BYTES = 20 * 1024 * 1024
+# spawn evita herdar threads e conexões abertas do worker web no processo filho.
+DEFAULT_START_METHOD = "spawn"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    if not has_app_context():
+        return 0
+    return int(current_app.config.get("PARSE_POOL_WORKERS", DEFAULT_WORKERS) or 0)
+
+
+def should_offload(path: Path, extension: str) -> bool:
+    """XLSX sempre vai para o pool; CSV só a partir de PARSE_POOL_CSV_MIN_BYTES."""
+    if pool_size() <= 0:
+        return False
+    if extension == ".xlsx":
+        return True
+    threshold = int(current_app.config.get("PARSE_POOL_CSV_MIN_BYTES", DEFAULT_CSV_MIN_BYTES))
+    return path.stat().st_size >= threshold
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = current_app.config.get("PARSE_POOL_START_METHOD") or DEFAULT_START_METHOD
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context(method),
+            )
+        return _pool
+
+
+def _discard_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def run_in_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """Executa func em um processo do pool e espera o resultado (exceções são repassadas)."""
+    try:
+        return _get_pool().submit(func, *args).result()
+    except BrokenProcessPool:
+        # Um filho morreu (ex.: falta de memória): o próximo upload recria o pool.
+        _discard_pool()
+        raise
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from flask import Flask
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models.upload_job import UploadJob
+
+DEFAULT_WORKERS = 2
+PROGRESS_STARTED = 5
+PROGRESS_PARSING = 50
+PROGRESS_SAVING = 90
+DEFAULT_TIMEOUT_MINUTES = 15
+HEARTBEAT_SECONDS = 60
+GENERIC_ERROR = "Erro interno ao processar o arquivo."
+STALE_ERROR = "O processamento foi interrompido antes de terminar. Envie o arquivo novamente."
+
+JobHandler = Callable[[UploadJob, Callable[[int], None]], Dict[str, Any]]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app: Flask) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(app.config.get("UPLOAD_JOB_WORKERS") or DEFAULT_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="upload-job")
+        return _executor
+
+
+def _finish(job: UploadJob, status: str, **fields: Any) -> None:
+    # O arquivo temporário já virou blob ou foi descartado pelo handler.
+    job.status = status
+    job.caminho_temporario = None
+    job.finalizado_em = datetime.utcnow()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    db.session.commit()
+
+
+def _timeout(app: Flask) -> timedelta:
+    return timedelta(minutes=int(app.config.get("UPLOAD_JOB_TIMEOUT_MINUTES") or DEFAULT_TIMEOUT_MINUTES))
+
+
+def is_stale(app: Flask, job: UploadJob, now: Optional[datetime] = None) -> bool:
+    """Job não finalizado sem progresso há mais de UPLOAD_JOB_TIMEOUT_MINUTES.
+
+    Os jobs rodam em threads do próprio worker: se o processo reinicia, nada mais os
+    retoma e, sem isso, a tela que acompanha o progresso esperaria para sempre. Enquanto o
+    handler roda, _heartbeat mantém updated_at recente, então só jobs sem processo vivo expiram.
+    """
+    if job.finalizado:
+        return False
+    last_activity = job.updated_at or job.created_at
+    if last_activity is None:
+        return False
+    return (now or datetime.utcnow()) - last_activity > _timeout(app)
+
+
+def expire_job(job: UploadJob) -> None:
+    if job.caminho_temporario:
+        Path(job.caminho_temporario).unlink(missing_ok=True)
+    _finish(job, UploadJob.STATUS_ERRO, erro=STALE_ERROR)
+
+
+def expire_stale_jobs(app: Flask) -> int:
+    """Marca como erro os jobs abandonados; chamado na inicialização de cada worker."""
+    cutoff = datetime.utcnow() - _timeout(app)
+    try:
+        jobs = UploadJob.query.filter(
+            UploadJob.status.in_([UploadJob.STATUS_PENDENTE, UploadJob.STATUS_PROCESSANDO]),
+            UploadJob.updated_at < cutoff,
+        ).all()
+        for job in jobs:
+            expire_job(job)
+    except SQLAlchemyError:
+        # Banco ainda sem a tabela (ex.: antes de aplicar as migrações).
+        db.session.rollback()
+        app.logger.warning("Não foi possível verificar jobs de upload abandonados.")
+        return 0
+    return len(jobs)
+
+
+def _heartbeat(app: Flask, job_id: int, stop: threading.Event) -> None:
+    """Renova updated_at até stop, inclusive em etapas sem progresso (ex.: parse no pool de processos)."""
+    interval = min(HEARTBEAT_SECONDS, _timeout(app).total_seconds() / 3)
+    with app.app_context():
+        while not stop.wait(interval):
+            try:
+                db.session.execute(
+                    update(UploadJob)
+                    .where(
+                        UploadJob.id == job_id,
+                        UploadJob.status.in_([UploadJob.STATUS_PENDENTE, UploadJob.STATUS_PROCESSANDO]),
+                    )
+                    .values(updated_at=datetime.utcnow())
+                )
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                app.logger.warning("Não foi possível renovar o job de upload %s.", job_id)
+
+
+def _run(app: Flask, job_id: int, handler: JobHandler, expected_errors: Tuple[Type[Exception], ...]) -> None:
+    with app.app_context():
+        job = db.session.get(UploadJob, job_id)
+        if job is None or job.finalizado:
+            # Expirado enquanto esperava na fila: o arquivo temporário já foi descartado.
+            return
+        job.status = UploadJob.STATUS_PROCESSANDO
+        job.progresso = PROGRESS_STARTED
+        db.session.commit()
+
+        def report(linhas: int) -> None:
+            job.linhas_processadas = linhas
+            job.progresso = PROGRESS_PARSING
+            db.session.commit()
+
+        stop = threading.Event()
+        threading.Thread(
+            target=_heartbeat, args=(app, job_id, stop), name=f"upload-job-{job_id}-heartbeat", daemon=True
+        ).start()
+        try:
+            resultado = handler(job, report)
+        except expected_errors as exc:
+            db.session.rollback()
+            _finish(job, UploadJob.STATUS_ERRO, erro=str(exc))
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Falha ao processar o job de upload %s.", job_id)
+            _finish(job, UploadJob.STATUS_ERRO, erro=GENERIC_ERROR)
+        else:
+            _finish(
+                job,
+                UploadJob.STATUS_CONCLUIDO,
+                progresso=100,
+                resultado=resultado,
+            )
+        finally:
+            stop.set()
+
+
+def submit_job(
+    app: Flask,
+    job: UploadJob,
+    handler: JobHandler,
+    expected_errors: Tuple[Type[Exception], ...] = (),
+) -> Future:
+    """Enfileira o processamento de um upload já gravado em disco no pool local de threads."""
+    return _get_executor(app).submit(_run, app, job.id, handler, expected_errors)
+
+
+def mark_saving(job: UploadJob) -> None:
+    job.progresso = PROGRESS_SAVING
+    db.session.commit()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from werkzeug.datastructures import FileStorage
+
+SPOOL_SUFFIX = ".part"
+READ_BLOCK_SIZE = 1024 * 1024
+CSV_CHUNK_ROWS = 20_000
+SNIFF_BYTES = 64 * 1024
+
+
+def spool_upload(file: FileStorage, destination: Path) -> Tuple[Path, str]:
+    """Grava o corpo do upload em disco em blocos e devolve o caminho parcial e o SHA-256."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    # Mantém a extensão no final: o openpyxl recusa caminhos com sufixo desconhecido.
+    partial = destination.with_name(f"{destination.stem}{SPOOL_SUFFIX}{destination.suffix}")
+    digest = hashlib.sha256()
+    file.stream.seek(0)
+    with open(partial, "wb") as handle:
+        for block in iter(lambda: file.stream.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+            handle.write(block)
+    return partial, digest.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def discard_on_error(partial: Path) -> Iterator[Path]:
+    """Apaga o arquivo temporário se o processamento falhar."""
+    try:
+        yield partial
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+
+def detect_text_encoding(path: Path) -> str:
+    """UTF-8 (com ou sem BOM) quando os primeiros SNIFF_BYTES decodificam, senão latin-1."""
+    with open(path, "rb") as handle:
+        prefix = handle.read(SNIFF_BYTES)
+        at_end = not handle.read(1)
+    try:
+        # Fora do fim do arquivo, um caractere multibyte cortado no limite do prefixo
+        # fica pendente no decoder em vez de contar como erro.
+        codecs.getincrementaldecoder("utf-8-sig")().decode(prefix, final=at_end)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8-sig"
+
+
+def sniff_delimiter(path: Path, encoding: str) -> Optional[str]:
+    """Delimitador do cabeçalho, com a mesma heurística do sep=None do pandas."""
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as handle:
+        header = handle.readline(SNIFF_BYTES)
+    try:
+        return csv.Sniffer().sniff(header).delimiter
+    except csv.Error:
+        return None
+
+
+def detect_csv_dialect(path: Path) -> Dict[str, Any]:
+    """Codificação e delimitador do CSV, detectados uma vez e guardados com o upload."""
+    encoding = detect_text_encoding(path)
+    delimiter = sniff_delimiter(path, encoding)
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        # Sem delimitador detectado, o parser em Python tenta de novo por conta própria.
+        "engine": "c" if delimiter else "python",
+    }
+
+
+def csv_read_options(dialect: Dict[str, Any]) -> Dict[str, Any]:
+    # A codificação vem só do início do arquivo: um byte inválido mais adiante vira U+FFFD.
+    options = {"encoding": dialect["encoding"], "encoding_errors": "replace"}
+    if dialect.get("delimiter"):
+        return {"sep": dialect["delimiter"], "engine": "c", **options}
+    return {"sep": None, "engine": "python", **options}
+
+
+def cell_text(value: Any) -> str:
+    """Texto de uma célula do openpyxl no mesmo formato que pd.read_excel(dtype=str)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def unique_headers(values: Sequence[Any]) -> List[str]:
+    """Cabeçalhos no padrão do pandas: vazios viram 'Unnamed: N' e repetidos ganham sufixo."""
+    headers: List[str] = []
+    seen: dict = {}
+    for position, value in enumerate(values):
+        header = cell_text(value) or f"Unnamed: {position}"
+        if header in seen:
+            seen[header] += 1
+            candidate = f"{header}.{seen[header]}"
+            while candidate in seen:
+                seen[header] += 1
+                candidate = f"{header}.{seen[header]}"
+            header = candidate
+        seen.setdefault(header, 0)
+        headers.append(header)
+    return headers
+
+
+def iter_xlsx_rows(path: Path) -> Iterator[List[Any]]:
+    """Percorre a primeira planilha linha a linha em modo somente leitura."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        for row in worksheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
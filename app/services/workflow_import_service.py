@@ -1,19 +1,24 @@
-﻿import io
+﻿import re
 import unicodedata
-from datetime import datetime
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 
+from app.services.parse_pool_service import run_in_pool, should_offload
+from app.services.upload_stream_service import csv_read_options, detect_csv_dialect
+
 
 class ImportacaoArquivoErro(Exception):
     """Erro controlado para importacao de arquivos de workflow."""
 
 
 ALLOWED_EXTENSIONS = {'.csv', '.xlsx'}
+PERIODO_PATTERN = re.compile(r'^(\d{4})-(\d{2})(?:-\d{2})?$')
 
 
 def _normalize_header(value: Any) -> str:
@@ -36,21 +41,11 @@ def _normalize_header(value: Any) -> str:
     return '_'.join(sanitized.split())
 
 
-def _decode_csv_bytes(data: bytes) -> io.StringIO:
-    try:
-        text = data.decode('utf-8-sig')
-    except UnicodeDecodeError:
-        text = data.decode('latin-1')
-    return io.StringIO(text)
-
-
-def _load_dataframe(file_bytes: bytes, extension: str) -> pd.DataFrame:
+def _load_dataframe(path: Path, extension: str, dialect: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
     if extension == '.csv':
-        buffer = _decode_csv_bytes(file_bytes)
-        df = pd.read_csv(buffer, sep=None, engine='python')
+        df = pd.read_csv(path, **csv_read_options(dialect or detect_csv_dialect(path)))
     else:
-        buffer = io.BytesIO(file_bytes)
-        df = pd.read_excel(buffer, engine='openpyxl')
+        df = pd.read_excel(path, engine='openpyxl')
     return df
 
 
@@ -85,6 +80,11 @@ def _convert_numeric(series: pd.Series) -> pd.Series:
     return pd.to_numeric(cleaned, errors='coerce')
 
 
+def _floats_or_none(series: pd.Series) -> List[Optional[float]]:
+    values = series.to_numpy(dtype=float)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
 def _build_payload(df: pd.DataFrame) -> Dict[str, Any]:
     indicador_col = df.columns[0]
     periodo1_col = df.columns[1]
@@ -112,48 +112,45 @@ def _build_payload(df: pd.DataFrame) -> Dict[str, Any]:
         diff_pct_col = df.columns[4]
         df[diff_pct_col] = _convert_numeric(df[diff_pct_col])
 
-    indicadores = []
-    for _, row in df.iterrows():
-        valor1 = row[periodo1_col]
-        valor2 = row[periodo2_col]
-
-        # Diferença absoluta: prioriza valor fornecido no arquivo.
-        if diff_abs_col is not None:
-            diff_abs = row[diff_abs_col]
-        else:
-            diff_abs = None
-            if pd.notna(valor1) and pd.notna(valor2):
-                diff_abs = valor2 - valor1
-            if diff_abs is not None and pd.isna(diff_abs):
-                diff_abs = None
-
-        # Diferença percentual: prioriza valor fornecido no arquivo.
-        if diff_pct_col is not None:
-            diff_pct = row[diff_pct_col]
-        else:
-            if valor1 in [None, 0] or pd.isna(valor1):
-                diff_pct = None
-            elif pd.isna(valor2):
-                diff_pct = None
-            else:
-                diff_pct = ((valor2 - valor1) / valor1) * 100
-
-        tendencia = 'flat'
-        if diff_abs is not None:
-            if diff_abs > 0:
-                tendencia = 'up'
-            elif diff_abs < 0:
-                tendencia = 'down'
-
-        indicadores.append({
-            'indicador': row[indicador_col],
-            'valor_periodo_1': None if pd.isna(valor1) else float(valor1),
-            'valor_periodo_2': None if pd.isna(valor2) else float(valor2),
-            'diferenca_absoluta': None if diff_abs is None else float(diff_abs),
-            'diferenca_percentual': None if diff_pct is None or pd.isna(diff_pct) else float(diff_pct),
+    valor1 = df[periodo1_col].astype(float)
+    valor2 = df[periodo2_col].astype(float)
+
+    # Diferença absoluta: prioriza valor fornecido no arquivo.
+    if diff_abs_col is not None:
+        diff_abs = df[diff_abs_col].astype(float)
+        diff_abs_values = diff_abs.tolist()
+    else:
+        diff_abs = valor2 - valor1
+        diff_abs_values = _floats_or_none(diff_abs)
+
+    # Diferença percentual: prioriza valor fornecido no arquivo.
+    if diff_pct_col is not None:
+        diff_pct = df[diff_pct_col].astype(float)
+    else:
+        computable = valor1.notna() & (valor1 != 0) & valor2.notna()
+        diff_pct = (((valor2 - valor1) / valor1) * 100).where(computable)
+
+    tendencias = np.select([diff_abs > 0, diff_abs < 0], ['up', 'down'], default='flat').tolist()
+
+    indicadores = [
+        {
+            'indicador': indicador,
+            'valor_periodo_1': periodo_1,
+            'valor_periodo_2': periodo_2,
+            'diferenca_absoluta': diferenca_absoluta,
+            'diferenca_percentual': diferenca_percentual,
             'tendencia': tendencia,
             'tipo_valor': 'currency'  # Padrão: R$. Pode ser 'currency', 'percentage', 'multiplier'
-        })
+        }
+        for indicador, periodo_1, periodo_2, diferenca_absoluta, diferenca_percentual, tendencia in zip(
+            df[indicador_col].tolist(),
+            _floats_or_none(valor1),
+            _floats_or_none(valor2),
+            diff_abs_values,
+            _floats_or_none(diff_pct),
+            tendencias,
+        )
+    ]
 
     return {
         'periodo_1_label': periodo1_label,
@@ -163,7 +160,8 @@ def _build_payload(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def process_workflow_upload(file: FileStorage, workflow_id: int, upload_root: Path) -> Dict[str, Any]:
+def validate_upload(file: FileStorage) -> Tuple[str, str]:
+    """Valida o arquivo e devolve a extensão e o nome seguro do upload."""
     if not file or not file.filename:
         raise ImportacaoArquivoErro('Nenhum arquivo foi enviado.')
 
@@ -171,30 +169,42 @@ def process_workflow_upload(file: FileStorage, workflow_id: int, upload_root: Pa
     if extension not in ALLOWED_EXTENSIONS:
         raise ImportacaoArquivoErro('Formato invalido. Utilize arquivos CSV ou XLSX.')
 
-    safe_name = secure_filename(file.filename)
-    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-    stored_name = f"{workflow_id}_{timestamp}_{safe_name}"
+    return extension, secure_filename(file.filename)
 
-    upload_root.mkdir(parents=True, exist_ok=True)
 
-    file.stream.seek(0)
-    file_bytes = file.stream.read()
+def parse_periodo(value: Any) -> Optional[date]:
+    """Converte 'AAAA-MM' (ou uma data 'AAAA-MM-DD') no primeiro dia do mês de referência."""
+    text = str(value or '').strip()
+    if not text:
+        return None
+
+    match = PERIODO_PATTERN.match(text)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ImportacaoArquivoErro('Período inválido. Use o formato AAAA-MM.')
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def format_periodo(value: Optional[date]) -> Optional[str]:
+    return value.strftime('%Y-%m') if value else None
+
 
+def parse_workflow_file(path: Path, extension: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    if should_offload(path, extension):
+        # O payload do balancete é pequeno; volta pronto do processo filho.
+        return run_in_pool(_parse_workflow_file, str(path), extension)
+    return _parse_workflow_file(str(path), extension)
+
+
+def _parse_workflow_file(path: str, extension: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    source = Path(path)
     try:
-        dataframe = _load_dataframe(file_bytes, extension)
+        dialect = detect_csv_dialect(source) if extension == '.csv' else None
+        dataframe = _load_dataframe(source, extension, dialect)
         dataframe = _sanitize_dataframe(dataframe)
         payload = _build_payload(dataframe)
     except ImportacaoArquivoErro:
         raise
     except Exception as exc:
         raise ImportacaoArquivoErro('Falha ao processar o arquivo. Confirme o layout e tente novamente.') from exc
+    return payload, dialect
 
-    destino = upload_root / stored_name
-    with open(destino, 'wb') as output_file:
-        output_file.write(file_bytes)
-
-    return {
-        'arquivo_salvo': destino,
-        'nome_arquivo': safe_name,
-        'payload': payload
-    }
\ No newline at end of file
@@ -52,6 +52,9 @@
     }
 })();
 
+// Respostas GET com ETag: a próxima requisição é condicional e um 304 reaproveita o corpo.
+const conditionalCache = new Map();
+
 async function apiRequest(url, method = 'GET', body = null) {
     const config = {
         method: method,
@@ -65,7 +68,16 @@ async function apiRequest(url, method = 'GET', body = null) {
         config.body = JSON.stringify(body);
     }
 
+    const isGet = method.toUpperCase() === 'GET';
+    const cached = isGet ? conditionalCache.get(url) : null;
+    if (cached) {
+        config.headers['If-None-Match'] = cached.etag;
+    }
+
     const response = await fetch(url, config);
+    if (response.status === 304 && cached) {
+        return structuredClone(cached.data);
+    }
     if (!response.ok) {
         const data = await response.json().catch(() => ({}));
         const message = data.error || data.message || `Erro ${response.status}`;
@@ -74,7 +86,14 @@ async function apiRequest(url, method = 'GET', body = null) {
     if (response.status === 204) {
         return null;
     }
-    return response.json().catch(() => ({}));
+    const data = await response.json().catch(() => ({}));
+    const etag = response.headers.get('ETag');
+    if (isGet && etag) {
+        conditionalCache.set(url, { etag, data: structuredClone(data) });
+    } else if (!isGet) {
+        conditionalCache.clear();
+    }
+    return data;
 }
 
 function formatCurrency(value) {
@@ -5,6 +5,8 @@
     }
 
     const READ_ONLY = !!window.__READ_ONLY__;
+    // Dashboard publicado: os gráficos já vêm calculados na página (somente leitura).
+    const SNAPSHOT_CHARTS = READ_ONLY && Array.isArray(window.__SNAPSHOT_CHARTS__) ? window.__SNAPSHOT_CHARTS__ : null;
     const ChartJs = window.Chart;
 
     if (ChartJs && ChartJs.register && window.ChartDataLabels) {
@@ -180,11 +182,13 @@
 
     const STACKABLE_TYPES = new Set(['bar', 'bar-horizontal', 'area']);
     const DATA_LABEL_TYPES = new Set(['bar', 'bar-horizontal', 'line', 'area', 'pie', 'donut']);
+    const ROW_PREVIEW_LIMIT = 20;
 
     const datasetSummary = document.getElementById('datasetSummary');
     const chartGrid = document.getElementById('chartGrid');
     const refreshButton = document.getElementById('refreshCharts');
     const openModalButton = document.getElementById('openChartModal');
+    const publicationButton = document.getElementById('togglePublication');
 
     const chartModal = document.getElementById('chartModal');
     const chartModalTitle = document.getElementById('chartModalTitle');
@@ -217,6 +221,8 @@
     const chartOptionYMin = document.getElementById('chartOptionYMin');
     const chartOptionYMax = document.getElementById('chartOptionYMax');
     const chartOptionYStep = document.getElementById('chartOptionYStep');
+    const chartAggregationSelect = document.getElementById('chartAggregationSelect');
+    const chartAggregationTopN = document.getElementById('chartAggregationTopN');
     const yAxisConfigContainer = document.getElementById('yAxisConfigContainer');
 
     // Modal de confirmação de exclusão
@@ -230,6 +236,7 @@
 
     const state = {
         workflowType: workflow.tipo,
+        versao: workflow.versao_dados ?? 0,
         dataset: null,
         charts: [],
         categories: [],
@@ -237,6 +244,7 @@
         chartInstances: new Map(),
         previewInstance: null,
         loading: false,
+        published: false,
         modal: createEmptyModalState(),
     };
 
@@ -264,7 +272,7 @@
         let html = '';
         const dot = (color) => `<span class="inline-block w-2 h-2 rounded-full ${color}"></span>`;
         if (state.workflowType === 'balancete') {
-            if (state.dataset && (state.dataset.records || state.dataset.indicator_options)) {
+            if (state.dataset && (state.dataset.records || state.dataset.indicator_options || state.dataset.total_indicadores)) {
                 const totalIndicadores = state.dataset.total_indicadores || (state.dataset.records?.length || 0);
                 const periodo1 = state.dataset.period_labels?.periodo_1 || 'Periodo 1';
                 const periodo2 = state.dataset.period_labels?.periodo_2 || 'Periodo 2';
@@ -282,7 +290,7 @@
                 const rows = state.categories.map(cat => {
                     const hasData = state.categoryDatasets.has(cat.slug);
                     const dataset = state.categoryDatasets.get(cat.slug);
-                    const rowCount = dataset?.records?.length || 0;
+                    const rowCount = dataset?.totals?.visiveis ?? dataset?.records?.length ?? 0;
                     const colCount = dataset?.fields?.length || 0;
                     const color = hasData ? 'bg-green-400' : 'bg-gray-500';
                     return `<div class="flex items-center gap-3 text-sm">${dot(color)} <span class="font-medium">${cat.nome || cat.label}</span> ${hasData ? `<span class=\"opacity-60\">(${rowCount} linhas, ${colCount} colunas)</span>` : '<span class=\"opacity-60\">(sem dados)</span>'}</div>`;
@@ -302,8 +310,12 @@
     async function init() {
         populateChartTypeChoices();
         bindBaseEvents();
-        await loadData();
-        await loadCharts();
+        if (SNAPSHOT_CHARTS) {
+            applySnapshot();
+        } else {
+            await loadData();
+            await loadCharts();
+        }
         renderDatasetSummarySafe();
         renderChartGrid();
         updateModalAvailability();
@@ -312,6 +324,10 @@
     function bindBaseEvents() {
         if (refreshButton) refreshButton.addEventListener('click', () => loadData());
         if (openModalButton) openModalButton.addEventListener('click', () => openModal('create'));
+        if (publicationButton && !READ_ONLY) {
+            publicationButton.addEventListener('click', () => togglePublication());
+            loadPublication();
+        }
         if (chartModal) {
             chartModal.addEventListener('click', (event) => {
                 if (event.target === chartModal) closeModal();
@@ -366,6 +382,17 @@
                 if (state.modal.step === 3) renderPreview();
             });
         }
+        if (chartAggregationSelect) {
+            chartAggregationSelect.addEventListener('change', (event) => {
+                state.modal.config.aggregation.function = event.target.value;
+            });
+        }
+        if (chartAggregationTopN) {
+            chartAggregationTopN.addEventListener('input', (event) => {
+                const value = parseInt(event.target.value, 10);
+                state.modal.config.aggregation.topN = Number.isInteger(value) && value > 0 ? value : null;
+            });
+        }
         if (chartTypeChoices) chartTypeChoices.addEventListener('click', (event) => handleChartTypeChoice(event));
         if (indicatorOptionsContainer) indicatorOptionsContainer.addEventListener('change', (event) => handleIndicatorToggle(event));
         if (metricOptionsContainer) {
@@ -414,6 +441,46 @@
         }
     }
 
+    const publicationUrl = `/api/workflows/${workflow.id}/dashboards/publicacao`;
+
+    function renderPublication(status) {
+        if (!publicationButton) return;
+        state.published = !!status?.publicado;
+        const label = publicationButton.querySelector('[data-publication-label]');
+        if (label) label.textContent = state.published ? 'Remover publicação' : 'Publicar visualização';
+    }
+
+    async function loadPublication() {
+        try {
+            renderPublication(await apiRequest(publicationUrl, 'GET'));
+        } catch (error) {
+            console.error('Erro ao consultar publicação:', error);
+        }
+    }
+
+    async function togglePublication() {
+        publicationButton.disabled = true;
+        try {
+            const response = await apiRequest(publicationUrl, state.published ? 'DELETE' : 'POST');
+            renderPublication(response);
+        } catch (error) {
+            alert(error.message);
+        } finally {
+            publicationButton.disabled = false;
+        }
+    }
+
+    function applySnapshot() {
+        state.charts = normalizeCharts(SNAPSHOT_CHARTS);
+        if (state.workflowType === 'balancete') {
+            state.dataset = workflow.balancete?.upload || null;
+        } else if (state.workflowType === 'analise_jp') {
+            (workflow.analise_jp?.categories || []).forEach(cat => {
+                if (cat.upload) state.categoryDatasets.set(cat.slug, cat.upload);
+            });
+        }
+    }
+
     async function loadData() {
         if (state.loading) return;
         state.loading = true;
@@ -436,7 +503,8 @@
                 for (const category of state.categories) {
                     if (!state.categoryDatasets.has(category.slug)) {
                         try {
-                            const response = await apiRequest(`/api/workflows/${workflow.id}/analise-jp/dataset/${category.slug}`, 'GET');
+                            // O editor só precisa das colunas, dos totais e das primeiras linhas para seleção.
+                            const response = await apiRequest(`/api/workflows/${workflow.id}/analise-jp/dataset/${category.slug}?limit=${ROW_PREVIEW_LIMIT}`, 'GET');
                             if (response) {
                                 state.categoryDatasets.set(category.slug, response);
                             }
@@ -465,6 +533,7 @@
 
             if (response && response.charts) {
                 state.charts = normalizeCharts(response.charts);
+                if (typeof response.versao === 'number') state.versao = response.versao;
                 console.log('Gráficos carregados:', state.charts.length);
             }
         } catch (error) {
@@ -515,7 +584,7 @@
                         ${state.categories.map(cat => {
                     const hasData = state.categoryDatasets.has(cat.slug);
                     const dataset = state.categoryDatasets.get(cat.slug);
-                    const rowCount = dataset?.records?.length || 0;
+                    const rowCount = dataset?.totals?.visiveis ?? dataset?.records?.length ?? 0;
                     const colCount = dataset?.fields?.length || 0;
 
                     return `
@@ -1192,6 +1261,7 @@
                 dimensions: [],
                 values: [],
                 rows: [],
+                aggregation: { function: '', topN: null },
                 options: {
                     stacked: false,
                     dataLabels: true,
@@ -1204,6 +1274,17 @@
         };
     }
 
+    // Aplica localmente a resposta de uma alteração quando nenhuma outra mudança aconteceu
+    // desde a última sincronização; caso contrário, recarrega a lista inteira.
+    async function syncCharts(response, applyDelta) {
+        if (typeof response?.versao === 'number' && response.versao === state.versao + 1) {
+            applyDelta();
+            state.versao = response.versao;
+            return;
+        }
+        await loadCharts();
+    }
+
     function normalizeCharts(charts) {
         return charts.map(chartItem => {
             // Backend retorna: { chart: {...}, data: {...} }
@@ -1259,6 +1340,10 @@
                 dimensions: [...(chartConfig.dimensoes || chartConfig.dimensions || [])],
                 values: chartConfig.metricas && state.workflowType === 'analise_jp' ? JSON.parse(JSON.stringify(chartConfig.metricas)) : [],
                 rows: [...((chartConfig.options?.row_indices) || [])],
+                aggregation: {
+                    function: chartConfig.options?.aggregation?.function || '',
+                    topN: chartConfig.options?.aggregation?.top_n || null
+                },
                 options: {
                     stacked: chartConfig.options?.stacked || false,
                     dataLabels: chartConfig.options?.dataLabels !== false,
@@ -1333,6 +1418,8 @@
             if (chartOptionYMin) chartOptionYMin.value = state.modal.config.options.yMin !== null && state.modal.config.options.yMin !== undefined ? state.modal.config.options.yMin : '';
             if (chartOptionYMax) chartOptionYMax.value = state.modal.config.options.yMax !== null && state.modal.config.options.yMax !== undefined ? state.modal.config.options.yMax : '';
             if (chartOptionYStep) chartOptionYStep.value = state.modal.config.options.yStep !== null && state.modal.config.options.yStep !== undefined ? state.modal.config.options.yStep : '';
+            if (chartAggregationSelect) chartAggregationSelect.value = state.modal.config.aggregation?.function || '';
+            if (chartAggregationTopN) chartAggregationTopN.value = state.modal.config.aggregation?.topN || '';
 
             // Ocultar campos de eixo Y (removidos da interface)
             if (yAxisConfigContainer) {
@@ -1585,7 +1672,7 @@
 
         // Renderizar linhas disponíveis
         if (rowOptionsContainer) {
-            rowOptionsContainer.innerHTML = dataset.records.slice(0, 20).map((record, index) => {
+            rowOptionsContainer.innerHTML = dataset.records.slice(0, ROW_PREVIEW_LIMIT).map((record, index) => {
                 const label = Object.values(record).slice(0, 2).join(' - ');
                 return `
                     <label class="inline-flex items-center gap-2 px-2 py-1 rounded border border-white/20 hover:bg-white/5 cursor-pointer">
@@ -1594,8 +1681,9 @@
                     </label>
                 `;
             }).join('');
-            if (dataset.records.length > 20) {
-                rowOptionsContainer.innerHTML += `<p class="text-xs opacity-60 mt-2">Mostrando 20 de ${dataset.records.length} linhas</p>`;
+            const totalRows = dataset.totals?.visiveis ?? dataset.records.length;
+            if (totalRows > ROW_PREVIEW_LIMIT) {
+                rowOptionsContainer.innerHTML += `<p class="text-xs opacity-60 mt-2">Mostrando ${ROW_PREVIEW_LIMIT} de ${totalRows} linhas</p>`;
             }
         }
     }
@@ -2221,6 +2309,13 @@
                 if (state.modal.config.rows && state.modal.config.rows.length > 0) {
                     payload.options.row_indices = state.modal.config.rows;
                 }
+                const aggregation = state.modal.config.aggregation || {};
+                if (aggregation.function) {
+                    payload.options.aggregation = { function: aggregation.function };
+                    if (aggregation.topN) payload.options.aggregation.top_n = aggregation.topN;
+                } else {
+                    delete payload.options.aggregation;
+                }
             }
 
             console.log('Payload a ser enviado:', payload);
@@ -2262,15 +2357,15 @@
 
             if (response) {
                 console.log('Gráfico salvo com sucesso!');
-                // Recarregar lista de gráficos
-                const chartsEndpoint = state.workflowType === 'balancete'
-                    ? `/api/workflows/${workflow.id}/balancete/charts`
-                    : `/api/workflows/${workflow.id}/analise-jp/charts`;
-
-                const chartsResponse = await apiRequest(chartsEndpoint, 'GET');
-                if (chartsResponse && chartsResponse.charts) {
-                    state.charts = normalizeCharts(chartsResponse.charts);
-                }
+                const editIndex = state.modal.mode === 'edit' ? state.modal.editIndex : null;
+                await syncCharts(response, () => {
+                    const [savedChart] = normalizeCharts([response.chart]);
+                    if (editIndex === null) {
+                        state.charts.push(savedChart);
+                    } else {
+                        state.charts[editIndex] = savedChart;
+                    }
+                });
 
                 renderChartGrid();
                 closeModal();
@@ -2346,19 +2441,12 @@
 
             console.log('Endpoint de exclusão:', endpoint);
 
-            await apiRequest(endpoint, 'DELETE');
+            const response = await apiRequest(endpoint, 'DELETE');
 
             console.log('Gráfico excluído com sucesso!');
-
-            // Recarregar lista de gráficos
-            const chartsEndpoint = state.workflowType === 'balancete'
-                ? `/api/workflows/${workflow.id}/balancete/charts`
-                : `/api/workflows/${workflow.id}/analise-jp/charts`;
-
-            const chartsResponse = await apiRequest(chartsEndpoint, 'GET');
-            if (chartsResponse && chartsResponse.charts) {
-                state.charts = normalizeCharts(chartsResponse.charts);
-            }
+            await syncCharts(response, () => {
+                state.charts.splice(index, 1);
+            });
 
             renderChartGrid();
         } catch (error) {
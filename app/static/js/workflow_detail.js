@@ -5,9 +5,13 @@
     const { apiRequest, formatCurrency, formatPercentage, formatValueByType } = window.dashboardUtils;
     const theme = window.__THEME__ || {};
 
+    const ANALISE_PAGE_SIZE = 100;
+    const JOB_POLL_INTERVAL_MS = 1000;
+
     const state = {
         dataset: null,
         categories: new Map(),
+        tableSort: new Map(),
     };
 
     // Estilos do select baseados no tema
@@ -92,11 +96,14 @@
         const deleteButton = document.getElementById('deleteBalanceteUpload');
         const feedback = document.getElementById('balanceteUploadFeedback');
 
-        if (workflow.balancete?.upload) {
+        // A página traz apenas o resumo do upload; os indicadores são carregados sob demanda.
+        if (Array.isArray(workflow.balancete?.upload?.records)) {
             state.dataset = workflow.balancete.upload;
             renderBalancete();
-        } else {
+        } else if (workflow.balancete?.has_upload) {
             fetchBalanceteDataset();
+        } else {
+            renderBalancete();
         }
 
         if (form) {
@@ -106,7 +113,10 @@
 
                 const formData = new FormData(form);
                 try {
-                    const response = await uploadFile(`/api/workflows/${workflow.id}/balancete/upload`, formData);
+                    const response = await uploadFile(`/api/workflows/${workflow.id}/balancete/upload`, formData, {
+                        datasetUrl: `/api/workflows/${workflow.id}/balancete/dataset`,
+                        feedback,
+                    });
                     state.dataset = response.dataset;
                     renderBalancete();
                     form.reset();
@@ -331,16 +341,16 @@
                     const novoTipo = e.target.value;
                     
                     try {
-                        await apiRequest(
+                        const response = await apiRequest(
                             `/api/workflows/${workflow.id}/balancete/indicador/${encodeURIComponent(indicadorNome)}/tipo`,
                             'PATCH',
                             { tipo_valor: novoTipo }
                         );
                         
-                        // Atualizar estado local
+                        // Atualizar estado local com o indicador devolvido (delta), sem recarregar o dataset
                         const record = state.dataset.records.find(r => r.indicador === indicadorNome);
                         if (record) {
-                            record.tipo_valor = novoTipo;
+                            Object.assign(record, response?.indicador || { tipo_valor: novoTipo });
                         }
                         
                         // Re-renderizar tabela para aplicar nova formatação
@@ -375,7 +385,10 @@
                 formData.append('categoria', slug);
                 setFeedback(feedback, '');
                 try {
-                    const response = await uploadFile(`/api/workflows/${workflow.id}/analise-jp/upload/${slug}`, formData);
+                    const response = await uploadFile(`/api/workflows/${workflow.id}/analise-jp/upload/${slug}`, formData, {
+                        datasetUrl: `/api/workflows/${workflow.id}/analise-jp/dataset/${slug}`,
+                        feedback,
+                    });
                     state.categories.set(slug, response.dataset);
                     updateCategoryUI({ statusLabel, deleteButton, viewButton, tableContainer }, response.dataset);
                     form.reset();
@@ -404,25 +417,73 @@
 
         if (viewButton && tableContainer) {
             viewButton.addEventListener('click', async () => {
-                let dataset = state.categories.get(slug);
-                if (!dataset) {
+                if (tableContainer.classList.contains('hidden')) {
                     try {
-                        dataset = await apiRequest(`/api/workflows/${workflow.id}/analise-jp/dataset/${slug}`);
-                        state.categories.set(slug, dataset);
+                        await loadAnalisePage(slug, tableContainer, 0);
                     } catch (error) {
                         alert(error.message);
                         return;
                     }
                 }
-                if (!dataset?.records?.length) {
-                    tableContainer.innerHTML = '<p class="text-sm opacity-70">Nenhum dado disponível para esta categoria.</p>';
-                } else {
-                    tableContainer.innerHTML = buildAnaliseTable(dataset);
-                }
                 tableContainer.classList.toggle('hidden');
                 viewButton.textContent = tableContainer.classList.contains('hidden') ? 'Ver tabela' : 'Ocultar tabela';
             });
+
+            tableContainer.addEventListener('click', async (event) => {
+                const sortHeader = event.target.closest('[data-sort-field]');
+                if (sortHeader) {
+                    const field = sortHeader.dataset.sortField;
+                    const current = state.tableSort.get(slug);
+                    state.tableSort.set(slug, current === field ? `-${field}` : field);
+                    try {
+                        await loadAnalisePage(slug, tableContainer, 0);
+                    } catch (error) {
+                        alert(error.message);
+                    }
+                    return;
+                }
+
+                const button = event.target.closest('[data-page-offset]');
+                if (!button || button.disabled) return;
+                try {
+                    await loadAnalisePage(slug, tableContainer, Number(button.dataset.pageOffset) || 0);
+                } catch (error) {
+                    alert(error.message);
+                }
+            });
+        }
+    }
+
+    async function loadAnalisePage(slug, tableContainer, offset) {
+        const params = new URLSearchParams({ offset: String(offset), limit: String(ANALISE_PAGE_SIZE) });
+        const sort = state.tableSort.get(slug);
+        if (sort) params.set('sort', sort);
+        const page = await apiRequest(`/api/workflows/${workflow.id}/analise-jp/dataset/${slug}/records?${params}`);
+        if (!page?.records?.length) {
+            tableContainer.innerHTML = '<p class="text-sm opacity-70">Nenhum dado disponível para esta categoria.</p>';
+            return;
         }
+        tableContainer.innerHTML = buildAnaliseTable(page) + buildAnalisePager(page);
+    }
+
+    function buildAnalisePager(page) {
+        const start = page.offset + 1;
+        const end = page.offset + page.records.length;
+        const previousOffset = Math.max(page.offset - page.limit, 0);
+        const nextOffset = page.offset + page.limit;
+        const hasPrevious = page.offset > 0;
+        const hasNext = nextOffset < page.total;
+        const buttonClass = 'px-3 py-1 rounded border border-white/20 text-xs hover:border-white/40 transition disabled:opacity-40 disabled:cursor-not-allowed';
+
+        return `
+            <div class="flex items-center justify-between gap-3 mt-3 text-xs opacity-80">
+                <span>Linhas ${start}–${end} de ${page.total}</span>
+                <div class="flex gap-2">
+                    <button type="button" class="${buttonClass}" data-page-offset="${previousOffset}" ${hasPrevious ? '' : 'disabled'}>Anterior</button>
+                    <button type="button" class="${buttonClass}" data-page-offset="${nextOffset}" ${hasNext ? '' : 'disabled'}>Próxima</button>
+                </div>
+            </div>
+        `;
     }
 
     function updateCategoryUI(elements, dataset) {
@@ -496,7 +557,8 @@
             }
         }
         if (viewButton) {
-            if (dataset?.records?.length) {
+            const visibleRows = dataset?.totals?.visiveis ?? dataset?.records?.length ?? 0;
+            if (visibleRows) {
                 viewButton.disabled = false;
                 viewButton.classList.remove('opacity-40', 'cursor-not-allowed');
             } else {
@@ -519,8 +581,12 @@
             return `<tr>${cells}</tr>`;
         });
 
+        const sort = dataset.sort || '';
         const header = fields
-            .map((key) => `<th class="px-3 py-2 border-b border-white/10 text-left text-xs uppercase tracking-wide opacity-70">${key}</th>`)
+            .map((key) => {
+                const indicator = sort === key ? ' ▲' : sort === `-${key}` ? ' ▼' : '';
+                return `<th class="px-3 py-2 border-b border-white/10 text-left text-xs uppercase tracking-wide opacity-70 cursor-pointer select-none" data-sort-field="${key}">${key}${indicator}</th>`;
+            })
             .join('');
 
         return `
@@ -541,7 +607,7 @@
         element.classList.toggle('text-rose-300', !success);
     }
 
-    async function uploadFile(url, formData) {
+    async function uploadFile(url, formData, { datasetUrl, feedback } = {}) {
         const response = await fetch(url, {
             method: 'POST',
             body: formData,
@@ -551,7 +617,26 @@
             const data = await response.json().catch(() => ({}));
             throw new Error(data.error || data.message || `Erro ${response.status}`);
         }
-        return response.json();
+        const data = await response.json();
+        if (response.status !== 202 || !data.status_url) {
+            return data;
+        }
+
+        // Upload assíncrono: acompanha o job e busca o dataset quando terminar.
+        const job = await waitForJob(data.status_url, feedback);
+        const dataset = datasetUrl ? await apiRequest(datasetUrl) : null;
+        return { message: 'Upload processado com sucesso.', dataset, job };
+    }
+
+    async function waitForJob(statusUrl, feedback) {
+        for (;;) {
+            const { job } = await apiRequest(statusUrl);
+            if (job.status === 'concluido') return job;
+            if (job.status === 'erro') throw new Error(job.erro || 'Falha ao processar o arquivo.');
+            const linhas = job.linhas_processadas ? ` · ${job.linhas_processadas} linhas lidas` : '';
+            setFeedback(feedback, `Processando arquivo (${job.progresso}%)${linhas}...`, true);
+            await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        }
     }
 
     function renderAnaliseJP() {
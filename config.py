@@ -6,11 +6,67 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_UPLOAD_DIR = BASE_DIR / 'uploads'
+DEFAULT_DATABASE_URL = 'mysql+pymysql://root:@localhost:3306/dashboards'
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.lower() in {'1', 'true', 'sim'}
+
+
+def build_engine_options(database_url: str) -> dict:
+    """Opções do engine do SQLAlchemy a partir das variáveis DB_*.
+
+    pool_pre_ping testa a conexão antes do uso e pool_recycle a renova antes de o MySQL
+    (ou um proxy no caminho) derrubá-la por inatividade: sem isso, a primeira requisição
+    depois de um período parado falha ou espera o timeout da conexão morta.
+    """
+    options = {
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', True),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    if database_url.startswith('sqlite'):
+        return options
+
+    options.update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    )
+    if database_url.startswith('mysql'):
+        connect_args = {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 10))}
+        statement_timeout_ms = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+        if statement_timeout_ms > 0:
+            # max_execution_time (MySQL 5.7.8+) limita apenas SELECTs; gravações não são interrompidas.
+            connect_args['init_command'] = f'SET SESSION max_execution_time={statement_timeout_ms}'
+        options['connect_args'] = connect_args
+    return options
 
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev_key_123'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'mysql+pymysql://root:@localhost:3306/dashboards'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or DEFAULT_DATABASE_URL
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Leituras grandes usam cursor no servidor (stream_results), trazendo DB_STREAM_YIELD_PER linhas por vez.
+    DB_STREAM_RESULTS = _env_flag('DB_STREAM_RESULTS', True)
+    DB_STREAM_YIELD_PER = int(os.environ.get('DB_STREAM_YIELD_PER', 1000))
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or str(DEFAULT_UPLOAD_DIR)
-    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_SIZE_MB', 15)) * 1024 * 1024
\ No newline at end of file
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_SIZE_MB', 15)) * 1024 * 1024
+    ANALISE_STORAGE_FORMAT = os.environ.get('ANALISE_STORAGE_FORMAT') or 'parquet'
+    # zstd quando o pacote zstandard estiver instalado; caso contrário, gzip.
+    STORAGE_COMPRESSION = os.environ.get('STORAGE_COMPRESSION') or 'zstd'
+    CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_MB', 64)) * 1024 * 1024
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'memory'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 3600))
+    UPLOAD_ASYNC = os.environ.get('UPLOAD_ASYNC', '').lower() in {'1', 'true', 'sim'}
+    UPLOAD_JOB_WORKERS = int(os.environ.get('UPLOAD_JOB_WORKERS', 2))
+    # Jobs sem progresso por mais tempo que isso (ex.: worker reiniciado) são marcados como erro.
+    UPLOAD_JOB_TIMEOUT_MINUTES = int(os.environ.get('UPLOAD_JOB_TIMEOUT_MINUTES', 15))
+    PARSE_POOL_WORKERS = int(os.environ.get('PARSE_POOL_WORKERS', 2))
+    PARSE_POOL_CSV_MIN_BYTES = int(os.environ.get('PARSE_POOL_CSV_MIN_MB', 20)) * 1024 * 1024
+    # Snapshots dos dashboards publicados são reconstruídos em segundo plano após cada alteração.
+    DASHBOARD_SNAPSHOT_ASYNC = os.environ.get('DASHBOARD_SNAPSHOT_ASYNC', '1').lower() in {'1', 'true', 'sim'}
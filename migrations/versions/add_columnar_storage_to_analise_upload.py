@@ -0,0 +1,47 @@
+"""add columnar storage to analise_upload
+
+Revision ID: columnar_storage_001
+Revises: merge_perf_opt_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'columnar_storage_001'
+down_revision = 'merge_perf_opt_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'analise_uploads',
+        sa.Column('formato_armazenamento', sa.String(length=20), nullable=False, server_default='json')
+    )
+    op.add_column('analise_uploads', sa.Column('caminho_dados', sa.String(length=500), nullable=True))
+    op.add_column('analise_uploads', sa.Column('esquema_dados', sa.JSON(), nullable=True))
+    op.add_column('analise_uploads', sa.Column('total_linhas', sa.Integer(), nullable=True))
+
+    # Uploads em formato colunar não guardam mais os registros no banco.
+    op.alter_column(
+        'analise_uploads',
+        'dados_extraidos',
+        existing_type=sa.JSON(),
+        nullable=True
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'analise_uploads',
+        'dados_extraidos',
+        existing_type=sa.JSON(),
+        nullable=False
+    )
+    op.drop_column('analise_uploads', 'total_linhas')
+    op.drop_column('analise_uploads', 'esquema_dados')
+    op.drop_column('analise_uploads', 'caminho_dados')
+    op.drop_column('analise_uploads', 'formato_armazenamento')
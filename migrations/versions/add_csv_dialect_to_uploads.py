@@ -0,0 +1,26 @@
+"""add dialeto_csv to uploads
+
+Revision ID: csv_dialect_001
+Revises: arquivo_updated_at_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'csv_dialect_001'
+down_revision = 'arquivo_updated_at_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analise_uploads', sa.Column('dialeto_csv', sa.JSON(), nullable=True))
+    op.add_column('arquivos_importados', sa.Column('dialeto_csv', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('arquivos_importados', 'dialeto_csv')
+    op.drop_column('analise_uploads', 'dialeto_csv')
@@ -0,0 +1,24 @@
+"""add dados_atualizados_em to workflows
+
+Revision ID: workflow_data_timestamp_001
+Revises: dashboard_snapshots_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'workflow_data_timestamp_001'
+down_revision = 'dashboard_snapshots_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('workflows', sa.Column('dados_atualizados_em', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('workflows', 'dados_atualizados_em')
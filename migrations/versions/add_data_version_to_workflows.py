@@ -0,0 +1,24 @@
+"""add versao_dados to workflows
+
+Revision ID: workflow_version_001
+Revises: hidden_rows_bitmap_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'workflow_version_001'
+down_revision = 'hidden_rows_bitmap_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('workflows', sa.Column('versao_dados', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('workflows', 'versao_dados')
@@ -0,0 +1,31 @@
+"""add hidden rows bitmap to analise_uploads
+
+Revision ID: hidden_rows_bitmap_001
+Revises: compressed_payloads_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'hidden_rows_bitmap_001'
+down_revision = 'compressed_payloads_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Uploads existentes ficam sem bitmap: a lista linhas_ocultas é convertida sob demanda.
+    op.add_column(
+        'analise_uploads',
+        sa.Column('mascara_ocultas', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True),
+    )
+    op.add_column('analise_uploads', sa.Column('assinatura_ocultas', sa.String(length=40), nullable=True))
+
+
+def downgrade():
+    op.drop_column('analise_uploads', 'assinatura_ocultas')
+    op.drop_column('analise_uploads', 'mascara_ocultas')
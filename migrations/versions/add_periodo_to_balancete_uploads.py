@@ -0,0 +1,47 @@
+"""add periodo to arquivos_importados and upload_jobs
+
+Revision ID: balancete_periodo_001
+Revises: balancete_indicadores_001
+Create Date: 2026-10-18
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'balancete_periodo_001'
+down_revision = 'balancete_indicadores_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('arquivos_importados', sa.Column('periodo', sa.Date(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('periodo', sa.Date(), nullable=True))
+
+    # Até aqui cada workflow guardava um único upload: o período é o mês em que foi enviado.
+    bind = op.get_bind()
+    arquivos = sa.table(
+        'arquivos_importados',
+        sa.column('id', sa.Integer()),
+        sa.column('data_upload', sa.DateTime()),
+        sa.column('periodo', sa.Date()),
+    )
+    for row_id, data_upload in bind.execute(sa.select(arquivos.c.id, arquivos.c.data_upload)).fetchall():
+        enviado = data_upload or datetime.utcnow()
+        bind.execute(
+            arquivos.update().where(arquivos.c.id == row_id).values(periodo=enviado.date().replace(day=1))
+        )
+
+    with op.batch_alter_table('arquivos_importados') as batch_op:
+        batch_op.create_unique_constraint('uq_arquivos_importados_workflow_periodo', ['workflow_id', 'periodo'])
+
+
+def downgrade():
+    with op.batch_alter_table('arquivos_importados') as batch_op:
+        batch_op.drop_constraint('uq_arquivos_importados_workflow_periodo', type_='unique')
+    op.drop_column('upload_jobs', 'periodo')
+    op.drop_column('arquivos_importados', 'periodo')
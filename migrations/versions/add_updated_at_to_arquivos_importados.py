@@ -0,0 +1,26 @@
+"""add updated_at to arquivos_importados
+
+Revision ID: arquivo_updated_at_001
+Revises: columnar_storage_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'arquivo_updated_at_001'
+down_revision = 'columnar_storage_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('arquivos_importados', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Uploads existentes nunca foram alterados: a última modificação é o próprio upload.
+    op.execute('UPDATE arquivos_importados SET updated_at = data_upload')
+
+
+def downgrade():
+    op.drop_column('arquivos_importados', 'updated_at')
@@ -0,0 +1,43 @@
+"""compare balancete indicator names byte by byte
+
+Revision ID: balancete_indicador_binary_001
+Revises: parse_results_compressed_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'balancete_indicador_binary_001'
+down_revision = 'parse_results_compressed_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Só o MySQL tem collation sem acento/caixa por padrão; nos demais a coluna já é exata.
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.alter_column(
+        'balancete_indicadores',
+        'indicador',
+        existing_type=sa.String(length=255),
+        type_=mysql.VARCHAR(255, binary=True),
+        existing_nullable=False,
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    # Pode falhar se o mesmo upload tiver nomes que só diferem em acento ou caixa.
+    op.alter_column(
+        'balancete_indicadores',
+        'indicador',
+        existing_type=mysql.VARCHAR(255, binary=True),
+        type_=sa.String(length=255),
+        existing_nullable=False,
+    )
@@ -0,0 +1,107 @@
+"""store arquivo_blobs.resultado_parse as compressed binary
+
+Revision ID: parse_results_compressed_001
+Revises: workflow_data_timestamp_001
+Create Date: 2026-10-18
+
+"""
+import gzip
+import os
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'parse_results_compressed_001'
+down_revision = 'workflow_data_timestamp_001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+BINARY_TYPE = sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql')
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele, gzip
+    zstandard = None
+
+# Formato dos valores comprimidos nesta revisão, copiado aqui para que a migração não mude
+# junto com o código da aplicação: MAGIC + 1 byte do codec + corpo.
+MAGIC = b'DBZ'
+CODEC_NONE = b'\x00'
+CODEC_GZIP = b'\x01'
+CODEC_ZSTD = b'\x02'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _configured_codec():
+    requested = (os.environ.get('STORAGE_COMPRESSION') or 'zstd').strip().lower()
+    if requested == 'none':
+        return CODEC_NONE
+    if requested == 'gzip' or zstandard is None:
+        return CODEC_GZIP
+    return CODEC_ZSTD
+
+
+def _compress(data, codec):
+    if codec == CODEC_ZSTD:
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif codec == CODEC_GZIP:
+        body = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        body = data
+    return MAGIC + codec + body
+
+
+def _decompress(data):
+    if not data.startswith(MAGIC):
+        return data
+    codec, body = data[len(MAGIC):len(MAGIC) + 1], data[len(MAGIC) + 1:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("O pacote 'zstandard' é necessário para ler dados comprimidos com zstd.")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if codec == CODEC_GZIP:
+        return gzip.decompress(body)
+    if codec == CODEC_NONE:
+        return body
+    raise RuntimeError('Codec de compressão desconhecido.')
+
+
+def _rewrite_results(convert):
+    """Percorre os blobs por id em lotes, sem carregar todos os resultados na memória."""
+    bind = op.get_bind()
+    table = sa.table('arquivo_blobs', sa.column('id', sa.Integer()), sa.column('resultado_parse', sa.LargeBinary()))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.resultado_parse)
+            .where(table.c.id > last_id, table.c.resultado_parse.isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row_id, value in rows:
+            if isinstance(value, str):
+                value = value.encode('utf-8')
+            converted = convert(bytes(value))
+            if converted is not None:
+                bind.execute(table.update().where(table.c.id == row_id).values(resultado_parse=converted))
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    codec = _configured_codec()
+    with op.batch_alter_table('arquivo_blobs') as batch_op:
+        batch_op.alter_column('resultado_parse', existing_type=sa.JSON(), type_=BINARY_TYPE, existing_nullable=True)
+    _rewrite_results(lambda value: None if value.startswith(MAGIC) else _compress(value, codec))
+
+
+def downgrade():
+    _rewrite_results(lambda value: _decompress(value) if value.startswith(MAGIC) else None)
+    with op.batch_alter_table('arquivo_blobs') as batch_op:
+        batch_op.alter_column('resultado_parse', existing_type=BINARY_TYPE, type_=sa.JSON(), existing_nullable=True)
@@ -0,0 +1,45 @@
+"""create arquivo_blobs table and content hash columns
+
+Revision ID: arquivo_blobs_001
+Revises: upload_jobs_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'arquivo_blobs_001'
+down_revision = 'upload_jobs_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'arquivo_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chave', sa.String(length=80), nullable=False),
+        sa.Column('caminho', sa.String(length=500), nullable=False),
+        sa.Column('tamanho', sa.BigInteger(), nullable=True),
+        sa.Column('referencias', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('resultado_parse', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chave')
+    )
+    op.create_index('ix_arquivo_blobs_caminho', 'arquivo_blobs', ['caminho'], unique=False)
+
+    # Uploads anteriores continuam com caminho_arquivo próprio e hash nulo.
+    op.add_column('arquivos_importados', sa.Column('hash_conteudo', sa.String(length=64), nullable=True))
+    op.add_column('analise_uploads', sa.Column('hash_conteudo', sa.String(length=64), nullable=True))
+    op.add_column('upload_jobs', sa.Column('hash_conteudo', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('upload_jobs', 'hash_conteudo')
+    op.drop_column('analise_uploads', 'hash_conteudo')
+    op.drop_column('arquivos_importados', 'hash_conteudo')
+    op.drop_index('ix_arquivo_blobs_caminho', table_name='arquivo_blobs')
+    op.drop_table('arquivo_blobs')
@@ -0,0 +1,211 @@
+"""move balancete indicators to balancete_indicadores
+
+Revision ID: balancete_indicadores_001
+Revises: workflow_version_001
+Create Date: 2026-10-18
+
+"""
+import gzip
+import json
+import math
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'balancete_indicadores_001'
+down_revision = 'workflow_version_001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+DOUBLE = sa.Float(precision=53)
+NAME_MAX_LENGTH = 255
+NUMERIC_FIELDS = ('valor_periodo_1', 'valor_periodo_2', 'diferenca_absoluta', 'diferenca_percentual')
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele, gzip
+    zstandard = None
+
+# Formato dos valores comprimidos nesta revisão, copiado aqui para que a migração não mude
+# junto com o código da aplicação: MAGIC + 1 byte do codec + corpo.
+MAGIC = b'DBZ'
+CODEC_NONE = b'\x00'
+CODEC_GZIP = b'\x01'
+CODEC_ZSTD = b'\x02'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _configured_codec():
+    requested = (os.environ.get('STORAGE_COMPRESSION') or 'zstd').strip().lower()
+    if requested == 'none':
+        return CODEC_NONE
+    if requested == 'gzip' or zstandard is None:
+        return CODEC_GZIP
+    return CODEC_ZSTD
+
+
+def _compress(data, codec):
+    if codec == CODEC_ZSTD:
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif codec == CODEC_GZIP:
+        body = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        body = data
+    return MAGIC + codec + body
+
+
+def _decompress(data):
+    if not data.startswith(MAGIC):
+        return data
+    codec, body = data[len(MAGIC):len(MAGIC) + 1], data[len(MAGIC) + 1:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("O pacote 'zstandard' é necessário para ler dados comprimidos com zstd.")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if codec == CODEC_GZIP:
+        return gzip.decompress(body)
+    if codec == CODEC_NONE:
+        return body
+    raise RuntimeError('Codec de compressão desconhecido.')
+
+
+def _dumps(value, codec):
+    return _compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), codec)
+
+
+def _loads(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return json.loads(_decompress(bytes(data)))
+
+
+def _unique_names(nomes):
+    """Nomes únicos por upload; a última ocorrência de um nome repetido fica com ele."""
+    bases = [str(nome).strip()[:NAME_MAX_LENGTH].rstrip() for nome in nomes]
+    last = {base: position for position, base in enumerate(bases)}
+    taken = set(last)
+    counters = {}
+    unique = []
+    for position, base in enumerate(bases):
+        if last[base] == position:
+            unique.append(base)
+            continue
+        candidate = base
+        while candidate in taken:
+            counters[base] = counters.get(base, 1) + 1
+            suffix = f' ({counters[base]})'
+            candidate = base[:NAME_MAX_LENGTH - len(suffix)] + suffix
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def _number_or_none(value):
+    if value is None:
+        return None
+    number = float(value)
+    return None if math.isnan(number) else number
+
+
+def _indicator_rows(arquivo_id, indicadores):
+    nomes = _unique_names(item.get('indicador') or '' for item in indicadores)
+    rows = []
+    for ordem, (nome, item) in enumerate(zip(nomes, indicadores)):
+        row = {field: _number_or_none(item.get(field)) for field in NUMERIC_FIELDS}
+        row.update(
+            arquivo_id=arquivo_id,
+            ordem=ordem,
+            indicador=nome,
+            tendencia=item.get('tendencia'),
+            tipo_valor=item.get('tipo_valor') or 'currency',
+        )
+        rows.append(row)
+    return rows
+
+arquivos = sa.table(
+    'arquivos_importados',
+    sa.column('id', sa.Integer()),
+    sa.column('dados_extraidos', sa.LargeBinary()),
+)
+
+
+def _payload_batches():
+    """Percorre os uploads por id em lotes, sem carregar todos os payloads na memória."""
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(arquivos.c.id, arquivos.c.dados_extraidos)
+            .where(arquivos.c.id > last_id, arquivos.c.dados_extraidos.isnot(None))
+            .order_by(arquivos.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        yield [(row_id, _loads(value)) for row_id, value in rows]
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    indicadores = op.create_table(
+        'balancete_indicadores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('arquivo_id', sa.Integer(), nullable=False),
+        sa.Column('ordem', sa.Integer(), nullable=False),
+        sa.Column('indicador', sa.String(length=255), nullable=False),
+        sa.Column('valor_periodo_1', DOUBLE, nullable=True),
+        sa.Column('valor_periodo_2', DOUBLE, nullable=True),
+        sa.Column('diferenca_absoluta', DOUBLE, nullable=True),
+        sa.Column('diferenca_percentual', DOUBLE, nullable=True),
+        sa.Column('tendencia', sa.String(length=10), nullable=True),
+        sa.Column('tipo_valor', sa.String(length=20), nullable=False),
+        sa.ForeignKeyConstraint(['arquivo_id'], ['arquivos_importados.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('arquivo_id', 'indicador', name='uq_balancete_indicadores_arquivo_indicador'),
+    )
+    op.create_index('ix_balancete_indicadores_arquivo_ordem', 'balancete_indicadores', ['arquivo_id', 'ordem'], unique=False)
+
+    bind = op.get_bind()
+    codec = _configured_codec()
+    for batch in _payload_batches():
+        for row_id, payload in batch:
+            if not isinstance(payload, dict) or 'indicadores' not in payload:
+                continue
+            rows = _indicator_rows(row_id, payload.pop('indicadores') or [])
+            if rows:
+                bind.execute(indicadores.insert(), rows)
+            payload['total_indicadores'] = len(rows)
+            bind.execute(
+                arquivos.update().where(arquivos.c.id == row_id).values(dados_extraidos=_dumps(payload, codec))
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    indicadores = sa.table(
+        'balancete_indicadores',
+        *(sa.column(name) for name in (
+            'arquivo_id', 'ordem', 'indicador', 'valor_periodo_1', 'valor_periodo_2',
+            'diferenca_absoluta', 'diferenca_percentual', 'tendencia', 'tipo_valor',
+        )),
+    )
+    codec = _configured_codec()
+    for batch in _payload_batches():
+        for row_id, payload in batch:
+            rows = bind.execute(
+                sa.select(*(column for column in indicadores.c if column.name not in ('arquivo_id', 'ordem')))
+                .where(indicadores.c.arquivo_id == row_id)
+                .order_by(indicadores.c.ordem)
+            ).mappings().all()
+            payload['indicadores'] = [dict(row) for row in rows]
+            bind.execute(
+                arquivos.update().where(arquivos.c.id == row_id).values(dados_extraidos=_dumps(payload, codec))
+            )
+
+    op.drop_index('ix_balancete_indicadores_arquivo_ordem', table_name='balancete_indicadores')
+    op.drop_table('balancete_indicadores')
@@ -0,0 +1,36 @@
+"""create dashboard_snapshots table
+
+Revision ID: dashboard_snapshots_001
+Revises: balancete_periodo_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'dashboard_snapshots_001'
+down_revision = 'balancete_periodo_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('workflow_id', sa.Integer(), nullable=False),
+        sa.Column('versao_dados', sa.Integer(), nullable=True),
+        sa.Column('conteudo', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('workflow_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_snapshots')
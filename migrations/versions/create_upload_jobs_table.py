@@ -0,0 +1,45 @@
+"""create upload_jobs table
+
+Revision ID: upload_jobs_001
+Revises: csv_dialect_001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'upload_jobs_001'
+down_revision = 'csv_dialect_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'upload_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('workflow_id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('categoria', sa.String(length=120), nullable=True),
+        sa.Column('nome_arquivo', sa.String(length=255), nullable=False),
+        sa.Column('caminho_arquivo', sa.String(length=500), nullable=False),
+        sa.Column('caminho_temporario', sa.String(length=500), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pendente'),
+        sa.Column('progresso', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('linhas_processadas', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('erro', sa.Text(), nullable=True),
+        sa.Column('resultado', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['workflow_id'], ['workflows.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_upload_jobs_workflow_id', 'upload_jobs', ['workflow_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_upload_jobs_workflow_id', table_name='upload_jobs')
+    op.drop_table('upload_jobs')
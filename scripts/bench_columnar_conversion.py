@@ -0,0 +1,275 @@
+"""Benchmark de regressão das conversões colunares dos uploads.
+
+Compara as versões vetorizadas com as implementações linha a linha (iterrows) que elas
+substituíram, conferindo que a saída é idêntica e medindo o ganho:
+
+- _dataframe_to_records (análise JP) contra o laço com str().strip() por célula;
+- _build_payload (balancete) contra o cálculo de diferenças e tendência por linha;
+- coerce_numeric contra coerce_float aplicado valor a valor.
+
+Uso:
+    python scripts/bench_columnar_conversion.py --linhas 200000
+
+Sai com código 1 se alguma saída divergir.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.analise_chart_service import coerce_numeric  # noqa: E402
+from app.services.analise_jp_service import _dataframe_to_records, coerce_float  # noqa: E402
+from app.services.workflow_import_service import _build_payload, _convert_numeric  # noqa: E402
+
+TEXT_SAMPLES = ["", " ", "abc", " Nome ", "Cancelado", "nan", "None", " x"]
+NUMERIC_SAMPLES = [
+    "R$ 1.234,50", "1,5", "10%", "-3", "2.5", " 7 ", "1e3", "1.000.000,00", "0", "inf", "nan", "1_000", "12,3.4",
+]
+
+
+# -----------------------------------------------------------------------------
+# Implementações de referência (anteriores à vetorização)
+# -----------------------------------------------------------------------------
+
+
+def reference_records(dataframe: pd.DataFrame) -> List[dict]:
+    records: List[dict] = []
+
+    headers = []
+    for column in dataframe.columns:
+        header = str(column).strip()
+        if not header:
+            headers.append("Coluna sem nome")
+        else:
+            headers.append(header)
+
+    for _, row in dataframe.iterrows():
+        record = {}
+        is_empty = True
+
+        for header, value in zip(headers, row.tolist()):
+            value_str = str(value).strip() if value is not None else ""
+            if value_str:
+                is_empty = False
+            record[header] = value_str
+
+        if not is_empty:
+            records.append(record)
+
+    return records
+
+
+def reference_payload(df: pd.DataFrame) -> Dict[str, Any]:
+    indicador_col = df.columns[0]
+    periodo1_col = df.columns[1]
+    periodo2_col = df.columns[2]
+
+    periodo1_label = str(periodo1_col).strip() or 'Periodo 1'
+    periodo2_label = str(periodo2_col).strip() or 'Periodo 2'
+
+    df[indicador_col] = df[indicador_col].astype(str).str.strip()
+    df = df[df[indicador_col] != '']
+
+    df[periodo1_col] = _convert_numeric(df[periodo1_col])
+    df[periodo2_col] = _convert_numeric(df[periodo2_col])
+
+    diff_abs_col = None
+    diff_pct_col = None
+
+    if len(df.columns) >= 4:
+        diff_abs_col = df.columns[3]
+        df[diff_abs_col] = _convert_numeric(df[diff_abs_col])
+    if len(df.columns) >= 5:
+        diff_pct_col = df.columns[4]
+        df[diff_pct_col] = _convert_numeric(df[diff_pct_col])
+
+    indicadores = []
+    for _, row in df.iterrows():
+        valor1 = row[periodo1_col]
+        valor2 = row[periodo2_col]
+
+        if diff_abs_col is not None:
+            diff_abs = row[diff_abs_col]
+        else:
+            diff_abs = None
+            if pd.notna(valor1) and pd.notna(valor2):
+                diff_abs = valor2 - valor1
+            if diff_abs is not None and pd.isna(diff_abs):
+                diff_abs = None
+
+        if diff_pct_col is not None:
+            diff_pct = row[diff_pct_col]
+        else:
+            if valor1 in [None, 0] or pd.isna(valor1):
+                diff_pct = None
+            elif pd.isna(valor2):
+                diff_pct = None
+            else:
+                diff_pct = ((valor2 - valor1) / valor1) * 100
+
+        tendencia = 'flat'
+        if diff_abs is not None:
+            if diff_abs > 0:
+                tendencia = 'up'
+            elif diff_abs < 0:
+                tendencia = 'down'
+
+        indicadores.append({
+            'indicador': row[indicador_col],
+            'valor_periodo_1': None if pd.isna(valor1) else float(valor1),
+            'valor_periodo_2': None if pd.isna(valor2) else float(valor2),
+            'diferenca_absoluta': None if diff_abs is None else float(diff_abs),
+            'diferenca_percentual': None if diff_pct is None or pd.isna(diff_pct) else float(diff_pct),
+            'tendencia': tendencia,
+            'tipo_valor': 'currency',
+        })
+
+    return {
+        'periodo_1_label': periodo1_label,
+        'periodo_2_label': periodo2_label,
+        'total_indicadores': len(indicadores),
+        'indicadores': indicadores,
+    }
+
+
+def reference_numeric(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    parsed = [coerce_float(value) if pd.notna(value) else None for value in values.tolist()]
+    valid = np.array([number is not None for number in parsed], dtype=bool)
+    numbers = np.array([np.nan if number is None else number for number in parsed], dtype=np.float64)
+    return numbers, valid
+
+
+# -----------------------------------------------------------------------------
+# Dados sintéticos e comparação
+# -----------------------------------------------------------------------------
+
+
+def random_cell(rng: random.Random, missing: Any = None) -> Any:
+    roll = rng.random()
+    if roll < 0.05:
+        return missing
+    if roll < 0.45:
+        return rng.choice(TEXT_SAMPLES)
+    if roll < 0.75:
+        return rng.choice(NUMERIC_SAMPLES)
+    return f"{rng.uniform(-1e6, 1e6):.2f}".replace(".", ",")
+
+
+def analise_frame(rng: random.Random, linhas: int) -> pd.DataFrame:
+    width = rng.randint(3, 5)
+    columns = ["Nome", " Valor ", "", "Situação", "Data"][:width]
+    # Células ausentes chegam como NaN (leitura do pandas), nunca como None: com None o
+    # iterrows dá '' ou 'nan' conforme o layout interno do DataFrame.
+    data = {f"c{position}": [random_cell(rng, np.nan) for _ in range(linhas)] for position in range(width)}
+    frame = pd.DataFrame(data, dtype=object)
+    frame.columns = columns
+    return frame
+
+
+def balancete_frame(rng: random.Random, linhas: int) -> pd.DataFrame:
+    width = rng.randint(3, 5)
+    names = ["Indicador", "2024", "2025", "Diferença", "Diferença %"][:width]
+    data = {names[0]: [rng.choice(["Receita", " Custo ", "", "Margem", "EBITDA"]) for _ in range(linhas)]}
+    for name in names[1:]:
+        data[name] = [random_cell(rng) for _ in range(linhas)]
+    return pd.DataFrame(data, dtype=object)
+
+
+def same_value(left: Any, right: Any) -> bool:
+    if isinstance(left, float) and isinstance(right, float) and math.isnan(left) and math.isnan(right):
+        return True
+    return type(left) is type(right) and left == right
+
+
+def same_payload(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+    if {key: value for key, value in left.items() if key != 'indicadores'} != {
+        key: value for key, value in right.items() if key != 'indicadores'
+    }:
+        return False
+    if len(left['indicadores']) != len(right['indicadores']):
+        return False
+    for a, b in zip(left['indicadores'], right['indicadores']):
+        if a.keys() != b.keys() or not all(same_value(a[key], b[key]) for key in a):
+            return False
+    return True
+
+
+def same_numeric(left: Tuple[np.ndarray, np.ndarray], right: Tuple[np.ndarray, np.ndarray]) -> bool:
+    (numbers_a, valid_a), (numbers_b, valid_b) = left, right
+    return np.array_equal(valid_a, valid_b) and np.array_equal(numbers_a, numbers_b, equal_nan=True)
+
+
+def timed(func: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def check_equivalence(rng: random.Random, rodadas: int) -> Dict[str, int]:
+    mismatches = {"registros": 0, "balancete": 0, "numerico": 0}
+    for _ in range(rodadas):
+        linhas = rng.randint(0, 60)
+        frame = analise_frame(rng, linhas)
+        if reference_records(frame) != _dataframe_to_records(frame):
+            mismatches["registros"] += 1
+        frame = balancete_frame(rng, linhas)
+        if not same_payload(reference_payload(frame.copy()), _build_payload(frame.copy())):
+            mismatches["balancete"] += 1
+        series = pd.Series([random_cell(rng) for _ in range(linhas)], dtype=object)
+        if not same_numeric(reference_numeric(series), coerce_numeric(series)):
+            mismatches["numerico"] += 1
+    return mismatches
+
+
+def benchmark(rng: random.Random, linhas: int) -> List[Tuple[str, float, float, bool]]:
+    results = []
+
+    frame = analise_frame(rng, linhas)
+    expected, before = timed(lambda: reference_records(frame))
+    actual, after = timed(lambda: _dataframe_to_records(frame))
+    results.append(("_dataframe_to_records", before, after, expected == actual))
+
+    frame = balancete_frame(rng, linhas)
+    expected, before = timed(lambda: reference_payload(frame.copy()))
+    actual, after = timed(lambda: _build_payload(frame.copy()))
+    results.append(("_build_payload", before, after, same_payload(expected, actual)))
+
+    series = pd.Series([random_cell(rng) for _ in range(linhas)], dtype=object)
+    expected, before = timed(lambda: reference_numeric(series))
+    actual, after = timed(lambda: coerce_numeric(series))
+    results.append(("coerce_numeric", before, after, same_numeric(expected, actual)))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200_000, help="linhas por benchmark")
+    parser.add_argument("--rodadas", type=int, default=500, help="quadros aleatórios na checagem de equivalência")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mismatches = check_equivalence(rng, args.rodadas)
+    print(f"Equivalência ({args.rodadas} quadros aleatórios): {mismatches}")
+
+    print(f"\n{'conversão':<24}{'linha a linha (s)':>18}{'vetorizada (s)':>16}{'ganho':>9}  saída igual")
+    identical = True
+    for name, before, after, same in benchmark(rng, args.linhas):
+        identical &= same
+        print(f"{name:<24}{before:>18.2f}{after:>16.2f}{before / after:>8.1f}x  {'sim' if same else 'NÃO'}")
+
+    return 0 if identical and not any(mismatches.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())